@@ -8,14 +8,26 @@ import json
 import hashlib
 import os
 import tempfile
+import time
+from typing import Generator
 from urllib.parse import urlparse
 
 import httpx
-from camoufox.async_api import AsyncCamoufox
+from utils.browser_transport import BrowserFetchResult, acquire_browser_slot, get_browser_transport
 from utils.config import AccountConfig, ProviderConfig
+from utils.cdk_ledger import CdkLedger
+from utils.deadline import Deadline, DeadlineExceededError
+from utils.geoip_cache import launch_camoufox
+from utils.run_budget import SHED_NONE, SHED_SECONDARY_METHODS, SHED_TOPUP
+from utils.checkin_ledger import CheckInLedger
+from utils.circuit_breaker import ProviderUnavailableError, circuit_breaker, create_http_client
+from utils.session_store import SessionStore
 from utils.browser_utils import parse_cookies, get_random_user_agent, take_screenshot, aliyun_captcha_check
 from utils.http_utils import proxy_resolve, response_resolve
+from utils.identity_registry import identity_registry
+from utils.oauth_batch import OAUTH_RESULT_MAX_AGE_SECONDS
 from utils.topup import topup
+from utils.waf_detector import detect_waf_challenge, get_waf_cookie_ttl, waf_cookie_cache
 
 
 class CheckIn:
@@ -28,12 +40,26 @@ class CheckIn:
         provider_config: ProviderConfig,
         global_proxy: dict | None = None,
         storage_state_dir: str = "storage-states",
+        ledger: CheckInLedger | None = None,
+        browser_fallback: bool = True,
+        first_success: bool = False,
+        method_order: list[str] | None = None,
+        cdk_ledger_dir: str = "cdk-ledger",
+        stored_cookies: dict | None = None,
+        request_timeout: float = 30.0,
     ):
         """初始化签到管理器
 
         Args:
                 account_info: account 用户配置
                 proxy_config: 全局代理配置(可选)
+                ledger: 签到记录(可选)，用于跳过当前签到日已完成的认证方式
+                browser_fallback: API 返回 HTML 时是否在浏览器页面中重试
+                first_success: 任一认证方式成功后是否跳过其余方式
+                method_order: first_success 模式下认证方式的尝试顺序
+                cdk_ledger_dir: CDK 记录目录
+                stored_cookies: 上次签到后保存的 cookies（可选），优先于配置中的 cookies 使用
+                request_timeout: provider API 请求超时（秒），由启动前健康探测按延迟设置
         """
         self.account_name = account_name
         self.safe_account_name = "".join(c if c.isalnum() else "_" for c in account_name)
@@ -48,24 +74,62 @@ class CheckIn:
         # storage-states 目录
         self.storage_state_dir = storage_state_dir
 
+        # 签到记录
+        self.ledger = ledger
+
+        # CDK 记录目录
+        self.cdk_ledger_dir = cdk_ledger_dir
+
+        # 保存的 cookies
+        self.stored_cookies = stored_cookies
+
+        self.request_timeout = request_timeout
+
+        # 账号截止时间，由 execute 设置；未设置时不限制
+        self.deadline = Deadline()
+
+        # 运行时间预算不足时跳过充值，由 execute 设置
+        self.shed_topup = False
+
+        # WAF cookies 缓存（同一账号的多个步骤共享一次浏览器验证结果）
+        self.waf_cookies: dict | None = None
+
+        # 预先完成的 OAuth 授权结果 {认证方式: (成功标志, 授权结果, 授权准备信息, 授权时间 time.monotonic)}
+        self.oauth_results: dict[str, tuple[bool, dict, dict, float]] = {}
+
+        self.browser_fallback = browser_fallback
+
+        # 首次成功模式
+        self.first_success = first_success
+        self.method_order = method_order
+
         os.makedirs(self.storage_state_dir, exist_ok=True)
 
+    def _get_request_timeout(self) -> float:
+        """provider API 请求超时（秒），不超过账号截止时间的剩余时间
+
+        Raises:
+            DeadlineExceededError: 账号截止时间已到
+        """
+        self.deadline.check()
+        return self.deadline.clip(self.request_timeout)
+
     async def get_waf_cookies_with_browser(self) -> dict | None:
         """使用 Camoufox 获取 WAF cookies（隐私模式）"""
         print(
             f"ℹ️ {self.account_name}: Starting browser to get WAF cookies (using proxy: {'true' if self.camoufox_proxy_config else 'false'})"
         )
 
+        await acquire_browser_slot(self.account_name)
         with tempfile.TemporaryDirectory(prefix=f"camoufox_{self.safe_account_name}_waf_") as tmp_dir:
             print(f"ℹ️ {self.account_name}: Using temporary directory: {tmp_dir}")
-            async with AsyncCamoufox(
+            async with launch_camoufox(
+                self.camoufox_proxy_config,
                 persistent_context=True,
                 user_data_dir=tmp_dir,
                 headless=False,
                 humanize=True,
                 locale="en-US",
-                geoip=True if self.camoufox_proxy_config else False,
-                proxy=self.camoufox_proxy_config,
             ) as browser:
                 page = await browser.new_page()
 
@@ -113,22 +177,72 @@ class CheckIn:
                 finally:
                     await page.close()
 
+    async def get_waf_cookies(self) -> dict:
+        """获取 WAF cookies，同一实例内只通过浏览器获取一次
+
+        bypass_method 为 "auto" 时先探测 WAF 是否正在挑战，未挑战时不启动浏览器
+
+        Returns:
+            WAF cookies 字典，不需要或获取失败时返回空字典
+        """
+        if self.waf_cookies is not None:
+            return self.waf_cookies
+
+        if self.provider_config.is_waf_adaptive():
+            # 先通过 HTTP 探测，只有出现挑战页面时才启动浏览器
+            challenged = await asyncio.to_thread(
+                detect_waf_challenge,
+                self.provider_config.origin,
+                self.provider_config.get_status_url(),
+                self.camoufox_proxy_config,
+            )
+            if not challenged:
+                print(f"ℹ️ {self.account_name}: No WAF challenge detected, using user cookies directly")
+                self.waf_cookies = {}
+                return self.waf_cookies
+            print(f"ℹ️ {self.account_name}: WAF challenge detected, escalating to browser")
+        elif not self.provider_config.needs_waf_cookies():
+            print(f"ℹ️ {self.account_name}: Bypass WAF not required, using user cookies directly")
+            self.waf_cookies = {}
+            return self.waf_cookies
+
+        # 同一进程中之前通过浏览器获取的 WAF cookies（设置 WAF_COOKIE_TTL 时缓存）
+        origin = self.provider_config.origin.rstrip("/")
+        proxy_server = (self.camoufox_proxy_config or {}).get("server", "")
+        cached_cookies = waf_cookie_cache.get(origin, proxy_server)
+        if cached_cookies:
+            print(f"ℹ️ {self.account_name}: Reusing cached WAF cookies: {list(cached_cookies.keys())}")
+            self.waf_cookies = cached_cookies
+            return self.waf_cookies
+
+        waf_cookies = await self.get_waf_cookies_with_browser()
+        if not waf_cookies:
+            print(f"⚠️ {self.account_name}: Unable to get WAF cookies, continuing with empty cookies")
+            waf_cookies = {}  # 确保 waf_cookies 是空字典而不是 None
+        else:
+            print(f"✅ {self.account_name}: WAF cookies obtained")
+            waf_cookie_ttl = get_waf_cookie_ttl()
+            if waf_cookie_ttl > 0:
+                waf_cookie_cache.set(origin, proxy_server, waf_cookies, waf_cookie_ttl)
+        self.waf_cookies = waf_cookies
+        return self.waf_cookies
+
     async def get_aliyun_captcha_cookies_with_browser(self) -> dict | None:
         """使用 Camoufox 获取阿里云验证 cookies"""
         print(
             f"ℹ️ {self.account_name}: Starting browser to get Aliyun captcha cookies (using proxy: {'true' if self.camoufox_proxy_config else 'false'})"
         )
 
+        await acquire_browser_slot(self.account_name)
         with tempfile.TemporaryDirectory(prefix=f"camoufox_{self.safe_account_name}_aliyun_captcha_") as tmp_dir:
             print(f"ℹ️ {self.account_name}: Using temporary directory: {tmp_dir}")
-            async with AsyncCamoufox(
+            async with launch_camoufox(
+                self.camoufox_proxy_config,
                 persistent_context=True,
                 user_data_dir=tmp_dir,
                 headless=False,
                 humanize=True,
                 locale="en-US",
-                geoip=True if self.camoufox_proxy_config else False,
-                proxy=self.camoufox_proxy_config,
             ) as browser:
                 page = await browser.new_page()
 
@@ -289,16 +403,16 @@ class CheckIn:
             f"ℹ️ {self.account_name}: Starting browser to get status (using proxy: {'true' if self.camoufox_proxy_config else 'false'})"
         )
 
+        await acquire_browser_slot(self.account_name)
         with tempfile.TemporaryDirectory(prefix=f"camoufox_{self.safe_account_name}_status_") as tmp_dir:
             print(f"ℹ️ {self.account_name}: Using temporary directory: {tmp_dir}")
-            async with AsyncCamoufox(
+            async with launch_camoufox(
+                self.camoufox_proxy_config,
                 user_data_dir=tmp_dir,
                 persistent_context=True,
                 headless=False,
                 humanize=True,
                 locale="en-US",
-                geoip=True if self.camoufox_proxy_config else False,
-                proxy=self.camoufox_proxy_config,
             ) as browser:
                 page = await browser.new_page()
 
@@ -336,6 +450,41 @@ class CheckIn:
                 finally:
                     await page.close()
 
+    async def fetch_json_with_browser(
+        self,
+        client: httpx.Client,
+        url: str,
+        headers: dict,
+        context: str,
+    ) -> BrowserFetchResult | None:
+        """httpx 请求返回 HTML 时，在已通过验证的浏览器页面中重新请求
+
+        Args:
+            client: httpx 客户端（使用其中的 cookies）
+            url: 请求地址
+            headers: 请求头
+            context: 日志上下文
+
+        Returns:
+            BrowserFetchResult，未启用或仍然失败时返回 None
+        """
+        if not self.browser_fallback:
+            return None
+
+        print(f"ℹ️ {self.account_name}: Retrying {context} in browser page")
+        cookies = {cookie.name: cookie.value for cookie in client.cookies.jar}
+        result = await get_browser_transport(self.camoufox_proxy_config).fetch_json(
+            self.provider_config,
+            url,
+            self.account_name,
+            headers=headers,
+            cookies=cookies,
+        )
+        if result.data is None:
+            print(f"⚠️ {self.account_name}: Browser fetch for {context} failed: {result.error}")
+            return None
+        return result
+
     async def get_auth_client_id(self, client: httpx.Client, headers: dict, provider: str) -> dict:
         """获取状态信息
 
@@ -348,38 +497,21 @@ class CheckIn:
             包含 success 和 client_id 或 error 的字典
         """
         try:
-            response = client.get(self.provider_config.get_status_url(), headers=headers, timeout=30)
+            response = client.get(self.provider_config.get_status_url(), headers=headers, timeout=self._get_request_timeout())
 
             if response.status_code == 200:
                 data = response_resolve(response, f"get_auth_client_id_{provider}", self.account_name)
                 if data is None:
-
-                    # 尝试从浏览器 localStorage 获取状态
-                    # print(f"ℹ️ {self.account_name}: Getting status from browser")
-                    # try:
-                    #     status_data = await self.get_status_with_browser()
-                    #     if status_data:
-                    #         oauth = status_data.get(f"{provider}_oauth", False)
-                    #         if not oauth:
-                    #             return {
-                    #                 "success": False,
-                    #                 "error": f"{provider} OAuth is not enabled.",
-                    #             }
-
-                    #         client_id = status_data.get(f"{provider}_client_id", "")
-                    #         if client_id:
-                    #             print(f"✅ {self.account_name}: Got client ID from localStorage: " f"{client_id}")
-                    #             return {
-                    #                 "success": True,
-                    #                 "client_id": client_id,
-                    #             }
-                    # except Exception as browser_err:
-                    #     print(f"⚠️ {self.account_name}: Failed to get status from browser: " f"{browser_err}")
-
-                    return {
-                        "success": False,
-                        "error": "Failed to get client id: Invalid response type (saved to logs)",
-                    }
+                    # 在浏览器页面中重试
+                    browser_result = await self.fetch_json_with_browser(
+                        client, self.provider_config.get_status_url(), headers, f"get_auth_client_id_{provider}"
+                    )
+                    if browser_result is None:
+                        return {
+                            "success": False,
+                            "error": "Failed to get client id: Invalid response type (saved to logs)",
+                        }
+                    data = browser_result.data
 
                 if data.get("success"):
                     status_data = data.get("data", {})
@@ -425,16 +557,16 @@ class CheckIn:
             f"ℹ️ {self.account_name}: Starting browser to get auth state (using proxy: {'true' if self.camoufox_proxy_config else 'false'})"
         )
 
+        await acquire_browser_slot(self.account_name)
         with tempfile.TemporaryDirectory(prefix=f"camoufox_{self.safe_account_name}_auth_") as tmp_dir:
             print(f"ℹ️ {self.account_name}: Using temporary directory: {tmp_dir}")
-            async with AsyncCamoufox(
+            async with launch_camoufox(
+                self.camoufox_proxy_config,
                 user_data_dir=tmp_dir,
                 persistent_context=True,
                 headless=False,
                 humanize=True,
                 locale="en-US",
-                geoip=True if self.camoufox_proxy_config else False,
-                proxy=self.camoufox_proxy_config,
             ) as browser:
                 page = await browser.new_page()
 
@@ -493,40 +625,31 @@ class CheckIn:
     ) -> dict:
         """获取认证状态"""
         try:
-            response = client.get(self.provider_config.get_auth_state_url(), headers=headers, timeout=30)
+            response = client.get(self.provider_config.get_auth_state_url(), headers=headers, timeout=self._get_request_timeout())
 
             if response.status_code == 200:
                 json_data = response_resolve(response, "get_auth_state", self.account_name)
+                browser_cookies = None
                 if json_data is None:
-                    # 尝试从浏览器 localStorage 获取状态
-                    # print(f"ℹ️ {self.account_name}: Getting auth state from browser")
-                    # try:
-                    #     auth_result = await self.get_auth_state_with_browser()
-
-                    #     if not auth_result.get("success"):
-                    #         error_msg = auth_result.get("error", "Unknown error")
-                    #         print(f"❌ {self.account_name}: {error_msg}")
-                    #         return {
-                    #             "success": False,
-                    #             "error": "Failed to get auth state with browser",
-                    #         }
-
-                    #     return auth_result
-                    # except Exception as browser_err:
-                    #     print(f"⚠️ {self.account_name}: Failed to get auth state from browser: " f"{browser_err}")
-
-                    return {
-                        "success": False,
-                        "error": "Failed to get auth state: Invalid response type (saved to logs)",
-                    }
+                    # 在浏览器页面中重试，cookies 使用浏览器上下文中的 cookies
+                    browser_result = await self.fetch_json_with_browser(
+                        client, self.provider_config.get_auth_state_url(), headers, "get_auth_state"
+                    )
+                    if browser_result is None:
+                        return {
+                            "success": False,
+                            "error": "Failed to get auth state: Invalid response type (saved to logs)",
+                        }
+                    json_data = browser_result.data
+                    browser_cookies = browser_result.cookies
 
                 # 检查响应是否成功
                 if json_data.get("success"):
                     auth_data = json_data.get("data")
 
                     # 将 httpx Cookies 对象转换为 Camoufox 格式
-                    cookies = []
-                    if response.cookies:
+                    cookies = browser_cookies or []
+                    if browser_cookies is None and response.cookies:
                         parsed_domain = urlparse(self.provider_config.origin).netloc
 
                         print(f"ℹ️ {self.account_name}: Got {len(response.cookies)} cookies from auth state request")
@@ -583,16 +706,16 @@ class CheckIn:
             f"ℹ️ {self.account_name}: Starting browser to get user info (using proxy: {'true' if self.camoufox_proxy_config else 'false'})"
         )
 
+        await acquire_browser_slot(self.account_name)
         with tempfile.TemporaryDirectory(prefix=f"camoufox_{self.safe_account_name}_user_info_") as tmp_dir:
             print(f"ℹ️ {self.account_name}: Using temporary directory: {tmp_dir}")
-            async with AsyncCamoufox(
+            async with launch_camoufox(
+                self.camoufox_proxy_config,
                 user_data_dir=tmp_dir,
                 persistent_context=True,
                 headless=False,
                 humanize=True,
                 locale="en-US",
-                geoip=True if self.camoufox_proxy_config else False,
-                proxy=self.camoufox_proxy_config,
             ) as browser:
                 page = await browser.new_page()
 
@@ -657,30 +780,21 @@ class CheckIn:
     async def get_user_info(self, client: httpx.Client, headers: dict) -> dict:
         """获取用户信息"""
         try:
-            response = client.get(self.provider_config.get_user_info_url(), headers=headers, timeout=30)
+            response = client.get(self.provider_config.get_user_info_url(), headers=headers, timeout=self._get_request_timeout())
 
             if response.status_code == 200:
                 json_data = response_resolve(response, "get_user_info", self.account_name)
                 if json_data is None:
-                    # 尝试从浏览器获取用户信息
-                    # print(f"ℹ️ {self.account_name}: Getting user info from browser")
-                    # try:
-                    #     user_info_result = await self.get_user_info_with_browser()
-                    #     if user_info_result.get("success"):
-                    #         return user_info_result
-                    #     else:
-                    #         error_msg = user_info_result.get("error", "Unknown error")
-                    #         print(f"⚠️ {self.account_name}: {error_msg}")
-                    # except Exception as browser_err:
-                    #     print(
-                    #         f"⚠️ {self.account_name}: "
-                    #         f"Failed to get user info from browser: {browser_err}"
-                    #     )
-
-                    return {
-                        "success": False,
-                        "error": "Failed to get user info: Invalid response type (saved to logs)",
-                    }
+                    # 在浏览器页面中重试
+                    browser_result = await self.fetch_json_with_browser(
+                        client, self.provider_config.get_user_info_url(), headers, "get_user_info"
+                    )
+                    if browser_result is None:
+                        return {
+                            "success": False,
+                            "error": "Failed to get user info: Invalid response type (saved to logs)",
+                        }
+                    json_data = browser_result.data
 
                 if json_data.get("success"):
                     user_data = json_data.get("data", {})
@@ -699,10 +813,13 @@ class CheckIn:
                     return {
                         "success": False,
                         "error": f"Failed to get user info: {error_msg}",
+                        # new-api 未登录时返回 200 + "未登录" 提示
+                        "session_expired": "未登录" in error_msg or "not logged in" in error_msg.lower(),
                     }
             return {
                 "success": False,
                 "error": f"Failed to get user info: HTTP {response.status_code}",
+                "session_expired": response.status_code == 401,
             }
         except Exception as e:
             return {
@@ -722,7 +839,7 @@ class CheckIn:
         checkin_headers = headers.copy()
         checkin_headers.update({"Content-Type": "application/json", "X-Requested-With": "XMLHttpRequest"})
 
-        response = client.post(self.provider_config.get_sign_in_url(api_user), headers=checkin_headers, timeout=30)
+        response = client.post(self.provider_config.get_sign_in_url(api_user), headers=checkin_headers, timeout=self._get_request_timeout())
 
         print(f"📨 {self.account_name}: Response status code {response.status_code}")
 
@@ -768,6 +885,8 @@ class CheckIn:
 
         使用迭代器方式分步获取 CDK，每个 get_cdk 函数返回的 CDK 列表逐个执行 topup
         每次 topup 之间保持间隔时间，如果 topup 失败则停止
+        CDK 状态写入 CDK 记录，上次运行遗留的 CDK 优先兑换，已兑换的 CDK 不再提交；
+        遗留的 CDK 被 provider 拒绝时只记录失败并继续，不影响新 CDK 的获取
 
         Args:
             headers: 请求头
@@ -802,21 +921,30 @@ class CheckIn:
             "success": True,
             "topup_count": 0,
             "topup_success_count": 0,
+            "already_used_count": 0,
             "error": "",
         }
 
-        # 使用迭代器方式分步获取 CDK
-        # 每次迭代调用一个 get_cdk 函数，返回该函数的 CDK 列表
-        cdk_iter = self.provider_config.iter_get_cdk(self.account_config)
+        # CDK 记录: 先兑换上次运行遗留的 CDK，已兑换的 CDK 不再提交
+        cdk_ledger = CdkLedger(self.provider_config.name, self.account_name, self.cdk_ledger_dir)
         topup_count = 0
         should_stop = False
         remaining_cdks: list[str] = []  # 收集剩余的 CDK
+        error_msg = ""
 
-        for cdk_list in cdk_iter:
+        for cdk_list, leftover in self._iter_topup_cdks(cdk_ledger):
             print(f"ℹ️ {self.account_name}: Got {len(cdk_list)} CDK(s) from current getter")
-            
+
             # 遍历当前 get_cdk 函数返回的 CDK 列表
             for i, cdk in enumerate(cdk_list):
+                # 剩余时间不够等待间隔并完成下一次 topup 时停止，已获取的 CDK 保留在记录中下次运行兑换
+                if topup_count > 0 and self.deadline.remaining() < topup_interval + self.request_timeout:
+                    remaining_cdks = cdk_list[i:]
+                    error_msg = "Account deadline approaching"
+                    print(f"⏰ {self.account_name}: Account deadline approaching, stopping topup process")
+                    should_stop = True
+                    break
+
                 # 如果不是第一个 CDK，等待间隔时间
                 if topup_count > 0 and topup_interval > 0:
                     print(f"⏳ {self.account_name}: Waiting {topup_interval} seconds before next topup...")
@@ -832,24 +960,34 @@ class CheckIn:
                     cookies=cookies,
                     key=cdk,
                     proxy=http_proxy,
+                    timeout=self._get_request_timeout(),
                 )
 
                 results["topup_count"] += 1
 
-                if topup_result.get("success"):
+                if topup_result.get("already_used"):
+                    # 已被使用的 CDK 不计入成功次数，记录后不再提交
+                    results["already_used_count"] += 1
+                    cdk_ledger.record_redeemed(cdk, already_used=True)
+                elif topup_result.get("success"):
                     results["topup_success_count"] += 1
-                    if not topup_result.get("already_used"):
-                        print(f"✅ {self.account_name}: Topup #{topup_count} successful")
+                    cdk_ledger.record_redeemed(cdk)
+                    print(f"✅ {self.account_name}: Topup #{topup_count} successful")
                 else:
                     # topup 失败，记录错误并停止
                     error_msg = topup_result.get("error", "Topup failed")
+                    cdk_ledger.record_failed(cdk, error_msg)
+                    if leftover and topup_result.get("code_rejected"):
+                        # 遗留的 CDK 可能已过期或失效，记录后继续兑换其它 CDK
+                        print(f"⚠️ {self.account_name}: Leftover CDK rejected, continuing with next CDK")
+                        continue
                     results["success"] = False
-                    # 收集当前列表中剩余的 CDK（已获取但未执行 topup 的）
+                    # 收集当前列表中剩余的 CDK（已获取但未执行 topup 的），下次运行优先兑换
                     remaining_cdks = cdk_list[i + 1:]
                     print(f"❌ {self.account_name}: Topup #{topup_count} failed, stopping topup process")
                     should_stop = True
                     break
-            
+
             # 如果需要停止，不再调用后续的 get_cdk 函数
             if should_stop:
                 break
@@ -858,7 +996,10 @@ class CheckIn:
         if remaining_cdks:
             remaining_cdks_str = ", ".join(remaining_cdks)
             results["error"] = f"{error_msg} | Remaining topup CDKs: {remaining_cdks_str}"
-            print(f"⚠️ {self.account_name}: {len(remaining_cdks)} remaining CDK(s) not topuped: {remaining_cdks_str}")
+            print(
+                f"⚠️ {self.account_name}: {len(remaining_cdks)} remaining CDK(s) not topuped, "
+                f"saved for next run: {remaining_cdks_str}"
+            )
         elif not results["success"]:
             # 没有剩余 CDK，但 topup 失败了
             results["error"] = error_msg
@@ -870,13 +1011,54 @@ class CheckIn:
 
         return results
 
+    def _iter_topup_cdks(self, cdk_ledger: CdkLedger) -> Generator[tuple[list[str], bool], None, None]:
+        """按批次返回待兑换的 CDK
+
+        第一批为上次运行遗留的 CDK，之后每批为一个 get_cdk 函数的结果；新获取的 CDK 先写入记录，
+        已兑换或本次运行已提交过的 CDK 会被过滤
+
+        Returns:
+            (CDK 列表, 是否为上次运行遗留的 CDK) 的迭代器
+        """
+        submitted: set[str] = set()
+
+        pending = cdk_ledger.get_pending()
+        if pending:
+            print(f"ℹ️ {self.account_name}: Redeeming {len(pending)} CDK(s) left over from previous runs first")
+            submitted.update(pending)
+            yield pending, True
+
+        for cdk_list in self.provider_config.iter_get_cdk(self.account_config, deadline=self.deadline):
+            cdk_ledger.record_fetched(cdk_list)
+            fresh = [cdk for cdk in cdk_list if cdk not in submitted and cdk_ledger.is_redeemable(cdk)]
+            if len(fresh) < len(cdk_list):
+                print(f"ℹ️ {self.account_name}: Skipping {len(cdk_list) - len(fresh)} CDK(s) already redeemed or tried")
+            submitted.update(fresh)
+            yield fresh, False
+
     async def check_in_with_cookies(self, cookies: dict, api_user: str | int) -> tuple[bool, dict]:
-        """使用已有 cookies 执行签到操作"""
+        """使用已有 cookies 执行签到操作
+
+        同一 provider 用户（origin 和 api_user 相同）在本次运行中已签到成功时，只用当前 cookies 查询一次用户信息，
+        确认 cookies 有效后复用其签到和充值结果
+        """
+        session = {"cookies": cookies, "api_user": f"{api_user}"}
+        origin = self.provider_config.origin
+        registered = identity_registry.get_result(origin, api_user)
+        if registered:
+            owner, _ = registered
+            print(f"♻️ {self.account_name}: Same provider user as {owner} (api_user {api_user}), verifying own cookies")
+            success, user_info = await self.check_balance_with_cookies(cookies, api_user)
+            if not success:
+                return False, user_info
+            print(f"♻️ {self.account_name}: Cookies valid, reusing check-in result of {owner}")
+            return True, {**user_info, "session": session, "alias_of": owner}
+
         print(
             f"ℹ️ {self.account_name}: Executing check-in with existing cookies (using proxy: {'true' if self.http_proxy_config else 'false'})"
         )
 
-        client = httpx.Client(http2=True, timeout=30.0, proxy=self.http_proxy_config)
+        client = create_http_client(self.http_proxy_config, self.request_timeout)
         try:
             client.cookies.update(cookies)
 
@@ -902,9 +1084,23 @@ class CheckIn:
                 print(f"ℹ️ {self.account_name}: Check-in completed automatically (triggered by user info request)")
 
             # 如果需要手动 topup（配置了 topup_path 和 get_cdk），执行 topup
-            if self.provider_config.needs_manual_topup():
+            # 同一身份的充值只执行一次，避免重复抽取 CDK
+            topup_owner = None
+            if self.provider_config.needs_manual_topup() and self.shed_topup:
+                print(f"⏰ {self.account_name}: Run time budget running out, skipping topup")
+            elif self.provider_config.needs_manual_topup():
+                topup_owner = identity_registry.claim_topup(origin, api_user, self.account_name)
+                if topup_owner:
+                    print(f"ℹ️ {self.account_name}: Topup already executed by {topup_owner} for the same user, skipping")
+            if self.provider_config.needs_manual_topup() and not self.shed_topup and not topup_owner:
                 print(f"ℹ️ {self.account_name}: Provider requires manual topup, executing...")
-                topup_result = await self.execute_topup(headers, cookies, api_user)
+                topup_result = {}
+                try:
+                    topup_result = await self.execute_topup(headers, cookies, api_user)
+                finally:
+                    # 充值失败（包括被截止时间取消）时释放申请，重试或同一身份的其它别名仍然会执行充值
+                    if not topup_result.get("success"):
+                        identity_registry.release_topup(origin, api_user, self.account_name)
                 if topup_result.get("topup_count", 0) > 0:
                     print(
                         f"ℹ️ {self.account_name}: Topup completed - "
@@ -919,7 +1115,13 @@ class CheckIn:
             if user_info and user_info.get("success"):
                 success_msg = user_info.get("display", "User info retrieved successfully")
                 print(f"✅ {self.account_name}: {success_msg}")
-                return True, user_info
+                identity_registry.record_result(origin, api_user, self.account_name, user_info)
+                # 附带本次使用的会话（包含 provider 通过 Set-Cookie 刷新的值），供后续运行和余额查询模式复用
+                refreshed_cookies, expires_at = self._get_refreshed_cookies(client, cookies)
+                if refreshed_cookies != cookies:
+                    print(f"🍪 {self.account_name}: Provider refreshed session cookies")
+                session = {**session, "cookies": refreshed_cookies, "expires_at": expires_at}
+                return True, {**user_info, "session": session}
             elif user_info:
                 error_msg = user_info.get("error", "Unknown error")
                 print(f"❌ {self.account_name}: {error_msg}")
@@ -927,21 +1129,41 @@ class CheckIn:
             else:
                 return False, {"error": "No user info available"}
 
+        except ProviderUnavailableError as e:
+            print(f"❌ {self.account_name}: {e}")
+            return False, {"error": str(e), "provider_unavailable": True}
         except Exception as e:
             print(f"❌ {self.account_name}: Error occurred during check-in process - {e}")
             return False, {"error": "Error occurred during check-in process"}
         finally:
             client.close()
 
-    async def check_in_with_github(self, username: str, password: str, waf_cookies: dict) -> tuple[bool, dict]:
-        """使用 GitHub 账号执行签到操作"""
-        print(
-            f"ℹ️ {self.account_name}: Executing check-in with GitHub account (using proxy: {'true' if self.http_proxy_config else 'false'})"
-        )
+    def _get_refreshed_cookies(self, client: httpx.Client, cookies: dict) -> tuple[dict, float | None]:
+        """读取 provider 通过 Set-Cookie 刷新的 cookies
+
+        Args:
+            client: 签到使用的 httpx 客户端
+            cookies: 请求时发送的 cookies
 
-        client = httpx.Client(http2=True, timeout=30.0, proxy=self.http_proxy_config)
+        Returns:
+            (刷新后的 cookies, 刷新的 cookie 中最早的过期时间戳，未知时为 None)
+        """
+        refreshed = dict(cookies)
+        expires_at = None
+        for cookie in client.cookies.jar:
+            # 请求前通过 update() 设置的 cookie 没有域名，带域名的是响应中 Set-Cookie 写入的
+            if cookie.name not in cookies or not cookie.domain:
+                continue
+            refreshed[cookie.name] = cookie.value
+            if cookie.expires:
+                expires_at = cookie.expires if expires_at is None else min(expires_at, cookie.expires)
+        return refreshed, expires_at
+
+    async def check_balance_with_cookies(self, cookies: dict, api_user: str | int) -> tuple[bool, dict]:
+        """使用已有 cookies 仅查询余额（不执行签到和充值）"""
+        client = create_http_client(self.http_proxy_config, self.request_timeout)
         try:
-            client.cookies.update(waf_cookies)
+            client.cookies.update(cookies)
 
             headers = {
                 "User-Agent": get_random_user_agent(),
@@ -954,121 +1176,341 @@ class CheckIn:
                 "Sec-Fetch-Dest": "empty",
                 "Sec-Fetch-Mode": "cors",
                 "Sec-Fetch-Site": "same-origin",
-                self.provider_config.api_user_key: "-1",
+                self.provider_config.api_user_key: f"{api_user}",
             }
 
+            user_info = await self.get_user_info(client, headers)
+            if user_info and user_info.get("success"):
+                print(f"✅ {self.account_name}: {user_info.get('display')}")
+                return True, user_info
+            error_msg = user_info.get("error", "Unknown error") if user_info else "No user info available"
+            print(f"❌ {self.account_name}: {error_msg}")
+            return False, {"error": error_msg, "session_expired": bool(user_info and user_info.get("session_expired"))}
+        except Exception as e:
+            print(f"❌ {self.account_name}: Error occurred while getting balance - {e}")
+            return False, {"error": "Error occurred while getting balance"}
+        finally:
+            client.close()
+
+    async def query_balance(self, session_store: SessionStore) -> list[tuple[str, bool, dict | None]]:
+        """仅使用已保存的会话查询各认证方式的余额
+
+        不执行签到、充值和任何浏览器步骤；会话失效时只报告，不重新登录
+
+        Args:
+            session_store: provider 会话缓存
+
+        Returns:
+            [(认证方式, 是否成功, 用户信息)]
+        """
+        results = []
+        auth_configs = [
+            ("cookies", self.account_config.cookies),
+            ("github", self.account_config.github),
+            ("linux.do", self.account_config.linux_do),
+        ]
+        for auth_method, auth_config in auth_configs:
+            if not auth_config:
+                continue
+
+            session = session_store.get(self.account_name, self.provider_config.name, auth_method)
+            if session:
+                cookies, api_user = session["cookies"], session["api_user"]
+            elif auth_method == "cookies":
+                cookies = self.stored_cookies or parse_cookies(auth_config)
+                api_user = self.account_config.api_user
+            else:
+                print(f"⚠️ {self.account_name}: No stored {auth_method} session")
+                results.append((auth_method, False, {"error": "No stored session", "session_missing": True}))
+                continue
+
+            success, user_info = await self.check_balance_with_cookies(cookies, api_user)
+            if not success and user_info.get("session_expired"):
+                user_info["error"] = "Session expired, login required"
+            results.append((auth_method, success, user_info))
+
+        return results
+
+    def get_ledger_user_info(self, auth_method: str) -> dict | None:
+        """如果该认证方式在当前签到日已成功签到，返回记录中的用户信息
+
+        Args:
+            auth_method: 认证方式 (cookies/github/linux.do)
+
+        Returns:
+            标记为已签到的用户信息，未签到或没有记录时返回 None
+        """
+        if not self.ledger:
+            return None
+        if not self.ledger.is_done_today(self.account_name, self.provider_config, auth_method):
+            return None
+
+        user_info = self.ledger.get_user_info(self.account_name, self.provider_config.name, auth_method)
+        if not user_info or "display" not in user_info:
+            return None
+        return {**user_info, "success": True, "already_checked_in": True}
+
+    def _build_oauth_headers(self) -> dict:
+        """构建 OAuth 流程中调用 provider API 的请求头（尚未获得 api_user）"""
+        return {
+            "User-Agent": get_random_user_agent(),
+            "Accept": "application/json, text/plain, */*",
+            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+            "Accept-Encoding": "gzip, deflate, br, zstd",
+            "Referer": self.provider_config.get_login_url(),
+            "Origin": self.provider_config.origin,
+            "Connection": "keep-alive",
+            "Sec-Fetch-Dest": "empty",
+            "Sec-Fetch-Mode": "cors",
+            "Sec-Fetch-Site": "same-origin",
+            self.provider_config.api_user_key: "-1",
+        }
+
+    def get_linuxdo_cache_file_path(self, username: str) -> str:
+        """获取 Linux.do storage state 缓存文件路径"""
+        username_hash = hashlib.sha256(username.encode("utf-8")).hexdigest()[:8]
+        return f"{self.storage_state_dir}/linuxdo_{username_hash}_storage_state.json"
+
+    def get_github_cache_file_path(self, username: str) -> str:
+        """获取 GitHub storage state 缓存文件路径"""
+        username_hash = hashlib.sha256(username.encode("utf-8")).hexdigest()[:8]
+        return f"{self.storage_state_dir}/github_{username_hash}_storage_state.json"
+
+    async def prepare_linuxdo_oauth(self, waf_cookies: dict) -> dict:
+        """获取 Linux.do OAuth 授权所需的 client ID 和认证状态"""
+        return await self._prepare_oauth(waf_cookies, "linuxdo", "Linux.do", self.provider_config.linuxdo_client_id)
+
+    async def prepare_github_oauth(self, waf_cookies: dict) -> dict:
+        """获取 GitHub OAuth 授权所需的 client ID 和认证状态"""
+        return await self._prepare_oauth(waf_cookies, "github", "GitHub", self.provider_config.github_client_id)
+
+    async def _prepare_oauth(
+        self,
+        waf_cookies: dict,
+        provider: str,
+        label: str,
+        configured_client_id: str | None,
+    ) -> dict:
+        """获取 OAuth 授权所需的 client ID 和认证状态
+
+        Args:
+            waf_cookies: WAF cookies
+            provider: /api/status 中的 OAuth 提供方标识（linuxdo 或 github）
+            label: 日志中显示的名称
+            configured_client_id: provider_config 中配置的 client ID
+
+        Returns:
+            包含 success、client_id、state、cookies 或 error 的字典
+        """
+        client = create_http_client(self.http_proxy_config, self.request_timeout)
+        try:
+            client.cookies.update(waf_cookies)
+            headers = self._build_oauth_headers()
+
             # 获取 OAuth 客户端 ID
             # 优先使用 provider_config 中的 client_id
-            if self.provider_config.github_client_id:
+            if configured_client_id:
                 client_id_result = {
                     "success": True,
-                    "client_id": self.provider_config.github_client_id,
+                    "client_id": configured_client_id,
                 }
-                print(f"ℹ️ {self.account_name}: Using GitHub client ID from config")
+                print(f"ℹ️ {self.account_name}: Using {label} client ID from config")
             else:
-                client_id_result = await self.get_auth_client_id(client, headers, "github")
+                client_id_result = await self.get_auth_client_id(client, headers, provider)
                 if client_id_result and client_id_result.get("success"):
-                    print(f"ℹ️ {self.account_name}: Got client ID for GitHub: {client_id_result['client_id']}")
+                    print(f"ℹ️ {self.account_name}: Got client ID for {label}: {client_id_result['client_id']}")
                 else:
                     error_msg = client_id_result.get("error", "Unknown error")
                     print(f"❌ {self.account_name}: {error_msg}")
-                    return False, {"error": "Failed to get GitHub client ID"}
+                    return {"success": False, "error": f"Failed to get {label} client ID"}
 
-            # # 获取 OAuth 认证状态
+            # 获取 OAuth 认证状态
             auth_state_result = await self.get_auth_state(
                 client=client,
                 headers=headers,
             )
             if auth_state_result and auth_state_result.get("success"):
-                print(f"ℹ️ {self.account_name}: Got auth state for GitHub: {auth_state_result['state']}")
+                print(f"ℹ️ {self.account_name}: Got auth state for {label}: {auth_state_result['state']}")
             else:
                 error_msg = auth_state_result.get("error", "Unknown error")
                 print(f"❌ {self.account_name}: {error_msg}")
-                return False, {"error": "Failed to get GitHub auth state"}
+                return {"success": False, "error": f"Failed to get {label} auth state"}
+
+            return {
+                "success": True,
+                "client_id": client_id_result["client_id"],
+                "state": auth_state_result["state"],
+                "cookies": auth_state_result.get("cookies", []),
+            }
+        finally:
+            client.close()
+
+    async def complete_oauth_check_in(
+        self,
+        success: bool,
+        result_data: dict,
+        auth_cookies: list,
+        waf_cookies: dict,
+        auth_url: str,
+        context: str,
+    ) -> tuple[bool, dict]:
+        """根据 OAuth 授权结果完成签到
 
-            # 生成缓存文件路径
-            username_hash = hashlib.sha256(username.encode("utf-8")).hexdigest()[:8]
-            cache_file_path = f"{self.storage_state_dir}/github_{username_hash}_storage_state.json"
+        授权结果中包含 cookies 和 api_user 时直接签到；只收到 OAuth code 时先调用 provider 回调接口获取 api_user
 
-            from sign_in_with_github import GitHubSignIn
+        Args:
+            success: 授权是否成功
+            result_data: 授权结果
+            auth_cookies: 获取认证状态时的 cookies（Camoufox 格式）
+            waf_cookies: WAF cookies
+            auth_url: provider OAuth 回调接口 URL
+            context: 日志上下文
+        """
+        # 检查是否成功获取 cookies 和 api_user
+        if success and "cookies" in result_data and "api_user" in result_data:
+            # 统一调用 check_in_with_cookies 执行签到
+            user_cookies = result_data["cookies"]
+            api_user = result_data["api_user"]
+
+            merged_cookies = {**waf_cookies, **user_cookies}
+            return await self.check_in_with_cookies(merged_cookies, api_user)
+        elif success and "code" in result_data and "state" in result_data:
+            # 收到 OAuth code，通过 HTTP 调用回调接口获取 api_user
+            print(f"ℹ️ {self.account_name}: Received OAuth code, calling callback API")
+
+            callback_url = httpx.URL(auth_url).copy_with(params=result_data)
+            print(f"ℹ️ {self.account_name}: Callback URL: {callback_url}")
+            client = create_http_client(self.http_proxy_config, self.request_timeout)
+            try:
+                client.cookies.update(waf_cookies)
+                # 将 Camoufox 格式的 cookies 转换为 httpx 格式
+                for cookie_dict in auth_cookies:
+                    client.cookies.set(cookie_dict["name"], cookie_dict["value"])
 
-            github = GitHubSignIn(
-                account_name=self.account_name,
-                provider_config=self.provider_config,
-                username=username,
-                password=password,
-            )
+                response = client.get(callback_url, headers=self._build_oauth_headers(), timeout=self._get_request_timeout())
 
-            success, result_data = await github.signin(
-                client_id=client_id_result["client_id"],
-                auth_state=auth_state_result.get("state"),
-                auth_cookies=auth_state_result.get("cookies", []),
-                cache_file_path=cache_file_path,
-            )
+                if response.status_code == 200:
+                    json_data = response_resolve(response, context, self.account_name)
+                    if json_data and json_data.get("success"):
+                        user_data = json_data.get("data", {})
+                        api_user = user_data.get("id")
 
-            # 检查是否成功获取 cookies 和 api_user
-            if success and "cookies" in result_data and "api_user" in result_data:
-                # 统一调用 check_in_with_cookies 执行签到
-                user_cookies = result_data["cookies"]
-                api_user = result_data["api_user"]
+                        if api_user:
+                            print(f"✅ {self.account_name}: Got api_user from callback: {api_user}")
 
-                merged_cookies = {**waf_cookies, **user_cookies}
-                return await self.check_in_with_cookies(merged_cookies, api_user)
-            elif success and "code" in result_data and "state" in result_data:
-                # 收到 OAuth code，通过 HTTP 调用回调接口获取 api_user
-                print(f"ℹ️ {self.account_name}: Received OAuth code, calling callback API")
+                            # 提取 cookies
+                            user_cookies = {}
+                            for cookie in response.cookies.jar:
+                                user_cookies[cookie.name] = cookie.value
 
-                callback_url = httpx.URL(self.provider_config.get_github_auth_url()).copy_with(params=result_data)
-                print(f"ℹ️ {self.account_name}: Callback URL: {callback_url}")
-                try:
-                    # 将 Camoufox 格式的 cookies 转换为 httpx 格式
-                    auth_cookies_list = auth_state_result.get("cookies", [])
-                    for cookie_dict in auth_cookies_list:
-                        client.cookies.set(cookie_dict["name"], cookie_dict["value"])
-
-                    response = client.get(callback_url, headers=headers, timeout=30)
-
-                    if response.status_code == 200:
-                        json_data = response_resolve(response, "github_oauth_callback", self.account_name)
-                        if json_data and json_data.get("success"):
-                            user_data = json_data.get("data", {})
-                            api_user = user_data.get("id")
-
-                            if api_user:
-                                print(f"✅ {self.account_name}: Got api_user from callback: {api_user}")
-
-                                # 提取 cookies
-                                user_cookies = {}
-                                for cookie in response.cookies.jar:
-                                    user_cookies[cookie.name] = cookie.value
-
-                                print(
-                                    f"ℹ️ {self.account_name}: Extracted {len(user_cookies)} user cookies: {list(user_cookies.keys())}"
-                                )
-                                merged_cookies = {**waf_cookies, **user_cookies}
-                                return await self.check_in_with_cookies(merged_cookies, api_user)
-                            else:
-                                print(f"❌ {self.account_name}: No user ID in callback response")
-                                return False, {"error": "No user ID in OAuth callback response"}
+                            print(
+                                f"ℹ️ {self.account_name}: Extracted {len(user_cookies)} user cookies: {list(user_cookies.keys())}"
+                            )
+                            merged_cookies = {**waf_cookies, **user_cookies}
+                            return await self.check_in_with_cookies(merged_cookies, api_user)
                         else:
-                            error_msg = json_data.get("message", "Unknown error") if json_data else "Invalid response"
-                            print(f"❌ {self.account_name}: OAuth callback failed: {error_msg}")
-                            return False, {"error": f"OAuth callback failed: {error_msg}"}
+                            print(f"❌ {self.account_name}: No user ID in callback response")
+                            return False, {"error": "No user ID in OAuth callback response"}
                     else:
-                        print(f"❌ {self.account_name}: OAuth callback HTTP {response.status_code}")
-                        return False, {"error": f"OAuth callback HTTP {response.status_code}"}
-                except Exception as callback_err:
-                    print(f"❌ {self.account_name}: Error calling OAuth callback: {callback_err}")
-                    return False, {"error": f"OAuth callback error: {callback_err}"}
+                        error_msg = json_data.get("message", "Unknown error") if json_data else "Invalid response"
+                        print(f"❌ {self.account_name}: OAuth callback failed: {error_msg}")
+                        return False, {"error": f"OAuth callback failed: {error_msg}"}
+                else:
+                    print(f"❌ {self.account_name}: OAuth callback HTTP {response.status_code}")
+                    return False, {"error": f"OAuth callback HTTP {response.status_code}"}
+            except Exception as callback_err:
+                print(f"❌ {self.account_name}: Error calling OAuth callback: {callback_err}")
+                return False, {"error": f"OAuth callback error: {callback_err}"}
+            finally:
+                client.close()
+        else:
+            # 返回错误信息
+            return False, result_data
+
+    def pop_preauthorized(self, auth_method: str, label: str) -> tuple[bool, dict, dict] | None:
+        """取出批量授权的结果，授权失败或结果已过期时返回 None，由调用方回退到单独登录
+
+        Args:
+            auth_method: 认证方式，"linux.do" 或 "github"
+            label: 日志中显示的认证方式名称
+
+        Returns:
+            (成功标志, 授权结果, 授权准备信息)，没有可用结果时返回 None
+        """
+        preauthorized = self.oauth_results.pop(auth_method, None)
+        if not preauthorized:
+            return None
+        success, result_data, oauth_prep, authorized_at = preauthorized
+        if not success:
+            error = result_data.get("error", "Unknown error") if isinstance(result_data, dict) else ""
+            print(
+                f"⚠️ {self.account_name}: Batched {label} authorization failed ({error}), "
+                "falling back to per-account sign-in"
+            )
+            return None
+        age = time.monotonic() - authorized_at
+        if age > OAUTH_RESULT_MAX_AGE_SECONDS:
+            print(
+                f"⏰ {self.account_name}: Batched {label} authorization expired ({age:.0f}s old), "
+                "falling back to per-account sign-in"
+            )
+            return None
+        return success, result_data, oauth_prep
+
+    async def check_in_with_github(self, username: str, password: str, waf_cookies: dict) -> tuple[bool, dict]:
+        """使用 GitHub 账号执行签到操作
+
+        如果已通过批量授权（同一 GitHub 账号一次登录授权多个 provider）获得成功的授权结果，则直接使用该结果；
+        批量授权失败时仍单独登录
+
+        Args:
+            username: GitHub 用户名
+            password: GitHub 密码
+            waf_cookies: WAF cookies
+        """
+        print(
+            f"ℹ️ {self.account_name}: Executing check-in with GitHub account (using proxy: {'true' if self.http_proxy_config else 'false'})"
+        )
+
+        try:
+            preauthorized = self.pop_preauthorized("github", "GitHub")
+            if preauthorized:
+                print(f"ℹ️ {self.account_name}: Using batched GitHub authorization result")
+                success, result_data, oauth_prep = preauthorized
             else:
-                # 返回错误信息
-                return False, result_data
+                oauth_prep = await self.prepare_github_oauth(waf_cookies)
+                if not oauth_prep.get("success"):
+                    return False, {"error": oauth_prep.get("error", "Unknown error")}
+
+                from sign_in_with_github import GitHubSignIn
+
+                github = GitHubSignIn(
+                    account_name=self.account_name,
+                    provider_config=self.provider_config,
+                    username=username,
+                    password=password,
+                    deadline=self.deadline,
+                )
+
+                success, result_data = await github.signin(
+                    client_id=oauth_prep["client_id"],
+                    auth_state=oauth_prep["state"],
+                    auth_cookies=oauth_prep.get("cookies", []),
+                    cache_file_path=self.get_github_cache_file_path(username),
+                )
+
+            return await self.complete_oauth_check_in(
+                success,
+                result_data,
+                oauth_prep.get("cookies", []),
+                waf_cookies,
+                self.provider_config.get_github_auth_url(),
+                "github_oauth_callback",
+            )
 
         except Exception as e:
             print(f"❌ {self.account_name}: Error occurred during check-in process - {e}")
             return False, {"error": "GitHub check-in process error"}
-        finally:
-            client.close()
 
     async def check_in_with_linuxdo(
         self,
@@ -1078,6 +1520,9 @@ class CheckIn:
     ) -> tuple[bool, dict]:
         """使用 Linux.do 账号执行签到操作
 
+        如果已通过批量授权（同一 Linux.do 账号一次登录授权多个 provider）获得成功的授权结果，则直接使用该结果；
+        批量授权失败时仍单独登录
+
         Args:
             username: Linux.do 用户名
             password: Linux.do 密码
@@ -1087,230 +1532,274 @@ class CheckIn:
             f"ℹ️ {self.account_name}: Executing check-in with Linux.do account (using proxy: {'true' if self.http_proxy_config else 'false'})"
         )
 
-        client = httpx.Client(http2=True, timeout=30.0, proxy=self.http_proxy_config)
         try:
-            client.cookies.update(waf_cookies)
+            preauthorized = self.pop_preauthorized("linux.do", "Linux.do")
+            if preauthorized:
+                print(f"ℹ️ {self.account_name}: Using batched Linux.do authorization result")
+                success, result_data, oauth_prep = preauthorized
+            else:
+                oauth_prep = await self.prepare_linuxdo_oauth(waf_cookies)
+                if not oauth_prep.get("success"):
+                    return False, {"error": oauth_prep.get("error", "Unknown error")}
 
-            headers = {
-                "User-Agent": get_random_user_agent(),
-                "Accept": "application/json, text/plain, */*",
-                "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-                "Accept-Encoding": "gzip, deflate, br, zstd",
-                "Referer": self.provider_config.get_login_url(),
-                "Origin": self.provider_config.origin,
-                "Connection": "keep-alive",
-                "Sec-Fetch-Dest": "empty",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Site": "same-origin",
-                self.provider_config.api_user_key: "-1",
-            }
+                from sign_in_with_linuxdo import LinuxDoSignIn
 
-            # 获取 OAuth 客户端 ID
-            # 优先使用 provider_config 中的 client_id
-            if self.provider_config.linuxdo_client_id:
-                client_id_result = {
-                    "success": True,
-                    "client_id": self.provider_config.linuxdo_client_id,
-                }
-                print(f"ℹ️ {self.account_name}: Using Linux.do client ID from config")
-            else:
-                client_id_result = await self.get_auth_client_id(client, headers, "linuxdo")
-                if client_id_result and client_id_result.get("success"):
-                    print(f"ℹ️ {self.account_name}: Got client ID for Linux.do: {client_id_result['client_id']}")
-                else:
-                    error_msg = client_id_result.get("error", "Unknown error")
-                    print(f"❌ {self.account_name}: {error_msg}")
-                    return False, {"error": "Failed to get Linux.do client ID"}
+                linuxdo = LinuxDoSignIn(
+                    account_name=self.account_name,
+                    provider_config=self.provider_config,
+                    username=username,
+                    password=password,
+                    deadline=self.deadline,
+                )
 
-            # 获取 OAuth 认证状态
-            auth_state_result = await self.get_auth_state(
-                client=client,
-                headers=headers,
+                success, result_data = await linuxdo.signin(
+                    client_id=oauth_prep["client_id"],
+                    auth_state=oauth_prep["state"],
+                    auth_cookies=oauth_prep.get("cookies", []),
+                    cache_file_path=self.get_linuxdo_cache_file_path(username),
+                )
+
+            return await self.complete_oauth_check_in(
+                success,
+                result_data,
+                oauth_prep.get("cookies", []),
+                waf_cookies,
+                self.provider_config.get_linuxdo_auth_url(),
+                "linuxdo_oauth_callback",
             )
-            if auth_state_result and auth_state_result.get("success"):
-                print(f"ℹ️ {self.account_name}: Got auth state for Linux.do: {auth_state_result['state']}")
-            else:
-                error_msg = auth_state_result.get("error", "Unknown error")
-                print(f"❌ {self.account_name}: {error_msg}")
-                return False, {"error": "Failed to get Linux.do auth state"}
 
-            # 生成缓存文件路径
-            username_hash = hashlib.sha256(username.encode("utf-8")).hexdigest()[:8]
-            cache_file_path = f"{self.storage_state_dir}/linuxdo_{username_hash}_storage_state.json"
+        except Exception as e:
+            print(f"❌ {self.account_name}: Error occurred during check-in process - {e}")
+            return False, {"error": "Linux.do check-in process error"}
 
-            from sign_in_with_linuxdo import LinuxDoSignIn
+    async def _try_cookies(self, cookies_data, waf_cookies: dict) -> tuple[str, bool, dict | None]:
+        """尝试 cookies 认证"""
+        print(f"\nℹ️ {self.account_name}: Trying cookies authentication")
+        try:
+            user_cookies = parse_cookies(cookies_data)
+            if not user_cookies:
+                print(f"❌ {self.account_name}: Invalid cookies format")
+                return "cookies", False, {"error": "Invalid cookies format"}
+
+            api_user = self.account_config.api_user
+            if not api_user:
+                print(f"❌ {self.account_name}: API user identifier not found for cookies")
+                return "cookies", False, {"error": "API user identifier not found"}
+
+            # 优先使用上次签到后保存的（provider 刷新过的）cookies，被拒绝时回退到配置中的 cookies
+            if self.stored_cookies:
+                print(f"ℹ️ {self.account_name}: Using cookies saved from a previous run")
+                success, user_info = await self.check_in_with_cookies(
+                    {**waf_cookies, **user_cookies, **self.stored_cookies}, api_user
+                )
+                if success:
+                    print(f"✅ {self.account_name}: Cookies authentication successful")
+                    return "cookies", True, user_info
+                print(f"⚠️ {self.account_name}: Saved cookies rejected, retrying with configured cookies")
+
+            # 使用已有 cookies 执行签到
+            all_cookies = {**waf_cookies, **user_cookies}
+            success, user_info = await self.check_in_with_cookies(all_cookies, api_user)
+            if self.stored_cookies:
+                user_info = {**(user_info or {}), "stored_cookies_rejected": True}
+            if success:
+                print(f"✅ {self.account_name}: Cookies authentication successful")
+                return "cookies", True, user_info
+            print(f"❌ {self.account_name}: Cookies authentication failed")
+            return "cookies", False, user_info
+        except Exception as e:
+            print(f"❌ {self.account_name}: Cookies authentication error: {e}")
+            return "cookies", False, {"error": str(e)}
 
-            linuxdo = LinuxDoSignIn(
-                account_name=self.account_name,
-                provider_config=self.provider_config,
-                username=username,
-                password=password,
-            )
+    async def _try_github(self, github_info: dict, waf_cookies: dict) -> tuple[str, bool, dict | None]:
+        """尝试 GitHub 认证"""
+        print(f"\nℹ️ {self.account_name}: Trying GitHub authentication")
+        try:
+            username = github_info.get("username")
+            password = github_info.get("password")
+            if not username or not password:
+                print(f"❌ {self.account_name}: Incomplete GitHub account information")
+                return "github", False, {"error": "Incomplete GitHub account information"}
+
+            # 使用 GitHub 账号执行签到
+            success, user_info = await self.check_in_with_github(username, password, waf_cookies)
+            if success:
+                print(f"✅ {self.account_name}: GitHub authentication successful")
+                return "github", True, user_info
+            print(f"❌ {self.account_name}: GitHub authentication failed")
+            return "github", False, user_info
+        except Exception as e:
+            print(f"❌ {self.account_name}: GitHub authentication error: {e}")
+            return "github", False, {"error": str(e)}
 
-            success, result_data = await linuxdo.signin(
-                client_id=client_id_result["client_id"],
-                auth_state=auth_state_result["state"],
-                auth_cookies=auth_state_result.get("cookies", []),
-                cache_file_path=cache_file_path,
+    async def _try_linuxdo(self, linuxdo_info: dict, waf_cookies: dict) -> tuple[str, bool, dict | None]:
+        """尝试 Linux.do 认证"""
+        print(f"\nℹ️ {self.account_name}: Trying Linux.do authentication")
+        try:
+            username = linuxdo_info.get("username")
+            password = linuxdo_info.get("password")
+            if not username or not password:
+                print(f"❌ {self.account_name}: Incomplete Linux.do account information")
+                return "linux.do", False, {"error": "Incomplete Linux.do account information"}
+
+            # 使用 Linux.do 账号执行签到
+            success, user_info = await self.check_in_with_linuxdo(
+                username,
+                password,
+                waf_cookies,
             )
+            if success:
+                print(f"✅ {self.account_name}: Linux.do authentication successful")
+                return "linux.do", True, user_info
+            print(f"❌ {self.account_name}: Linux.do authentication failed")
+            return "linux.do", False, user_info
+        except Exception as e:
+            print(f"❌ {self.account_name}: Linux.do authentication error: {e}")
+            return "linux.do", False, {"error": str(e)}
 
-            # 检查是否成功获取 cookies 和 api_user
-            if success and "cookies" in result_data and "api_user" in result_data:
-                # 统一调用 check_in_with_cookies 执行签到
-                user_cookies = result_data["cookies"]
-                api_user = result_data["api_user"]
-
-                merged_cookies = {**waf_cookies, **user_cookies}
-                return await self.check_in_with_cookies(merged_cookies, api_user)
-            elif success and "code" in result_data and "state" in result_data:
-                # 收到 OAuth code，通过 HTTP 调用回调接口获取 api_user
-                print(f"ℹ️ {self.account_name}: Received OAuth code, calling callback API")
+    async def execute(
+        self,
+        deadline: Deadline | None = None,
+        shed_level: int = SHED_NONE,
+    ) -> list[tuple[str, bool, dict | None]]:
+        """为单个账号执行签到操作，支持多种认证方式
 
-                callback_url = httpx.URL(self.provider_config.get_linuxdo_auth_url()).copy_with(params=result_data)
-                print(f"ℹ️ {self.account_name}: Callback URL: {callback_url}")
-                try:
-                    # 将 Camoufox 格式的 cookies 转换为 httpx 格式
-                    auth_cookies_list = auth_state_result.get("cookies", [])
-                    for cookie_dict in auth_cookies_list:
-                        client.cookies.set(cookie_dict["name"], cookie_dict["value"])
-
-                    response = client.get(callback_url, headers=headers, timeout=30)
-
-                    if response.status_code == 200:
-                        json_data = response_resolve(response, "linuxdo_oauth_callback", self.account_name)
-                        if json_data and json_data.get("success"):
-                            user_data = json_data.get("data", {})
-                            api_user = user_data.get("id")
-
-                            if api_user:
-                                print(f"✅ {self.account_name}: Got api_user from callback: {api_user}")
-
-                                # 提取 cookies
-                                user_cookies = {}
-                                for cookie in response.cookies.jar:
-                                    user_cookies[cookie.name] = cookie.value
-
-                                print(
-                                    f"ℹ️ {self.account_name}: Extracted {len(user_cookies)} user cookies: {list(user_cookies.keys())}"
-                                )
-                                merged_cookies = {**waf_cookies, **user_cookies}
-                                return await self.check_in_with_cookies(merged_cookies, api_user)
-                            else:
-                                print(f"❌ {self.account_name}: No user ID in callback response")
-                                return False, {"error": "No user ID in OAuth callback response"}
-                        else:
-                            error_msg = json_data.get("message", "Unknown error") if json_data else "Invalid response"
-                            print(f"❌ {self.account_name}: OAuth callback failed: {error_msg}")
-                            return False, {"error": f"OAuth callback failed: {error_msg}"}
-                    else:
-                        print(f"❌ {self.account_name}: OAuth callback HTTP {response.status_code}")
-                        return False, {"error": f"OAuth callback HTTP {response.status_code}"}
-                except Exception as callback_err:
-                    print(f"❌ {self.account_name}: Error calling OAuth callback: {callback_err}")
-                    return False, {"error": f"OAuth callback error: {callback_err}"}
-            else:
-                # 返回错误信息
-                return False, result_data
+        启用 first_success 时按 method_order 的顺序尝试，任一方式成功后跳过其余方式，
+        被跳过的方式在结果中标记为 skipped；截止时间到达后正在进行的步骤被取消，
+        未完成的认证方式在结果中标记为 deadline_exceeded
 
-        except Exception as e:
-            print(f"❌ {self.account_name}: Error occurred during check-in process - {e}")
-            return False, {"error": "Linux.do check-in process error"}
+        Args:
+            deadline: 账号截止时间（可选），不设置时不限制
+            shed_level: 运行时间预算的削减级别，SHED_TOPUP 跳过充值，SHED_SECONDARY_METHODS 只尝试第一个认证方式
+        """
+        if deadline is not None:
+            self.deadline = deadline
+        self.shed_topup = shed_level >= SHED_TOPUP
 
-    async def execute(self) -> list[tuple[str, bool, dict | None]]:
-        """为单个账号执行签到操作，支持多种认证方式"""
         print(f"\n\n⏳ Starting to process {self.account_name}")
 
-        waf_cookies = {}
-        if self.provider_config.needs_waf_cookies():
-            waf_cookies = await self.get_waf_cookies_with_browser()
-            if not waf_cookies:
-                print(f"⚠️ {self.account_name}: Unable to get WAF cookies, continuing with empty cookies")
-                waf_cookies = {}  # 确保 waf_cookies 是空字典而不是 None
-            else:
-                print(f"✅ {self.account_name}: WAF cookies obtained")
-        else:
-            print(f"ℹ️ {self.account_name}: Bypass WAF not required, using user cookies directly")
-
         # 解析账号配置
         cookies_data = self.account_config.cookies
         github_info = self.account_config.github
         linuxdo_info = self.account_config.linux_do
-        results = []
+        auth_configs = [("cookies", cookies_data), ("github", github_info), ("linux.do", linuxdo_info)]
+        configured = {auth_method: auth_config for auth_method, auth_config in auth_configs if auth_config}
+
+        # 尝试顺序: first_success 模式下使用 method_order（按历史成功率和成本排序），否则按配置顺序
+        method_order = [auth_method for auth_method, _ in auth_configs if auth_method in configured]
+        if self.first_success and self.method_order:
+            method_order = [auth_method for auth_method in self.method_order if auth_method in configured] + [
+                auth_method for auth_method in method_order if auth_method not in self.method_order
+            ]
+
+        origin = self.provider_config.origin.rstrip("/")
+
+        # 检查签到记录，当前签到日已完成的认证方式不再重复签到
+        done_methods = {}
+        for auth_method in method_order:
+            ledger_user_info = self.get_ledger_user_info(auth_method)
+            if ledger_user_info:
+                print(f"ℹ️ {self.account_name}: {auth_method} already checked in today, skipping check-in")
+                done_methods[auth_method] = ledger_user_info
+
+        # cookies 方式已签到时，无需 WAF 的 provider 可以直接通过 HTTP 读取最新余额
+        if "cookies" in done_methods and not self.provider_config.needs_waf_cookies():
+            user_cookies = self.stored_cookies or parse_cookies(cookies_data)
+            if user_cookies and self.account_config.api_user:
+                success, user_info = await self.check_balance_with_cookies(user_cookies, self.account_config.api_user)
+                if success:
+                    done_methods["cookies"] = {**user_info, "already_checked_in": True}
+                elif not circuit_breaker.is_open(origin):
+                    # 余额读取失败（如 session 失效），回退到完整签到流程；provider 不可用时保留记录中的余额
+                    done_methods.pop("cookies")
+
+        # first_success 模式下，当前签到日已有任一方式签到成功时其余方式不再尝试
+        succeeded = self.first_success and bool(done_methods)
+        pending_methods = [auth_method for auth_method in method_order if auth_method not in done_methods]
+        if succeeded:
+            pending_methods = []
+
+        # 运行时间预算不足时只尝试第一个待执行的认证方式
+        shed_methods = set()
+        if shed_level >= SHED_SECONDARY_METHODS and len(pending_methods) > 1:
+            shed_methods = set(pending_methods[1:])
+            print(
+                f"⏰ {self.account_name}: Run time budget running out, "
+                f"only trying {pending_methods[0]} authentication"
+            )
 
-        # 尝试 cookies 认证
-        if cookies_data:
-            print(f"\nℹ️ {self.account_name}: Trying cookies authentication")
-            try:
-                user_cookies = parse_cookies(cookies_data)
-                if not user_cookies:
-                    print(f"❌ {self.account_name}: Invalid cookies format")
-                    results.append(("cookies", False, {"error": "Invalid cookies format"}))
-                else:
-                    api_user = self.account_config.api_user
-                    if not api_user:
-                        print(f"❌ {self.account_name}: API user identifier not found for cookies")
-                        results.append(("cookies", False, {"error": "API user identifier not found"}))
-                    else:
-                        # 使用已有 cookies 执行签到
-                        all_cookies = {**waf_cookies, **user_cookies}
-                        success, user_info = await self.check_in_with_cookies(all_cookies, api_user)
-                        if success:
-                            print(f"✅ {self.account_name}: Cookies authentication successful")
-                            results.append(("cookies", True, user_info))
-                        else:
-                            print(f"❌ {self.account_name}: Cookies authentication failed")
-                            results.append(("cookies", False, user_info))
-            except Exception as e:
-                print(f"❌ {self.account_name}: Cookies authentication error: {e}")
-                results.append(("cookies", False, {"error": str(e)}))
-
-        # 尝试 GitHub 认证
-        if github_info:
-            print(f"\nℹ️ {self.account_name}: Trying GitHub authentication")
-            try:
-                username = github_info.get("username")
-                password = github_info.get("password")
-                if not username or not password:
-                    print(f"❌ {self.account_name}: Incomplete GitHub account information")
-                    results.append(("github", False, {"error": "Incomplete GitHub account information"}))
-                else:
-                    # 使用 GitHub 账号执行签到
-                    success, user_info = await self.check_in_with_github(username, password, waf_cookies)
-                    if success:
-                        print(f"✅ {self.account_name}: GitHub authentication successful")
-                        results.append(("github", True, user_info))
-                    else:
-                        print(f"❌ {self.account_name}: GitHub authentication failed")
-                        results.append(("github", False, user_info))
-            except Exception as e:
-                print(f"❌ {self.account_name}: GitHub authentication error: {e}")
-                results.append(("github", False, {"error": str(e)}))
-
-        # 尝试 Linux.do 认证
-        if linuxdo_info:
-            print(f"\nℹ️ {self.account_name}: Trying Linux.do authentication")
+        # provider 已熔断时不再启动浏览器和发送请求，所有待执行的认证方式立即失败
+        if pending_methods and circuit_breaker.is_open(origin):
+            print(f"⛔ {self.account_name}: Provider {origin} is unavailable, failing fast")
+
+        waf_cookies = {}
+        if succeeded:
+            print(f"ℹ️ {self.account_name}: Already checked in today with {', '.join(done_methods)}")
+        elif not pending_methods:
+            print(f"ℹ️ {self.account_name}: All authentication methods already checked in today")
+        elif not circuit_breaker.is_open(origin):
             try:
-                username = linuxdo_info.get("username")
-                password = linuxdo_info.get("password")
-                if not username or not password:
-                    print(f"❌ {self.account_name}: Incomplete Linux.do account information")
-                    results.append(("linux.do", False, {"error": "Incomplete Linux.do account information"}))
-                else:
-                    # 使用 Linux.do 账号执行签到
-                    success, user_info = await self.check_in_with_linuxdo(
-                        username,
-                        password,
-                        waf_cookies,
+                waf_cookies = await self.deadline.run(self.get_waf_cookies())
+            except DeadlineExceededError:
+                print(f"⏰ {self.account_name}: Account deadline reached while getting WAF cookies")
+
+        results = []
+        for auth_method in method_order:
+            if auth_method in done_methods:
+                results.append((auth_method, True, done_methods[auth_method]))
+                continue
+
+            if succeeded:
+                print(f"⏭️ {self.account_name}: Skipping {auth_method} authentication, already succeeded")
+                results.append(
+                    (auth_method, False, {"skipped": True, "error": "Skipped: another method already succeeded"})
+                )
+                continue
+
+            if auth_method in shed_methods:
+                print(f"⏭️ {self.account_name}: Skipping {auth_method} authentication, run time budget running out")
+                results.append(
+                    (
+                        auth_method,
+                        False,
+                        {"skipped": True, "budget_shed": True, "error": "Skipped: run time budget running out"},
                     )
-                    if success:
-                        print(f"✅ {self.account_name}: Linux.do authentication successful")
-                        results.append(("linux.do", True, user_info))
-                    else:
-                        print(f"❌ {self.account_name}: Linux.do authentication failed")
-                        results.append(("linux.do", False, user_info))
-            except Exception as e:
-                print(f"❌ {self.account_name}: Linux.do authentication error: {e}")
-                results.append(("linux.do", False, {"error": str(e)}))
+                )
+                continue
+
+            if circuit_breaker.is_open(origin):
+                results.append(
+                    (
+                        auth_method,
+                        False,
+                        {"error": f"Provider unavailable: {origin} is failing", "provider_unavailable": True},
+                    )
+                )
+                continue
+
+            if self.deadline.expired():
+                results.append((auth_method, False, {"error": "Account deadline exceeded", "deadline_exceeded": True}))
+                continue
+
+            if auth_method == "cookies":
+                attempt = self._try_cookies(cookies_data, waf_cookies)
+            elif auth_method == "github":
+                attempt = self._try_github(github_info, waf_cookies)
+            else:
+                attempt = self._try_linuxdo(linuxdo_info, waf_cookies)
+            try:
+                # 截止时间到达时取消当前认证方式（浏览器随 async with 关闭）
+                result = await self.deadline.run(attempt)
+            except DeadlineExceededError:
+                print(f"⏰ {self.account_name}: Account deadline reached during {auth_method} authentication")
+                result = (auth_method, False, {"error": "Account deadline exceeded", "deadline_exceeded": True})
+            if not result[1] and self.deadline.expired():
+                # 请求超时被截止时间截断导致的失败，统一标记为超出截止时间
+                result = (auth_method, False, {**(result[2] or {}), "deadline_exceeded": True})
+            results.append(result)
+
+            if self.first_success and result[1]:
+                succeeded = True
 
         if not results:
             print(f"❌ {self.account_name}: No valid authentication method found in configuration")
@@ -1319,14 +1808,17 @@ class CheckIn:
         # 输出最终结果
         print(f"\n📋 {self.account_name} authentication results:")
         successful_count = 0
+        attempted_count = 0
         for auth_method, success, user_info in results:
+            if user_info and user_info.get("skipped"):
+                print(f"  ⏭️ {auth_method} authentication (skipped)")
+                continue
+            attempted_count += 1
             status = "✅" if success else "❌"
             print(f"  {status} {auth_method} authentication")
             if success:
                 successful_count += 1
 
-        print(f"\n🎯 {self.account_name}: {successful_count}/{len(results)} authentication methods successful")
+        print(f"\n🎯 {self.account_name}: {successful_count}/{attempted_count} authentication methods successful")
 
         return results
-
-   
\ No newline at end of file
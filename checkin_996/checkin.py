@@ -10,6 +10,7 @@ import httpx
 
 # Add parent directory to Python path to find utils module
 sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.circuit_breaker import create_http_client
 from utils.http_utils import proxy_resolve, response_resolve
 
 
@@ -153,7 +154,7 @@ class CheckIn:
         )
 
         # 使用 HTTP/1.1 而不是 HTTP/2，匹配 curl 的行为
-        client = httpx.Client(http2=False, timeout=30.0, proxy=self.http_proxy_config)
+        client = create_http_client(self.http_proxy_config, 30.0, http2=False)
         try:
             # 构建请求头
             headers = {
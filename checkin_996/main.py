@@ -12,11 +12,12 @@ from datetime import datetime
 from pathlib import Path
 
 from dotenv import load_dotenv
-from checkin import CheckIn
 
 # Add parent directory to Python path to find utils module
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# 使用包路径导入，在常驻模式中与根目录的 checkin 模块同时加载时不会冲突
+from checkin_996.checkin import CheckIn
 from utils.notify import notify
 from utils.balance_hash import load_balance_hash, save_balance_hash
 
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+常驻模式
+
+在一个长期运行的进程中按 cron 表达式定时执行签到、996 hub 签到和 Linux.do 阅读。多次运行之间保持浏览器、
+HTTP 连接池和 WAF cookies，每次运行前重新读取 .env 中的账号和 provider 配置（无需重启），
+并在各 provider 每日重置后额外执行一次签到
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+import linuxdo_read_posts
+import main as checkin_main
+from checkin_996 import main as checkin_996_main
+from run_all import run_workload
+from utils.browser_transport import close_browser_transports, keep_browser_transports_warm
+from utils.circuit_breaker import set_transport_sharing
+from utils.config import AppConfig
+from utils.scheduler import CronSchedule, get_timezone
+
+load_dotenv(override=True)
+
+# 默认的调度时区
+DEFAULT_DAEMON_TIMEZONE = "Asia/Shanghai"
+
+# provider 每日重置后额外签到的默认延迟（秒），避开重置时刻的高峰
+DEFAULT_RESET_DELAY = 300
+
+# 两次检查调度之间的最长等待时间（秒），系统休眠或时钟调整后尽快重新计算
+MAX_SLEEP_SECONDS = 600
+
+# 常驻模式下的默认配置：浏览器任务在主事件循环中执行以保持浏览器常驻，WAF cookies 缓存 30 分钟
+DAEMON_ENV_DEFAULTS = {
+    "WORKER_PROCESSES": "0",
+    "WAF_COOKIE_TTL": "1800",
+}
+
+# 参与配置变更检测的环境变量
+RELOAD_ENV_NAMES = ["ACCOUNTS", "PROVIDERS", "PROXY", "ACCOUNTS_996"]
+
+
+@dataclass
+class Workload:
+    """定时任务"""
+
+    name: str
+    # 任务入口（各脚本的 main 协程函数）
+    entry: object
+    schedule: CronSchedule | None
+    # 是否在 provider 每日重置后额外执行
+    follow_resets: bool = False
+    next_at: datetime | None = None
+
+
+def _load_schedule(env_name: str, default: str, tz) -> CronSchedule | None:
+    """从环境变量读取 cron 表达式，设置为空或 off 时禁用"""
+    expression = os.getenv(env_name, default).strip()
+    if not expression or expression.lower() == "off":
+        return None
+    try:
+        return CronSchedule(expression, tz)
+    except ValueError as e:
+        print(f"❌ Invalid {env_name}: {e}")
+        sys.exit(1)
+
+
+def _get_reset_delay() -> float:
+    """读取 provider 每日重置后额外签到的延迟（秒），为负数时不额外签到"""
+    value = os.getenv("DAEMON_RESET_DELAY", "").strip()
+    if not value:
+        return DEFAULT_RESET_DELAY
+    try:
+        return float(value)
+    except ValueError:
+        print(f"⚠️ Invalid DAEMON_RESET_DELAY value '{value}', using default {DEFAULT_RESET_DELAY}")
+        return DEFAULT_RESET_DELAY
+
+
+def get_next_reset_run(app_config: AppConfig, moment: datetime, delay: float) -> datetime | None:
+    """计算已配置账号所用 provider 的下一次每日重置后的签到时间
+
+    重置时间已过但延迟尚未结束时（例如刚启动），返回本次重置后的签到时间
+
+    Args:
+        app_config: 应用配置
+        moment: 当前时间
+        delay: 重置后的延迟（秒）
+
+    Returns:
+        最早的重置后签到时间，没有可用 provider 时返回 None
+    """
+    offset = timedelta(seconds=delay)
+    runs = []
+    for account in app_config.accounts:
+        provider_config = app_config.get_provider(account.provider)
+        if provider_config:
+            runs.append(provider_config.get_next_reset(moment - offset) + offset)
+    return min(runs) if runs else None
+
+
+def _get_config_fingerprint() -> str:
+    """生成账号和 provider 配置的指纹，用于检测配置变更"""
+    values = "\n".join(os.getenv(env_name, "") for env_name in RELOAD_ENV_NAMES)
+    return hashlib.sha256(values.encode("utf-8")).hexdigest()[:16]
+
+
+def _schedule_next(workload: Workload, moment: datetime, reset_delay: float) -> None:
+    """计算任务的下一次执行时间"""
+    candidates = []
+    if workload.schedule:
+        candidates.append(workload.schedule.next_after(moment))
+    if workload.follow_resets and reset_delay >= 0:
+        reset_run = get_next_reset_run(AppConfig.load_from_env(), moment, reset_delay)
+        if reset_run and reset_run > moment:
+            candidates.append(reset_run)
+    workload.next_at = min(candidates) if candidates else None
+
+
+async def run_daemon() -> None:
+    """常驻运行，按调度依次执行任务"""
+    for env_name, value in DAEMON_ENV_DEFAULTS.items():
+        os.environ.setdefault(env_name, value)
+
+    tz = get_timezone(os.getenv("DAEMON_TIMEZONE", DEFAULT_DAEMON_TIMEZONE))
+    workloads = [
+        Workload(
+            "check-in",
+            checkin_main.main,
+            _load_schedule("DAEMON_CHECKIN_CRON", "0 0,8,16 * * *", tz),
+            follow_resets=True,
+        ),
+        Workload("996 hub check-in", checkin_996_main.main, _load_schedule("DAEMON_996_CRON", "0 0,8,16 * * *", tz)),
+        Workload(
+            "Linux.do read posts",
+            linuxdo_read_posts.main,
+            _load_schedule("DAEMON_LINUXDO_READ_CRON", "0 9,14,20 * * *", tz),
+        ),
+    ]
+    reset_delay = _get_reset_delay()
+    run_on_start = os.getenv("DAEMON_RUN_ON_START", "").lower() == "true"
+
+    print("🚀 Daemon started")
+    keep_browser_transports_warm()
+    set_transport_sharing(True)
+    fingerprint = _get_config_fingerprint()
+
+    try:
+        now = datetime.now(timezone.utc)
+        for workload in workloads:
+            _schedule_next(workload, now, reset_delay)
+            if run_on_start and (workload.schedule or workload.follow_resets):
+                workload.next_at = now
+            if workload.next_at:
+                print(f"ℹ️ Daemon: next {workload.name} at {workload.next_at.astimezone(tz).isoformat()}")
+            else:
+                print(f"ℹ️ Daemon: {workload.name} disabled")
+
+        while True:
+            scheduled = [workload for workload in workloads if workload.next_at]
+            if not scheduled:
+                print("❌ Daemon: no workloads scheduled, exiting")
+                return
+
+            workload = min(scheduled, key=lambda item: item.next_at)
+            wait_seconds = (workload.next_at - datetime.now(timezone.utc)).total_seconds()
+            if wait_seconds > 0:
+                await asyncio.sleep(min(wait_seconds, MAX_SLEEP_SECONDS))
+                continue
+
+            # 每次运行前重新读取 .env，账号和 provider 配置的修改无需重启即可生效
+            load_dotenv(override=True)
+            new_fingerprint = _get_config_fingerprint()
+            if new_fingerprint != fingerprint:
+                print("ℹ️ Daemon: account or provider configuration changed, reloaded")
+                fingerprint = new_fingerprint
+
+            await run_workload(workload.name, workload.entry)
+
+            _schedule_next(workload, datetime.now(timezone.utc), reset_delay)
+            if workload.next_at:
+                print(f"ℹ️ Daemon: next {workload.name} at {workload.next_at.astimezone(tz).isoformat()}")
+    finally:
+        await close_browser_transports(force=True)
+        set_transport_sharing(False)
+
+
+def run_main():
+    """运行常驻模式的包装函数"""
+    try:
+        asyncio.run(run_daemon())
+    except KeyboardInterrupt:
+        print("\n⚠️ Daemon stopped by user")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Error occurred during daemon execution: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_main()
@@ -11,9 +11,17 @@ import sys
 import random
 from datetime import datetime
 from dotenv import load_dotenv
-from camoufox.async_api import AsyncCamoufox
+from utils.browser_transport import get_shared_browser
 from utils.browser_utils import take_screenshot, save_page_content_to_file
+from utils.geoip_cache import launch_camoufox
 from utils.notify import notify
+from utils.storage_state_check import (
+    STATE_EXPIRED,
+    STATE_VALID,
+    get_storage_state_verdict,
+    mark_storage_state,
+    sweep_storage_states,
+)
 
 # 默认缓存目录，与 checkin.py 保持一致
 DEFAULT_STORAGE_STATE_DIR = "storage-states"
@@ -33,6 +41,7 @@ class LinuxDoReadPosts:
         username: str,
         password: str,
         storage_state_dir: str = DEFAULT_STORAGE_STATE_DIR,
+        proxy_config: dict | None = None,
     ):
         """初始化
 
@@ -40,10 +49,12 @@ class LinuxDoReadPosts:
             username: Linux.do 用户名
             password: Linux.do 密码
             storage_state_dir: 缓存目录，默认与 checkin.py 共享
+            proxy_config: 代理配置（可选）
         """
         self.username = username
         self.password = password
         self.storage_state_dir = storage_state_dir
+        self.proxy_config = proxy_config
         # 使用用户名哈希生成缓存文件名，与 checkin.py 保持一致
         self.username_hash = hashlib.sha256(username.encode("utf-8")).hexdigest()[:8]
 
@@ -53,17 +64,25 @@ class LinuxDoReadPosts:
         # 每个用户独立的 topic_id 缓存文件
         self.topic_id_cache_file = os.path.join(TOPIC_ID_CACHE_DIR, f"{self.username_hash}_topic_id.txt")
 
-    async def _is_logged_in(self, page) -> bool:
+    async def _is_logged_in(self, page, verdict: str) -> bool:
         """检查是否已登录
 
-        通过访问 https://linux.do/ 后检查 URL 是否跳转到登录页面来判断
+        启动前的 HTTP 检查已有结论时直接使用，否则通过访问 https://linux.do/ 后检查 URL 是否跳转到登录页面来判断
 
         Args:
             page: Camoufox 页面对象
+            verdict: storage state 检查结果
 
         Returns:
             是否已登录
         """
+        if verdict == STATE_VALID:
+            print(f"✅ {self.username}: Session verified before launch, already logged in")
+            return True
+        if verdict == STATE_EXPIRED:
+            print(f"ℹ️ {self.username}: Cached session expired or missing, not logged in")
+            return False
+
         try:
             print(f"ℹ️ {self.username}: Checking login status...")
             await page.goto("https://linux.do/", wait_until="domcontentloaded")
@@ -330,17 +349,31 @@ class LinuxDoReadPosts:
             except (ValueError, IndexError):
                 pass
 
-    async def run(self, max_posts: int = 100) -> tuple[bool, dict]:
+    async def run(self, max_posts: int = 100, browser=None) -> tuple[bool, dict]:
         """执行浏览帖子任务
 
         Args:
             max_posts: 最大浏览帖子数，默认 100
+            browser: 可选，共享的浏览器（在独立的 context 中浏览，不关闭浏览器），默认单独启动浏览器
 
         Returns:
             (成功标志, 结果信息字典)
         """
         print(f"ℹ️ {self.username}: Starting Linux.do read posts task")
 
+        if browser is not None:
+            return await self._run_in_browser(browser, max_posts)
+
+        async with launch_camoufox(
+            self.proxy_config,
+            headless=False,
+            humanize=True,
+            locale="en-US",
+        ) as browser:
+            return await self._run_in_browser(browser, max_posts)
+
+    async def _run_in_browser(self, browser, max_posts: int) -> tuple[bool, dict]:
+        """在浏览器的新 context 中登录并浏览帖子"""
         # 缓存文件路径，与 checkin.py 保持一致
         cache_file_path = f"{self.storage_state_dir}/linuxdo_{self.username_hash}_storage_state.json"
 
@@ -348,52 +381,51 @@ class LinuxDoReadPosts:
         base_topic_id_str = os.getenv("LINUXDO_BASE_TOPIC_ID", "")
         base_topic_id = int(base_topic_id_str) if base_topic_id_str else DEFAULT_BASE_TOPIC_ID
 
-        async with AsyncCamoufox(
-            headless=False,
-            humanize=True,
-            locale="en-US",
-        ) as browser:
-            # 加载缓存的 storage state（如果存在）
-            storage_state = cache_file_path if os.path.exists(cache_file_path) else None
-            if storage_state:
-                print(f"ℹ️ {self.username}: Restoring storage state from cache")
-            else:
-                print(f"ℹ️ {self.username}: No cache file found, starting fresh")
+        # 加载缓存的 storage state（如果存在且未过期）
+        verdict = get_storage_state_verdict(cache_file_path)
+        storage_state = cache_file_path if verdict != STATE_EXPIRED else None
+        if storage_state:
+            print(f"ℹ️ {self.username}: Restoring storage state from cache ({verdict} session)")
+        elif os.path.exists(cache_file_path):
+            print(f"ℹ️ {self.username}: Cached session expired, starting fresh")
+        else:
+            print(f"ℹ️ {self.username}: No cache file found, starting fresh")
 
-            context = await browser.new_context(storage_state=storage_state)
-            page = await context.new_page()
+        context = await browser.new_context(storage_state=storage_state)
+        page = await context.new_page()
 
-            try:
-                # 检查是否已登录
-                is_logged_in = await self._is_logged_in(page)
-
-                # 如果未登录，执行登录流程
-                if not is_logged_in:
-                    login_success = await self._do_login(page)
-                    if not login_success:
-                        return False, {"error": "Login failed"}
-
-                    # 保存会话状态
-                    await context.storage_state(path=cache_file_path)
-                    print(f"✅ {self.username}: Storage state saved to cache file")
-
-                # 浏览帖子
-                print(f"ℹ️ {self.username}: Starting to read posts...")
-                last_topic_id, read_count = await self._read_posts(page, base_topic_id, max_posts)
-
-                print(f"✅ {self.username}: Successfully read {read_count} posts")
-                return True, {
-                    "read_count": read_count,
-                    "last_topic_id": last_topic_id,
-                }
+        try:
+            # 检查是否已登录
+            is_logged_in = await self._is_logged_in(page, verdict)
+
+            # 如果未登录，执行登录流程
+            if not is_logged_in:
+                login_success = await self._do_login(page)
+                if not login_success:
+                    return False, {"error": "Login failed"}
+
+                # 保存会话状态
+                await context.storage_state(path=cache_file_path)
+                print(f"✅ {self.username}: Storage state saved to cache file")
+                mark_storage_state(cache_file_path, STATE_VALID)
+
+            # 浏览帖子
+            print(f"ℹ️ {self.username}: Starting to read posts...")
+            last_topic_id, read_count = await self._read_posts(page, base_topic_id, max_posts)
+
+            print(f"✅ {self.username}: Successfully read {read_count} posts")
+            return True, {
+                "read_count": read_count,
+                "last_topic_id": last_topic_id,
+            }
 
-            except Exception as e:
-                print(f"❌ {self.username}: Error occurred: {e}")
-                await take_screenshot(page, "error", self.username)
-                return False, {"error": str(e)}
-            finally:
-                await page.close()
-                await context.close()
+        except Exception as e:
+            print(f"❌ {self.username}: Error occurred: {e}")
+            await take_screenshot(page, "error", self.username)
+            return False, {"error": str(e)}
+        finally:
+            await page.close()
+            await context.close()
 
 
 def load_linuxdo_accounts() -> list[dict]:
@@ -461,8 +493,13 @@ def load_linuxdo_accounts() -> list[dict]:
         return []
 
 
-async def main():
-    """主函数"""
+async def main(proxy_config: dict | None = None, shared_browser: bool = False):
+    """主函数
+
+    Args:
+        proxy_config: 可选，代理配置（统一运行时与签到共用全局代理）
+        shared_browser: 是否使用当前事件循环中的共享浏览器，并复用同一进程中签到时刚刚检查或刷新的 Linux.do 会话
+    """
     load_dotenv(override=True)
 
     print("🚀 Linux.do read posts script started")
@@ -477,6 +514,10 @@ async def main():
 
     print(f"ℹ️ Found {len(accounts)} account(s) with linux.do configuration")
 
+    # 启动浏览器前先通过 HTTP 检查所有缓存会话是否有效
+    await sweep_storage_states(DEFAULT_STORAGE_STATE_DIR, proxy_config, skip_valid=shared_browser)
+    browser = await get_shared_browser(proxy_config) if shared_browser else None
+
     # 收集结果用于通知
     results = []
 
@@ -490,10 +531,11 @@ async def main():
             reader = LinuxDoReadPosts(
                 username=account["username"],
                 password=account["password"],
+                proxy_config=proxy_config,
             )
 
             start_time = datetime.now()
-            success, result = await reader.run(random.randint(200, 300))
+            success, result = await reader.run(random.randint(200, 300), browser)
             end_time = datetime.now()
             duration = end_time - start_time
 
@@ -6,17 +6,38 @@
 import asyncio
 import hashlib
 import json
+import os
 import sys
 from datetime import datetime
 from dotenv import load_dotenv
 from utils.config import AppConfig
 from utils.notify import notify
 from utils.balance_hash import load_balance_hash, save_balance_hash
-from checkin import CheckIn
+from utils.browser_utils import parse_cookies
+from utils.checkin_ledger import CheckInLedger
+from utils.cookie_store import CookieStore, get_cookie_store_secret
+from utils.deadline import get_account_deadline_seconds
+from utils.health_probe import OriginHealth, is_preflight_enabled, preflight_probe
+from utils.job_history import JobHistory
+from utils.proxy_pool import ProxyPool
+from utils.reset_window import get_provider_concurrency, get_reset_jitter_seconds, get_reset_window_seconds
+from utils.run_budget import RunBudget
+from utils.rerun import parse_rerun_selector, select_rerun_jobs
+from utils.run_checkpoint import RunCheckpoint
+from utils.session_store import SessionStore
+from utils.storage_state_check import sweep_storage_states
+from utils.worker_pool import AccountJob, get_http_concurrency, get_worker_processes, run_balance_jobs, run_jobs
 
 load_dotenv(override=True)
 
 BALANCE_HASH_FILE = "balance_hash.txt"
+CHECKIN_LEDGER_FILE = "checkin_ledger.json"
+JOB_HISTORY_FILE = "job_history.json"
+STORAGE_STATE_DIR = "storage-states"
+SESSION_STORE_FILE = f"{STORAGE_STATE_DIR}/provider_sessions.enc"
+LEGACY_SESSION_STORE_FILE = f"{STORAGE_STATE_DIR}/provider_sessions.json"
+COOKIE_STORE_FILE = f"{STORAGE_STATE_DIR}/provider_cookies.enc"
+RUN_CHECKPOINT_DIR = "run-checkpoints"
 
 
 def generate_balance_hash(balances: dict) -> str:
@@ -34,6 +55,164 @@ def generate_balance_hash(balances: dict) -> str:
     return hashlib.sha256(balance_json.encode("utf-8")).hexdigest()[:16]
 
 
+def build_jobs(
+    app_config: AppConfig,
+    ledger: CheckInLedger | None = None,
+    job_history: JobHistory | None = None,
+    first_success: bool = False,
+    cookie_store: CookieStore | None = None,
+    deadline_seconds: float | None = None,
+    proxy_pool: ProxyPool | None = None,
+) -> list[AccountJob]:
+    """为每个账号构建签到任务（未找到 provider 配置的任务 provider_config 为 None）
+
+    首次成功模式下，根据任务历史中各认证方式的成功率和成本确定尝试顺序；
+    cookie_store 中保存的未过期 cookies 优先于配置中的 cookies；
+    deadline_seconds 为每个账号的处理时间上限（秒），None 表示不限制；
+    配置了代理池时，未单独配置代理的账号使用代理池中固定分配的代理代替全局代理
+    """
+    jobs = []
+    for i, account_config in enumerate(app_config.accounts):
+        account_name = account_config.get_display_name(i)
+        provider_config = app_config.get_provider(account_config.provider)
+
+        method_order = None
+        if first_success and job_history and provider_config:
+            methods = [
+                auth_method
+                for auth_method, auth_config in (
+                    ("cookies", account_config.cookies),
+                    ("github", account_config.github),
+                    ("linux.do", account_config.linux_do),
+                )
+                if auth_config
+            ]
+            method_order = job_history.rank_auth_methods(account_name, provider_config.name, methods)
+
+        stored_cookies = None
+        if cookie_store and provider_config and account_config.cookies:
+            stored_cookies = cookie_store.get(account_name, provider_config.name, parse_cookies(account_config.cookies))
+
+        global_proxy = app_config.global_proxy
+        account_proxy_pool = proxy_pool if proxy_pool and not account_config.proxy else None
+        if account_proxy_pool:
+            global_proxy = account_proxy_pool.get_candidates(account_name)[0]
+
+        jobs.append(
+            AccountJob(
+                index=i,
+                account_name=account_name,
+                account_config=account_config,
+                provider_config=provider_config,
+                global_proxy=global_proxy,
+                ledger=ledger,
+                first_success=first_success,
+                method_order=method_order,
+                stored_cookies=stored_cookies,
+                deadline_seconds=deadline_seconds,
+                proxy_pool=account_proxy_pool,
+            )
+        )
+    return jobs
+
+
+async def run_preflight(jobs: list[AccountJob], proxy_config: dict | None = None) -> dict[str, OriginHealth]:
+    """探测本次用到的所有 provider 和 CDK 站点，并按探测到的延迟设置每个任务的请求超时
+
+    每个站点通过访问它的账号实际使用的代理探测（账号单独配置的代理，或代理池分配的代理 / 全局代理）
+
+    Returns:
+        {站点 origin: OriginHealth}
+    """
+    probe_urls = {}
+    origin_proxies: dict[str, list[dict | None]] = {}
+    for job in jobs:
+        if not job.provider_config:
+            continue
+        job_proxy = job.account_config.proxy or job.global_proxy
+        origin = job.provider_config.origin.rstrip("/")
+        probe_urls.setdefault(origin, job.provider_config.get_status_url())
+        origin_proxies.setdefault(origin, []).append(job_proxy)
+        for cdk_origin in job.provider_config.get_cdk_origins():
+            probe_urls.setdefault(cdk_origin, f"{cdk_origin}/")
+            origin_proxies.setdefault(cdk_origin, []).append(job_proxy)
+
+    health = await preflight_probe(probe_urls, proxy_config, origin_proxies=origin_proxies)
+    for job in jobs:
+        result = health.get(job.provider_config.origin.rstrip("/")) if job.provider_config else None
+        if result:
+            job.request_timeout = result.request_timeout
+    return health
+
+
+async def run_balance_mode(app_config: AppConfig) -> int:
+    """余额查询模式: 使用已保存的会话并发查询余额，不执行签到、充值和浏览器步骤
+
+    Returns:
+            退出码: 0 表示至少有一个账号查询成功, 1 表示全部失败
+    """
+    print("⚙️ Balance-only mode, skipping check-in, topup and browser steps")
+
+    store_secret = get_cookie_store_secret()
+    if not store_secret:
+        print("⚠️ COOKIE_STORE_KEY not set, no stored sessions available, using configured cookies only")
+    session_store = SessionStore(SESSION_STORE_FILE, store_secret, LEGACY_SESSION_STORE_FILE)
+    jobs = build_jobs(
+        app_config,
+        cookie_store=CookieStore(COOKIE_STORE_FILE, store_secret),
+        proxy_pool=ProxyPool.from_env(),
+    )
+    concurrency = int(os.getenv("BALANCE_CONCURRENCY", "16"))
+    job_results = await run_balance_jobs([job for job in jobs if job.provider_config], session_store, concurrency)
+
+    success_count = 0
+    total_count = 0
+    expired_accounts = []
+    notification_content = []
+    for job in jobs:
+        if not job.provider_config:
+            notification_content.append(
+                f"[FAIL] {job.account_name}: Provider '{job.account_config.provider}' configuration not found"
+            )
+            continue
+
+        results = job_results.get(job.index)
+        if isinstance(results, Exception):
+            notification_content.append(f"❌ {job.account_name} Exception: {str(results)[:100]}...")
+            continue
+
+        account_lines = [f"📣 {job.account_name}:"]
+        for auth_method, success, user_info in results or []:
+            total_count += 1
+            if success and user_info:
+                success_count += 1
+                account_lines.append(f"  💰 {auth_method}: {user_info['display']}")
+            elif user_info and user_info.get("session_expired"):
+                expired_accounts.append(f"{job.account_name} ({auth_method})")
+                account_lines.append(f"  ⌛ {auth_method}: Session expired, login required")
+            else:
+                error_msg = user_info.get("error", "Unknown error") if user_info else "Unknown error"
+                account_lines.append(f"  🔺 {auth_method}: {error_msg}")
+        notification_content.append("\n".join(account_lines))
+
+    summary = [
+        "-------------------------------",
+        "📢 Balance query statistics:",
+        f"🔵 Success: {success_count}/{total_count}",
+        f"⌛ Session expired: {len(expired_accounts)}",
+    ]
+    if expired_accounts:
+        summary.append(f"⚠️ Login required: {', '.join(expired_accounts)}")
+
+    time_info = f'🕓 Execution time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
+    notify_content = "\n\n".join([time_info, "\n".join(notification_content), "\n".join(summary)])
+
+    print(notify_content)
+    notify.push_message("Balance Report", notify_content, msg_type="text")
+
+    return 0 if success_count > 0 else 1
+
+
 async def main():
     """运行签到流程
 
@@ -41,6 +220,9 @@ async def main():
             退出码: 0 表示至少有一个账号成功, 1 表示全部失败
     """
 
+    # 整体运行时间预算从脚本启动时开始计算
+    run_budget = RunBudget.from_env()
+
     print("🚀 newapi.ai multi-account auto check-in script started (using Camoufox)")
     print(f'🕒 Execution time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
 
@@ -54,25 +236,128 @@ async def main():
     
     print(f"⚙️ Found {len(app_config.accounts)} account(s)")
 
+    # CHECKIN_MODE=balance 时仅查询余额
+    checkin_mode = os.getenv("CHECKIN_MODE", "").lower()
+    if checkin_mode == "balance":
+        sys.exit(await run_balance_mode(app_config))
+
     # 加载余额hash
     last_balance_hash = load_balance_hash(BALANCE_HASH_FILE)
 
+    # 加载签到记录，FORCE_CHECKIN=true 时忽略记录强制重新签到
+    ledger = CheckInLedger(CHECKIN_LEDGER_FILE)
+    force_checkin = os.getenv("FORCE_CHECKIN", "").lower() == "true"
+    if force_checkin:
+        print("⚙️ FORCE_CHECKIN enabled, ignoring check-in ledger")
+
+    # 加载加密保存的 provider 会话缓存和 cookies（provider 刷新后的会话），签到成功后更新；
+    # 未设置 COOKIE_STORE_KEY 时不保存
+    store_secret = get_cookie_store_secret()
+    if not store_secret:
+        print("ℹ️ COOKIE_STORE_KEY not set, provider sessions and refreshed cookies will not be saved")
+    session_store = SessionStore(SESSION_STORE_FILE, store_secret, LEGACY_SESSION_STORE_FILE)
+    cookie_store = CookieStore(COOKIE_STORE_FILE, store_secret)
+
+    # 加载任务耗时历史，用于最长任务优先调度
+    job_history = JobHistory(JOB_HISTORY_FILE)
+
     # 为每个账号执行签到
     success_count = 0
     total_count = 0
     notification_content = []
     current_balances = {}
     need_notify = False  # 是否需要发送通知
-
-    for i, account_config in enumerate(app_config.accounts):
-        account_key = f"account_{i + 1}"
-        account_name = account_config.get_display_name(i)
+    budget_exhausted_count = 0  # 运行时间预算用完未开始处理的账号数
+
+    # FIRST_SUCCESS=true 时任一认证方式成功后跳过其余方式
+    first_success = os.getenv("FIRST_SUCCESS", "").lower() == "true"
+    if first_success:
+        print("⚙️ FIRST_SUCCESS enabled, remaining authentication methods are skipped after the first success")
+    if run_budget:
+        print(
+            f"⚙️ Run time budget: {run_budget.remaining():.0f}s for accounts, "
+            f"{run_budget.reserve_seconds:.0f}s reserved for state files and notification"
+        )
+
+    # 加载代理池并探测每个代理的可用性和延迟，不可用的代理不参与分配
+    proxy_pool = ProxyPool.from_env()
+    if proxy_pool:
+        await proxy_pool.probe()
+
+    # 构建账号任务，每个账号完成后立即写入检查点
+    checkpoint = RunCheckpoint(RUN_CHECKPOINT_DIR)
+    jobs = build_jobs(
+        app_config,
+        ledger=None if force_checkin else ledger,
+        job_history=job_history,
+        first_success=first_success,
+        cookie_store=cookie_store,
+        deadline_seconds=get_account_deadline_seconds(),
+        proxy_pool=proxy_pool,
+    )
+    for job in jobs:
+        job.checkpoint = checkpoint
+
+    # 不处理的账号 {任务索引: 检查点中的结果，没有记录时为 None}，通知中使用检查点中的结果
+    carried_results = {}
+    carried_note = ""
+    if checkin_mode == "resume":
+        # CHECKIN_MODE=resume 时跳过当前签到日内已完成的账号（例如上次运行中途被终止）
+        for job in jobs:
+            if job.provider_config:
+                results = checkpoint.load(job.account_name, job.provider_config)
+                if results:
+                    carried_results[job.index] = results
+        carried_note = "completed earlier today"
+        print(f"⚙️ Resume mode: {len(carried_results)} account(s) already completed today, not processing them again")
+    elif checkin_mode == "rerun":
+        # CHECKIN_MODE=rerun 时只处理 RERUN_SELECTOR 选择的账号（默认为上次运行失败的账号）
+        try:
+            selector = parse_rerun_selector(os.getenv("RERUN_SELECTOR"))
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        carried_results = select_rerun_jobs([job for job in jobs if job.provider_config], selector, checkpoint)
+        carried_note = "from last run"
+        print(
+            f"⚙️ Rerun mode ({selector[0]}): rerunning "
+            f"{sum(1 for job in jobs if job.provider_config) - len(carried_results)} account(s), "
+            f"{len(carried_results)} account(s) use results from last run"
+        )
+    pending_jobs = [job for job in jobs if job.provider_config and job.index not in carried_results]
+
+    # 启动浏览器前先通过 HTTP 检查所有缓存的 Linux.do / GitHub 会话是否有效
+    storage_state_verdicts = await sweep_storage_states(STORAGE_STATE_DIR, app_config.global_proxy)
+
+    # 并发探测所有站点，决定正常处理、延后处理还是跳过
+    health = await run_preflight(pending_jobs, app_config.global_proxy) if is_preflight_enabled() else None
+
+    # 执行签到（纯 HTTP 账号与需要浏览器的账号分两个通道同时执行）
+    worker_processes = get_worker_processes()
+    job_results = await run_jobs(
+        pending_jobs,
+        worker_processes,
+        storage_state_verdicts,
+        get_http_concurrency(),
+        job_history,
+        health,
+        run_budget,
+        get_reset_window_seconds(),
+        get_reset_jitter_seconds(),
+        get_provider_concurrency(),
+        proxy_pool.get_limits() if proxy_pool else None,
+    )
+    job_results.update({index: results for index, results in carried_results.items() if results})
+
+    for job in jobs:
+        account_key = f"account_{job.index + 1}"
+        account_name = job.account_name
+        account_config = job.account_config
         if len(notification_content) > 0:
             notification_content.append("\n-------------------------------")
 
         try:
-            provider_config = app_config.get_provider(account_config.provider)
-            if not provider_config:
+            if not job.provider_config:
                 print(f"❌ {account_name}: Provider '{account_config.provider}' configuration not found")
                 need_notify = True
                 notification_content.append(
@@ -80,11 +365,24 @@ async def main():
                 )
                 continue
 
-            print(f"🌀 Processing {account_name} using provider '{account_config.provider}'")
-            checkin = CheckIn(account_name, account_config, provider_config, global_proxy=app_config.global_proxy)
-            results = await checkin.execute()
+            if job.index in carried_results and not carried_results[job.index]:
+                print(f"ℹ️ {account_name}: Not selected for rerun, no results recorded from last run")
+                notification_content.append(f"ℹ️ {account_name}: Not rerun, no results recorded from last run")
+                continue
+
+            results = job_results.get(job.index)
+            if isinstance(results, Exception):
+                raise results
+            results = results or []
+            if results and all(user_info and user_info.get("budget_exhausted") for _, _, user_info in results):
+                budget_exhausted_count += 1
 
-            total_count += len(results)
+            # 首次成功模式下被跳过的认证方式不计入统计
+            skipped_methods = [
+                auth_method for auth_method, _, user_info in results if user_info and user_info.get("skipped")
+            ]
+            attempted_count = len(results) - len(skipped_methods)
+            total_count += attempted_count
 
             # 处理多个认证方式的结果
             account_success = False
@@ -93,12 +391,53 @@ async def main():
 
             this_account_balances = {}
             # 构建详细的结果报告
-            account_result = f"📣 {account_name} Summary:\n"
+            summary_note = f" ({carried_note})" if job.index in carried_results else ""
+            account_result = f"📣 {account_name} Summary{summary_note}:\n"
             for auth_method, success, user_info in results:
+                if auth_method in skipped_methods:
+                    reason = (
+                        "run time budget running out"
+                        if user_info.get("budget_shed")
+                        else "another method already succeeded"
+                    )
+                    account_result += f"  ⏭️ SKIPPED {auth_method} authentication ({reason})\n"
+                    continue
+
+                # 记录认证方式的尝试结果，供首次成功模式排序（因预算用完未开始处理和续跑时沿用的结果不计入）
+                if not (
+                    user_info
+                    and (
+                        user_info.get("already_checked_in")
+                        or user_info.get("budget_exhausted")
+                        or user_info.get("resumed")
+                    )
+                ):
+                    job_history.record_method(account_name, job.provider_config.name, auth_method, bool(success))
+
                 status = "✅ SUCCESS" if success else "❌ FAILED"
-                account_result += f"  {status} with {auth_method} authentication\n"
+                account_result += f"  {status} with {auth_method} authentication"
+                if success and user_info and user_info.get("already_checked_in"):
+                    account_result += " (already checked in today)"
+                if success and user_info and user_info.get("alias_of"):
+                    account_result += f" (same user as {user_info['alias_of']})"
+                account_result += "\n"
 
                 if success and user_info and user_info.get("success"):
+                    # 保存本次签到使用的会话
+                    session = user_info.get("session")
+                    if session:
+                        session_store.set(
+                            account_name, job.provider_config.name, auth_method, session["cookies"], session["api_user"]
+                        )
+                        if auth_method == "cookies":
+                            cookie_store.set(
+                                account_name,
+                                job.provider_config.name,
+                                session["cookies"],
+                                parse_cookies(account_config.cookies),
+                                session.get("expires_at"),
+                            )
+
                     account_success = True
                     success_count += 1
                     successful_methods.append(auth_method)
@@ -112,7 +451,23 @@ async def main():
                         "used": current_used,
                         "bonus": current_bonus,
                     }
+                    # 记录本次签到成功，同一签到日内的后续运行将跳过（检查点中的结果已由之前的运行处理）
+                    if not user_info.get("already_checked_in") and not user_info.get("resumed"):
+                        ledger.record_success(
+                            account_name,
+                            job.provider_config.name,
+                            auth_method,
+                            {
+                                "quota": current_quota,
+                                "used_quota": current_used,
+                                "bonus_quota": current_bonus,
+                                "display": user_info["display"],
+                            },
+                        )
                 else:
+                    # 保存的 cookies 与配置中的 cookies 都被拒绝，删除保存的 cookies
+                    if auth_method == "cookies" and user_info and user_info.get("stored_cookies_rejected"):
+                        cookie_store.remove(account_name, job.provider_config.name)
                     failed_methods.append(auth_method)
                     error_msg = user_info.get("error", "Unknown error") if user_info else "Unknown error"
                     account_result += f"    🔺 {str(error_msg)}\n"
@@ -121,7 +476,7 @@ async def main():
                 current_balances[account_key] = this_account_balances
 
             # 如果所有认证方式都失败，需要通知
-            if not account_success and results:
+            if not account_success and attempted_count:
                 need_notify = True
                 print(f"🔔 {account_name} all authentication methods failed, will send notification")
 
@@ -134,9 +489,11 @@ async def main():
             success_count_methods = len(successful_methods)
             failed_count_methods = len(failed_methods)
 
-            account_result += f"\n📊 Statistics: {success_count_methods}/{len(results)} methods successful"
+            account_result += f"\n📊 Statistics: {success_count_methods}/{attempted_count} methods successful"
             if failed_count_methods > 0:
                 account_result += f" ({failed_count_methods} failed)"
+            if skipped_methods:
+                account_result += f" ({len(skipped_methods)} skipped)"
 
             notification_content.append(account_result)
 
@@ -164,6 +521,12 @@ async def main():
     if current_balance_hash:
         save_balance_hash(BALANCE_HASH_FILE, current_balance_hash)
 
+    # 保存签到记录和会话缓存
+    ledger.save()
+    job_history.save()
+    session_store.save()
+    cookie_store.save()
+
     if need_notify and notification_content:
         # 构建通知内容
         summary = [
@@ -173,6 +536,9 @@ async def main():
             f"🔴 Failed: {total_count - success_count}/{total_count}",
         ]
 
+        if budget_exhausted_count:
+            summary.append(f"⏰ Run time budget exhausted: {budget_exhausted_count} account(s) not started")
+
         if success_count == total_count:
             summary.append("✅ All accounts check-in successful!")
         elif success_count > 0:
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+统一运行脚本
+
+在一个进程中依次执行签到、996 hub 签到和 Linux.do 阅读：共用浏览器、HTTP 连接池和全局代理配置，
+各任务的通知合并为一条发送；Linux.do 阅读直接复用签到时 Linux.do OAuth 刚刚检查或刷新的会话，不再重新检查
+"""
+
+import asyncio
+import os
+import sys
+from functools import partial
+
+from dotenv import load_dotenv
+
+import linuxdo_read_posts
+import main as checkin_main
+from checkin_996 import main as checkin_996_main
+from utils.browser_transport import close_browser_transports, keep_browser_transports_warm
+from utils.circuit_breaker import set_transport_sharing
+from utils.config import AppConfig
+from utils.identity_registry import identity_registry
+from utils.notify import notify
+
+load_dotenv(override=True)
+
+# 任务名称
+WORKLOAD_CHECKIN = "checkin"
+WORKLOAD_996 = "996"
+WORKLOAD_LINUXDO_READ = "linuxdo_read"
+
+# 默认执行的任务（按顺序执行，Linux.do 阅读排在签到之后以复用刚刚刷新的会话）
+DEFAULT_WORKLOADS = [WORKLOAD_CHECKIN, WORKLOAD_996, WORKLOAD_LINUXDO_READ]
+
+# 统一运行时的默认配置：浏览器任务在主事件循环中执行，Linux.do 会话的检查结果和共享浏览器留在当前进程
+RUN_ALL_ENV_DEFAULTS = {
+    "WORKER_PROCESSES": "0",
+}
+
+
+def get_workloads(env_name: str = "RUN_ALL_WORKLOADS") -> list[str]:
+    """从环境变量读取需要执行的任务（逗号分隔），始终按默认顺序执行"""
+    value = os.getenv(env_name, "").strip()
+    if not value:
+        return list(DEFAULT_WORKLOADS)
+    selected = {name.strip().lower() for name in value.split(",") if name.strip()}
+    unknown = selected - set(DEFAULT_WORKLOADS)
+    if unknown:
+        print(f"⚠️ Unknown workload(s) in {env_name}: {', '.join(sorted(unknown))}, ignoring")
+    return [name for name in DEFAULT_WORKLOADS if name in selected]
+
+
+async def run_workload(name: str, entry) -> bool:
+    """执行一个任务，脚本的退出码和异常不影响后续任务
+
+    Args:
+        name: 任务名称
+        entry: 任务入口（各脚本的 main 协程函数）
+
+    Returns:
+        是否成功（退出码为 0）
+    """
+    print(f"\n{'=' * 50}")
+    print(f"⏰ Running {name}")
+    print(f"{'=' * 50}")
+    # 身份登记只在一次运行中有效，否则后续运行会直接复用上次的签到结果
+    identity_registry.clear()
+    try:
+        exit_code = await entry()
+    except SystemExit as e:
+        exit_code = e.code
+    except Exception as e:
+        print(f"❌ {name} failed: {e}")
+        return False
+    print(f"ℹ️ {name} finished with exit code {exit_code or 0}")
+    return not exit_code
+
+
+async def run_all() -> int:
+    """依次执行所有任务
+
+    Returns:
+        退出码: 0 表示至少有一个任务成功, 1 表示全部失败
+    """
+    for env_name, value in RUN_ALL_ENV_DEFAULTS.items():
+        os.environ.setdefault(env_name, value)
+
+    workloads = get_workloads()
+    if not workloads:
+        print("❌ No workloads selected, program exits")
+        return 1
+
+    # 全局代理只加载一次，Linux.do 阅读与签到使用同一代理
+    global_proxy = AppConfig.load_from_env().global_proxy
+    entries = {
+        WORKLOAD_CHECKIN: checkin_main.main,
+        WORKLOAD_996: checkin_996_main.main,
+        WORKLOAD_LINUXDO_READ: partial(linuxdo_read_posts.main, proxy_config=global_proxy, shared_browser=True),
+    }
+
+    print(f"🚀 Unified run started: {', '.join(workloads)}")
+    keep_browser_transports_warm()
+    set_transport_sharing(True)
+    notify.start_batch()
+    results = []
+    try:
+        for name in workloads:
+            results.append(await run_workload(name, entries[name]))
+    finally:
+        notify.flush_batch("newapi.ai Run Summary")
+        await close_browser_transports(force=True)
+        set_transport_sharing(False)
+
+    return 0 if any(results) else 1
+
+
+def run_main():
+    """运行主函数的包装函数"""
+    try:
+        sys.exit(asyncio.run(run_all()))
+    except KeyboardInterrupt:
+        print("\n⚠️ Program interrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Error occurred during program execution: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_main()
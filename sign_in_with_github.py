@@ -5,10 +5,13 @@
 
 import json
 import os
+from dataclasses import dataclass, field
 from urllib.parse import urlparse, parse_qs
 from camoufox.async_api import AsyncCamoufox
 from utils.browser_utils import filter_cookies, take_screenshot, save_page_content_to_file
 from utils.config import ProviderConfig
+from utils.storage_state_check import STATE_EXPIRED, STATE_VALID, get_storage_state_verdict, mark_storage_state
+from utils.deadline import Deadline
 from utils.wait_for_secrets import WaitForSecrets
 
 
@@ -21,6 +24,7 @@ class GitHubSignIn:
         provider_config: ProviderConfig,
         username: str,
         password: str,
+        deadline: Deadline | None = None,
     ):
         """初始化
 
@@ -30,11 +34,13 @@ class GitHubSignIn:
             proxy_conf
             username: GitHub 用户名
             password: GitHub 密码
+            deadline: 账号截止时间（可选），限制 2FA 验证码的等待时间
         """
         self.account_name = account_name
         self.provider_config = provider_config
         self.username = username
         self.password = password
+        self.deadline = deadline or Deadline()
 
     async def signin(
         self,
@@ -59,6 +65,41 @@ class GitHubSignIn:
             f"ℹ️ {self.account_name}: Using client_id: {client_id}, auth_state: {auth_state}, cache_file: {cache_file_path}"
         )
 
+        request = GitHubOAuthRequest(
+            account_name=self.account_name,
+            provider_config=self.provider_config,
+            client_id=client_id,
+            auth_state=auth_state,
+            auth_cookies=auth_cookies,
+        )
+        results = await self.signin_batch([request], cache_file_path)
+        return results[0]
+
+    async def signin_batch(
+        self,
+        requests: list["GitHubOAuthRequest"],
+        cache_file_path: str = "",
+    ) -> list[tuple[bool, dict]]:
+        """登录（或恢复）一次 GitHub，然后在同一浏览器上下文中依次批准多个 provider 的 OAuth 授权
+
+        同一 GitHub 账号只登录一次，也减少了频繁登录触发的设备验证
+
+        Args:
+            requests: 各 provider 的授权请求
+            cache_file_path: 缓存文件路径
+
+        Returns:
+            与 requests 顺序一致的 [(成功标志, 结果字典)]
+        """
+        if not requests:
+            return []
+
+        if len(requests) > 1:
+            print(
+                f"ℹ️ {self.account_name}: Executing batched GitHub sign-in for {len(requests)} provider(s): "
+                f"{', '.join(request.account_name for request in requests)}"
+            )
+
         async with AsyncCamoufox(
             # persistent_context=True,
             # user_data_dir=tmp_dir,
@@ -66,16 +107,20 @@ class GitHubSignIn:
             humanize=True,
             locale="en-US",
         ) as browser:
-            # 只有在缓存文件存在时才加载 storage_state
-            storage_state = cache_file_path if os.path.exists(cache_file_path) else None
+            # 只有在缓存文件存在且会话未过期（启动前的 HTTP 检查结果）时才加载 storage_state
+            verdict = get_storage_state_verdict(cache_file_path)
+            storage_state = cache_file_path if verdict != STATE_EXPIRED else None
             if storage_state:
-                print(f"ℹ️ {self.account_name}: Found cache file, restore storage state")
+                print(f"ℹ️ {self.account_name}: Found cache file ({verdict} session), restore storage state")
+            elif os.path.exists(cache_file_path):
+                print(f"ℹ️ {self.account_name}: Cached session expired, starting fresh")
             else:
                 print(f"ℹ️ {self.account_name}: No cache file found, starting fresh")
 
             context = await browser.new_context(storage_state=storage_state)
 
-            # 设置从 auth_state 获取的 session cookies 到页面上下文
+            # 设置从 auth_state 获取的 session cookies 到页面上下文（各 provider 的 cookies 域名不同，可以同时设置）
+            auth_cookies = [cookie for request in requests for cookie in request.auth_cookies]
             if auth_cookies:
                 await context.add_cookies(auth_cookies)
                 print(f"ℹ️ {self.account_name}: Set {len(auth_cookies)} auth cookies from provider")
@@ -85,234 +130,294 @@ class GitHubSignIn:
             page = await context.new_page()
 
             try:
-                # 检查是否已经登录（通过缓存恢复）
-                is_logged_in = False
-                oauth_url = f"https://github.com/login/oauth/authorize?response_type=code&client_id={client_id}&state={auth_state}&scope=user:email"
+                # 检查是否已经登录（通过缓存恢复），并在需要时执行登录
+                first_request = requests[0]
+                is_logged_in = await self._check_login_status(page, first_request, verdict)
+                if not is_logged_in:
+                    login_error = await self._login(page, context, cache_file_path)
+                    if login_error:
+                        return [(False, login_error) for _ in requests]
 
-                if os.path.exists(cache_file_path):
-                    try:
-                        print(f"ℹ️ {self.account_name}: Checking login status at {oauth_url}")
-                        # 直接访问授权页面检查是否已登录
-                        response = await page.goto(oauth_url, wait_until="domcontentloaded")
-                        print(f"ℹ️ {self.account_name}: redirected to app page {response.url if response else 'N/A'}")
-                        await save_page_content_to_file(page, "sign_in_check", self.account_name, prefix="github")
-
-                        # 登录后可能直接跳转回应用页面
-                        if response and response.url.startswith(self.provider_config.origin):
-                            is_logged_in = True
-                            print(f"✅ {self.account_name}: Already logged in via cache, proceeding to authorization")
-                        else:
-                            # 检查是否出现授权按钮（表示已登录）
-                            authorize_btn = await page.query_selector('button[type="submit"]')
-                            if authorize_btn:
-                                is_logged_in = True
-                                print(
-                                    f"✅ {self.account_name}: Already logged in via cache, proceeding to authorization"
-                                )
-                                await authorize_btn.click()
-                            else:
-                                print(f"ℹ️ {self.account_name}: Approve button not found, need to login again")
-                    except Exception as e:
-                        print(f"⚠️ {self.account_name}: Failed to check login status: {e}")
+                # 依次完成每个 provider 的授权，首个请求在缓存登录时已经完成授权页面处理
+                results = []
+                for i, request in enumerate(requests):
+                    if i > 0 or not is_logged_in:
+                        approval_error = await self._open_authorization(page, request)
+                        if approval_error:
+                            results.append((False, approval_error))
+                            continue
 
-                # 如果未登录，则执行登录流程
-                if not is_logged_in:
-                    try:
-                        print(f"ℹ️ {self.account_name}: Starting to sign in GitHub")
+                    results.append(await self._wait_for_callback(page, context, request))
 
-                        await page.goto("https://github.com/login", wait_until="domcontentloaded")
-                        await page.fill("#login_field", self.username)
-                        await page.fill("#password", self.password)
-                        await page.click('input[type="submit"][value="Sign in"]')
-                        await page.wait_for_timeout(10000)
+                return results
 
-                        await save_page_content_to_file(page, "sign_in_result", self.account_name, prefix="github")
+            except Exception as e:
+                print(f"❌ {self.account_name}: Error occurred while processing GitHub page: {e}")
+                await take_screenshot(page, "github_page_navigation_error", self.account_name)
+                return [(False, {"error": "GitHub page navigation error"}) for _ in requests]
+            finally:
+                await page.close()
+                await context.close()
 
-                        # 处理账号选择（如果需要）
-                        try:
-                            switch_account_form = await page.query_selector('form[action="/switch_account"]')
-                            if switch_account_form:
-                                print(f"ℹ️ {self.account_name}: Account selection required")
-                                submit_btn = await switch_account_form.query_selector('input[type="submit"]')
-                                if submit_btn:
-                                    print(f"ℹ️ {self.account_name}: Clicking account selection submit button")
-                                    await submit_btn.click()
-                                    await page.wait_for_timeout(5000)
-                                    await save_page_content_to_file(page, "account_selected", self.account_name, prefix="github")
-                                else:
-                                    print(f"⚠️ {self.account_name}: Account selection submit button not found")
-                        except Exception as e:
-                            print(f"⚠️ {self.account_name}: Error handling account selection: {e}")
-
-                        # 处理两步验证（如果需要）
-                        try:
-                            # 检查是否需要两步验证
-                            otp_input = await page.query_selector('input[name="otp"]')
-                            if otp_input:
-                                print(f"ℹ️ {self.account_name}: Two-factor authentication required")
-
-                                # 记录当前URL用于检测跳转
-                                current_url = page.url
-                                print(f"ℹ️ {self.account_name}: Current page url is {current_url}")
-
-                                # 尝试通过 wait-for-secrets 自动获取 OTP
-                                otp_code = None
-                                try:
-                                    print(f"🔐 {self.account_name}: Attempting to retrieve OTP via wait-for-secrets...")
-                                    # Define secret object
-                                    wait_for_secrets = WaitForSecrets()
-                                    secret_obj = {
-                                        "OTP": {
-                                            "name": "GitHub 2FA OTP",
-                                            "description": "OTP from authenticator app",
-                                        }
-                                    }
-                                    secrets = wait_for_secrets.get(
-                                        secret_obj,
-                                        timeout=5,
-                                        notification={
-                                            "title": "GitHub 2FA OTP",
-                                            "message": "请在您的账号关联的邮箱查看验证码，并通过以下链接输入",
-                                        },
-                                    )
-                                    if secrets and "OTP" in secrets:
-                                        otp_code = secrets["OTP"]
-                                        print(f"✅ {self.account_name}: Retrieved OTP via wait-for-secrets")
-                                except Exception as e:
-                                    print(f"⚠️ {self.account_name}: wait-for-secrets failed: {e}")
-
-                                if otp_code:
-                                    # 自动填充 OTP
-                                    print(f"✅ {self.account_name}: Auto-filling OTP code")
-                                    await otp_input.fill(otp_code)
-                                    await save_page_content_to_file(page, "otp_filled", self.account_name, prefix="github")
-
-                                    # OTP 输入会自动提交
-                                    # 先尝试查询非 disabled 的按钮
-                                    # submit_btn = await page.query_selector('button[type="submit"]:not(:disabled)')
-                                    # if submit_btn:
-                                    #     try:
-                                    #         # 等待点击后的导航完成
-                                    #         await submit_btn.click()
-                                    #         print(f"✅ {self.account_name}: OTP submitted successfully")
-                                    #     except Exception as nav_err:
-                                    #         print(f"⚠️ {self.account_name}: " f"Navigation after OTP: {nav_err}")
-                                    #         await self._save_page_content_to_file(page, "opt_nav_error")
-                                    #         # 即使导航出错也继续，因为可能已经成功
-                                    #         await page.wait_for_timeout(3000)
-                                    # else:
-                                    #     print(f"❌ {self.account_name}: Submit button not found")
-                                    #     await self._save_page_content_to_file(page, "opt_submit_button_not_found")
-
-                                    # 等待页面跳转完成（URL改变）
-                                    try:
-                                        await page.wait_for_url(lambda url: url != current_url, timeout=10000)
-                                    except Exception:
-                                        # URL未改变也继续，可能已经在正确页面
-                                        pass
-                                else:
-                                    # 回退到手动输入
-                                    print(f"ℹ️ {self.account_name}: Please enter OTP manually in the browser")
-                                    await page.wait_for_timeout(30000)  # 等待30秒让用户手动输入
-                        except Exception as e:
-                            print(f"⚠️ {self.account_name}: Error handling 2FA: {e}")
-
-                        # 保存新的会话状态
-                        await context.storage_state(path=cache_file_path)
-                        print(f"✅ {self.account_name}: Storage state saved to cache file")
+    async def _check_login_status(self, page, request: "GitHubOAuthRequest", verdict: str) -> bool:
+        """通过访问授权页面检查缓存的登录状态是否有效，已登录时直接批准授权
 
-                    except Exception as e:
-                        print(f"❌ {self.account_name}: Error occurred while signing in GitHub: {e}")
-                        await take_screenshot(page, "github_signin_error", self.account_name)
-                        return False, {"error": "GitHub sign-in error"}
+        Returns:
+            是否已登录
+        """
+        if verdict == STATE_EXPIRED:
+            return False
+
+        try:
+            print(f"ℹ️ {self.account_name}: Checking login status at {request.oauth_url}")
+            # 直接访问授权页面检查是否已登录
+            response = await page.goto(request.oauth_url, wait_until="domcontentloaded")
+            print(f"ℹ️ {self.account_name}: redirected to app page {response.url if response else 'N/A'}")
+            if verdict != STATE_VALID:
+                await save_page_content_to_file(page, "sign_in_check", self.account_name, prefix="github")
+
+            # 登录后可能直接跳转回应用页面
+            if response and response.url.startswith(request.provider_config.origin):
+                print(f"✅ {self.account_name}: Already logged in via cache, proceeding to authorization")
+                return True
+
+            # 检查是否出现授权按钮（表示已登录）
+            authorize_btn = await page.query_selector('button[type="submit"]')
+            if authorize_btn:
+                print(f"✅ {self.account_name}: Already logged in via cache, proceeding to authorization")
+                await authorize_btn.click()
+                return True
+
+            print(f"ℹ️ {self.account_name}: Approve button not found, need to login again")
+        except Exception as e:
+            print(f"⚠️ {self.account_name}: Failed to check login status: {e}")
+        return False
+
+    async def _login(self, page, context, cache_file_path: str) -> dict | None:
+        """登录 GitHub（处理账号选择和两步验证）并保存会话状态
 
-                    # 登录后访问授权页面
-                    try:
-                        print(f"ℹ️ {self.account_name}: Navigating to authorization page: {oauth_url}")
-                        response = await page.goto(oauth_url, wait_until="domcontentloaded")
-                        print(f"ℹ️ {self.account_name}: redirected to app page {response.url if response else 'N/A'}")
-
-                        # GitHub 登录后可能直接跳转回应用页面
-                        if response and response.url.startswith(self.provider_config.origin):
-                            print(f"✅ {self.account_name}: logged in, proceeding to authorization")
-                        else:
-                            # 检查是否出现授权按钮（表示已登录）
-                            authorize_btn = await page.query_selector('button[type="submit"]')
-                            if authorize_btn:
-                                print(
-                                    f"✅ {self.account_name}: Already logged in via cache, proceeding to authorization"
-                                )
-                                await authorize_btn.click()
-                            else:
-                                print(f"ℹ️ {self.account_name}: Approve button not found")
-                    except Exception as e:
-                        print(f"❌ {self.account_name}: Error occurred while authorization approve: {e}")
-                        await take_screenshot(page, "github_auth_approval_failed", self.account_name)
-                        return False, {"error": "GitHub authorization approval failed"}
+        Returns:
+            登录失败时返回错误信息字典，成功返回 None
+        """
+        try:
+            print(f"ℹ️ {self.account_name}: Starting to sign in GitHub")
 
-                # 统一处理授权逻辑（无论是否通过缓存登录）
-                try:
-                    print(f"ℹ️ {self.account_name}: Waiting for OAuth callback...")
-                    await page.wait_for_url(f"**{self.provider_config.origin}/oauth/**", timeout=30000)
+            await page.goto("https://github.com/login", wait_until="domcontentloaded")
+            await page.fill("#login_field", self.username)
+            await page.fill("#password", self.password)
+            await page.click('input[type="submit"][value="Sign in"]')
+            await page.wait_for_timeout(10000)
+
+            await save_page_content_to_file(page, "sign_in_result", self.account_name, prefix="github")
 
-                    # 从 localStorage 获取 user 对象并提取 id
-                    api_user = None
+            # 处理账号选择（如果需要）
+            try:
+                switch_account_form = await page.query_selector('form[action="/switch_account"]')
+                if switch_account_form:
+                    print(f"ℹ️ {self.account_name}: Account selection required")
+                    submit_btn = await switch_account_form.query_selector('input[type="submit"]')
+                    if submit_btn:
+                        print(f"ℹ️ {self.account_name}: Clicking account selection submit button")
+                        await submit_btn.click()
+                        await page.wait_for_timeout(5000)
+                        await save_page_content_to_file(page, "account_selected", self.account_name, prefix="github")
+                    else:
+                        print(f"⚠️ {self.account_name}: Account selection submit button not found")
+            except Exception as e:
+                print(f"⚠️ {self.account_name}: Error handling account selection: {e}")
+
+            # 处理两步验证（如果需要）
+            try:
+                # 检查是否需要两步验证
+                otp_input = await page.query_selector('input[name="otp"]')
+                if otp_input:
+                    print(f"ℹ️ {self.account_name}: Two-factor authentication required")
+
+                    # 记录当前URL用于检测跳转
+                    current_url = page.url
+                    print(f"ℹ️ {self.account_name}: Current page url is {current_url}")
+
+                    # 尝试通过 wait-for-secrets 自动获取 OTP
+                    otp_code = None
                     try:
+                        print(f"🔐 {self.account_name}: Attempting to retrieve OTP via wait-for-secrets...")
+                        # Define secret object
+                        wait_for_secrets = WaitForSecrets()
+                        secret_obj = {
+                            "OTP": {
+                                "name": "GitHub 2FA OTP",
+                                "description": "OTP from authenticator app",
+                            }
+                        }
+                        # wait-for-secrets 同步轮询，无法被取消，等待时间不超过账号截止时间的剩余时间
+                        secrets = wait_for_secrets.get(
+                            secret_obj,
+                            timeout=round(self.deadline.clip(5 * 60) / 60, 1),
+                            notification={
+                                "title": "GitHub 2FA OTP",
+                                "message": "请在您的账号关联的邮箱查看验证码，并通过以下链接输入",
+                            },
+                        )
+                        if secrets and "OTP" in secrets:
+                            otp_code = secrets["OTP"]
+                            print(f"✅ {self.account_name}: Retrieved OTP via wait-for-secrets")
+                    except Exception as e:
+                        print(f"⚠️ {self.account_name}: wait-for-secrets failed: {e}")
+
+                    if otp_code:
+                        # 自动填充 OTP
+                        print(f"✅ {self.account_name}: Auto-filling OTP code")
+                        await otp_input.fill(otp_code)
+                        await save_page_content_to_file(page, "otp_filled", self.account_name, prefix="github")
+
+                        # OTP 输入会自动提交
+                        # 先尝试查询非 disabled 的按钮
+                        # submit_btn = await page.query_selector('button[type="submit"]:not(:disabled)')
+                        # if submit_btn:
+                        #     try:
+                        #         # 等待点击后的导航完成
+                        #         await submit_btn.click()
+                        #         print(f"✅ {self.account_name}: OTP submitted successfully")
+                        #     except Exception as nav_err:
+                        #         print(f"⚠️ {self.account_name}: " f"Navigation after OTP: {nav_err}")
+                        #         await self._save_page_content_to_file(page, "opt_nav_error")
+                        #         # 即使导航出错也继续，因为可能已经成功
+                        #         await page.wait_for_timeout(3000)
+                        # else:
+                        #     print(f"❌ {self.account_name}: Submit button not found")
+                        #     await self._save_page_content_to_file(page, "opt_submit_button_not_found")
+
+                        # 等待页面跳转完成（URL改变）
                         try:
-                            await page.wait_for_function('localStorage.getItem("user") !== null', timeout=10000)
+                            await page.wait_for_url(lambda url: url != current_url, timeout=10000)
                         except Exception:
-                            await page.wait_for_timeout(5000)
-
-                        user_data = await page.evaluate("() => localStorage.getItem('user')")
-                        if user_data:
-                            user_obj = json.loads(user_data)
-                            api_user = user_obj.get("id")
-                            if api_user:
-                                print(f"✅ {self.account_name}: Got api user: {api_user}")
-                            else:
-                                print(f"⚠️ {self.account_name}: User id not found in localStorage")
-                        else:
-                            print(f"⚠️ {self.account_name}: User data not found in localStorage")
-                    except Exception as e:
-                        print(f"⚠️ {self.account_name}: Error reading user from localStorage: {e}")
+                            # URL未改变也继续，可能已经在正确页面
+                            pass
+                    else:
+                        # 回退到手动输入
+                        print(f"ℹ️ {self.account_name}: Please enter OTP manually in the browser")
+                        await page.wait_for_timeout(self.deadline.clip_ms(30000))  # 等待30秒让用户手动输入
+            except Exception as e:
+                print(f"⚠️ {self.account_name}: Error handling 2FA: {e}")
 
-                    if api_user:
-                        print(f"✅ {self.account_name}: OAuth authorization successful")
+            # 保存新的会话状态
+            await context.storage_state(path=cache_file_path)
+            print(f"✅ {self.account_name}: Storage state saved to cache file")
+            mark_storage_state(cache_file_path, STATE_VALID)
+            return None
 
-                        # 提取 session cookie，只保留与 provider domain 匹配的
-                        cookies = await context.cookies()
-                        user_cookies = filter_cookies(cookies, self.provider_config.origin)
+        except Exception as e:
+            print(f"❌ {self.account_name}: Error occurred while signing in GitHub: {e}")
+            await take_screenshot(page, "github_signin_error", self.account_name)
+            return {"error": "GitHub sign-in error"}
 
-                        return True, {"cookies": user_cookies, "api_user": api_user}
-                    else:
-                        print(f"⚠️ {self.account_name}: OAuth callback received but no user ID found")
-                        await take_screenshot(page, "github_oauth_failed_no_user_id", self.account_name)
-
-                        parsed_url = urlparse(page.url)
-                        query_params = parse_qs(parsed_url.query)
-
-                        # 如果 query 中包含 code，说明 OAuth 回调成功
-                        if "code" in query_params:
-                            print(f"✅ {self.account_name}: OAuth code received: {query_params.get('code')}")
-                            return True, query_params
-                        else:
-                            print(f"❌ {self.account_name}: OAuth failed, no code in callback")
-                            return False, {
-                                "error": "GitHub OAuth failed - no code in callback",
-                            }
+    async def _open_authorization(self, page, request: "GitHubOAuthRequest") -> dict | None:
+        """访问授权页面，需要时点击授权按钮
 
-                except Exception as e:
-                    print(
-                        f"❌ {self.account_name}: Error occurred during authorization: {e}\n\n"
-                        f"Current page is: {page.url}"
-                    )
-                    await take_screenshot(page, "github_authorization_failed", self.account_name)
-                    return False, {"error": "GitHub authorization failed"}
+        Returns:
+            失败时返回错误信息字典，成功返回 None
+        """
+        account_name = request.account_name
+        try:
+            print(f"ℹ️ {account_name}: Navigating to authorization page: {request.oauth_url}")
+            response = await page.goto(request.oauth_url, wait_until="domcontentloaded")
+            print(f"ℹ️ {account_name}: redirected to app page {response.url if response else 'N/A'}")
+
+            # GitHub 登录后可能直接跳转回应用页面
+            if response and response.url.startswith(request.provider_config.origin):
+                print(f"✅ {account_name}: logged in, proceeding to authorization")
+            else:
+                # 检查是否出现授权按钮（表示已登录）
+                authorize_btn = await page.query_selector('button[type="submit"]')
+                if authorize_btn:
+                    print(f"✅ {account_name}: Already logged in via cache, proceeding to authorization")
+                    await authorize_btn.click()
+                else:
+                    print(f"ℹ️ {account_name}: Approve button not found")
+            return None
+        except Exception as e:
+            print(f"❌ {account_name}: Error occurred while authorization approve: {e}")
+            await take_screenshot(page, "github_auth_approval_failed", account_name)
+            return {"error": "GitHub authorization approval failed"}
+
+    async def _wait_for_callback(self, page, context, request: "GitHubOAuthRequest") -> tuple[bool, dict]:
+        """等待 provider OAuth 回调，并提取 cookies 和 api_user
 
+        Returns:
+            (成功标志, 结果字典)
+        """
+        account_name = request.account_name
+        origin = request.provider_config.origin
+        try:
+            print(f"ℹ️ {account_name}: Waiting for OAuth callback...")
+            await page.wait_for_url(f"**{origin}/oauth/**", timeout=30000)
+
+            # 从 localStorage 获取 user 对象并提取 id
+            api_user = None
+            try:
+                try:
+                    await page.wait_for_function('localStorage.getItem("user") !== null', timeout=10000)
+                except Exception:
+                    await page.wait_for_timeout(5000)
+
+                user_data = await page.evaluate("() => localStorage.getItem('user')")
+                if user_data:
+                    user_obj = json.loads(user_data)
+                    api_user = user_obj.get("id")
+                    if api_user:
+                        print(f"✅ {account_name}: Got api user: {api_user}")
+                    else:
+                        print(f"⚠️ {account_name}: User id not found in localStorage")
+                else:
+                    print(f"⚠️ {account_name}: User data not found in localStorage")
             except Exception as e:
-                print(f"❌ {self.account_name}: Error occurred while processing GitHub page: {e}")
-                await take_screenshot(page, "github_page_navigation_error", self.account_name)
-                return False, {"error": "GitHub page navigation error"}
-            finally:
-                await page.close()
-                await context.close()
+                print(f"⚠️ {account_name}: Error reading user from localStorage: {e}")
+
+            if api_user:
+                print(f"✅ {account_name}: OAuth authorization successful")
+
+                # 提取 session cookie，只保留与 provider domain 匹配的
+                cookies = await context.cookies()
+                user_cookies = filter_cookies(cookies, origin)
+
+                return True, {"cookies": user_cookies, "api_user": api_user}
+            else:
+                print(f"⚠️ {account_name}: OAuth callback received but no user ID found")
+                await take_screenshot(page, "github_oauth_failed_no_user_id", account_name)
+
+                parsed_url = urlparse(page.url)
+                query_params = parse_qs(parsed_url.query)
+
+                # 如果 query 中包含 code，说明 OAuth 回调成功
+                if "code" in query_params:
+                    print(f"✅ {account_name}: OAuth code received: {query_params.get('code')}")
+                    return True, query_params
+                else:
+                    print(f"❌ {account_name}: OAuth failed, no code in callback")
+                    return False, {
+                        "error": "GitHub OAuth failed - no code in callback",
+                    }
+
+        except Exception as e:
+            print(f"❌ {account_name}: Error occurred during authorization: {e}\n\n" f"Current page is: {page.url}")
+            await take_screenshot(page, "github_authorization_failed", account_name)
+            return False, {"error": "GitHub authorization failed"}
+
+
+@dataclass
+class GitHubOAuthRequest:
+    """单个 provider 的 GitHub OAuth 授权请求"""
+
+    account_name: str
+    provider_config: ProviderConfig
+    client_id: str
+    auth_state: str
+    auth_cookies: list = field(default_factory=list)
+
+    @property
+    def oauth_url(self) -> str:
+        """GitHub 授权页面 URL"""
+        return (
+            f"https://github.com/login/oauth/authorize?"
+            f"response_type=code&client_id={self.client_id}&state={self.auth_state}&scope=user:email"
+        )
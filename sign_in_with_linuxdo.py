@@ -5,10 +5,13 @@
 
 import json
 import os
+from dataclasses import dataclass, field
 from urllib.parse import urlparse, parse_qs
 from camoufox.async_api import AsyncCamoufox
 from utils.browser_utils import filter_cookies, take_screenshot, save_page_content_to_file
 from utils.config import ProviderConfig
+from utils.storage_state_check import STATE_EXPIRED, STATE_VALID, get_storage_state_verdict, mark_storage_state
+from utils.deadline import Deadline
 
 
 class LinuxDoSignIn:
@@ -20,6 +23,7 @@ class LinuxDoSignIn:
         provider_config: ProviderConfig,
         username: str,
         password: str,
+        deadline: Deadline | None = None,
     ):
         """初始化
 
@@ -28,11 +32,13 @@ class LinuxDoSignIn:
             provider_config: 提供商配置
             username: Linux.do 用户名
             password: Linux.do 密码
+            deadline: 账号截止时间（可选），限制页面导航和各步骤的等待时间
         """
         self.account_name = account_name
         self.provider_config = provider_config
         self.username = username
         self.password = password
+        self.deadline = deadline or Deadline()
 
     async def signin(
         self,
@@ -57,6 +63,39 @@ class LinuxDoSignIn:
             f"ℹ️ {self.account_name}: Using client_id: {client_id}, auth_state: {auth_state}, cache_file: {cache_file_path}"
         )
 
+        request = LinuxDoOAuthRequest(
+            account_name=self.account_name,
+            provider_config=self.provider_config,
+            client_id=client_id,
+            auth_state=auth_state,
+            auth_cookies=auth_cookies,
+        )
+        results = await self.signin_batch([request], cache_file_path)
+        return results[0]
+
+    async def signin_batch(
+        self,
+        requests: list["LinuxDoOAuthRequest"],
+        cache_file_path: str = "",
+    ) -> list[tuple[bool, dict]]:
+        """登录一次 Linux.do，然后在同一浏览器上下文中依次完成多个 provider 的 OAuth 授权
+
+        Args:
+            requests: 各 provider 的授权请求
+            cache_file_path: 缓存文件
+
+        Returns:
+            与 requests 顺序一致的 [(成功标志, 用户信息字典)]
+        """
+        if not requests:
+            return []
+
+        if len(requests) > 1:
+            print(
+                f"ℹ️ {self.account_name}: Executing batched Linux.do sign-in for {len(requests)} provider(s): "
+                f"{', '.join(request.account_name for request in requests)}"
+            )
+
         # 使用 Camoufox 启动浏览器
         async with AsyncCamoufox(
             # persistent_context=True,
@@ -65,16 +104,20 @@ class LinuxDoSignIn:
             humanize=True,
             locale="en-US",
         ) as browser:
-            # 只有在缓存文件存在时才加载 storage_state
-            storage_state = cache_file_path if os.path.exists(cache_file_path) else None
+            # 只有在缓存文件存在且会话未过期（启动前的 HTTP 检查结果）时才加载 storage_state
+            verdict = get_storage_state_verdict(cache_file_path)
+            storage_state = cache_file_path if verdict != STATE_EXPIRED else None
             if storage_state:
-                print(f"ℹ️ {self.account_name}: Found cache file, restore storage state")
+                print(f"ℹ️ {self.account_name}: Found cache file ({verdict} session), restore storage state")
+            elif os.path.exists(cache_file_path):
+                print(f"ℹ️ {self.account_name}: Cached session expired, starting fresh")
             else:
                 print(f"ℹ️ {self.account_name}: No cache file found, starting fresh")
 
             context = await browser.new_context(storage_state=storage_state)
 
-            # 设置从参数获取的 auth cookies 到页面上下文
+            # 设置从参数获取的 auth cookies 到页面上下文（各 provider 的 cookies 域名不同，可以同时设置）
+            auth_cookies = [cookie for request in requests for cookie in request.auth_cookies]
             if auth_cookies:
                 await context.add_cookies(auth_cookies)
                 print(f"ℹ️ {self.account_name}: Set {len(auth_cookies)} auth cookies from provider")
@@ -84,161 +127,220 @@ class LinuxDoSignIn:
             page = await context.new_page()
 
             try:
-                # 检查是否已经登录（通过缓存恢复）
-                is_logged_in = False
-                oauth_url = (
-                    f"https://connect.linux.do/oauth2/authorize?"
-                    f"response_type=code&client_id={client_id}&state={auth_state}"
-                )
-
-                if os.path.exists(cache_file_path):
-                    try:
-                        print(f"ℹ️ {self.account_name}: Checking login status at {oauth_url}")
-                        # 直接访问授权页面检查是否已登录
-                        response = await page.goto(oauth_url, wait_until="domcontentloaded")
-                        print(f"ℹ️ {self.account_name}: redirected to app page {response.url if response else 'N/A'}")
-                        await save_page_content_to_file(page, "sign_in_check", self.account_name, prefix="linuxdo")
-
-                        # 登录后可能直接跳转回应用页面
-                        if response and response.url.startswith(self.provider_config.origin):
-                            is_logged_in = True
-                            print(f"✅ {self.account_name}: Already logged in via cache, proceeding to authorization")
-                        else:
-                            # 检查是否出现授权按钮（表示已登录）
-                            allow_btn = await page.query_selector('a[href^="/oauth2/approve"]')
-                            if allow_btn:
-                                is_logged_in = True
-                                print(
-                                    f"✅ {self.account_name}: Already logged in via cache, proceeding to authorization"
-                                )
-                            else:
-                                print(f"ℹ️ {self.account_name}: Cache session expired, need to login again")
-                    except Exception as e:
-                        print(f"⚠️ {self.account_name}: Failed to check login status: {e}")
-
-                # 如果未登录，则执行登录流程
+                # 检查是否已经登录（通过缓存恢复），并在需要时执行登录
+                first_request = requests[0]
+                is_logged_in = await self._check_login_status(page, first_request, verdict)
                 if not is_logged_in:
-                    try:
-                        print(f"ℹ️ {self.account_name}: Starting to sign in linux.do")
-
-                        await page.goto("https://linux.do/login", wait_until="domcontentloaded")
-                        await page.fill("#login-account-name", self.username)
-                        await page.wait_for_timeout(2000)
-                        await page.fill("#login-account-password", self.password)
-                        await page.wait_for_timeout(2000)
-                        await page.click("#login-button")
-                        await page.wait_for_timeout(10000)
-
-                        await save_page_content_to_file(page, "sign_in_result", self.account_name, prefix="linuxdo")
-
+                    login_error = await self._login(page, context, cache_file_path)
+                    if login_error:
+                        return [(False, login_error) for _ in requests]
+
+                # 依次完成每个 provider 的授权，首个请求在缓存登录时已经位于授权页面
+                results = []
+                for i, request in enumerate(requests):
+                    if i > 0 or not is_logged_in:
                         try:
-                            current_url = page.url
-                            print(f"ℹ️ {self.account_name}: Current page url is {current_url}")
-                            if "linux.do/challenge" in current_url:
-                                print(
-                                    f"⚠️ {self.account_name}: Cloudflare challenge detected, "
-                                    "Camoufox should bypass it automatically. Waiting..."
-                                )
-                                # 等待 Cloudflare 验证完成
-                                await page.wait_for_selector('a[href^="/oauth2/approve"]', timeout=60000)
-                                print(f"✅ {self.account_name}: Cloudflare challenge bypassed successfully")
-
+                            print(f"ℹ️ {request.account_name}: Navigating to authorization page: {request.oauth_url}")
+                            await page.goto(
+                                request.oauth_url, wait_until="domcontentloaded", timeout=self.deadline.clip_ms(30000)
+                            )
                         except Exception as e:
-                            print(f"⚠️ {self.account_name}: Possible Cloudflare challenge: {e}")
-                            # 即使超时，也尝试继续
-                            pass
+                            print(f"❌ {request.account_name}: Failed to navigate to authorization page: {e}")
+                            await take_screenshot(page, "auth_page_navigation_failed_bypass", request.account_name)
+                            results.append((False, {"error": "Linux.do authorization page navigation failed"}))
+                            continue
 
-                        # 保存新的会话状态
-                        await context.storage_state(path=cache_file_path)
-                        print(f"✅ {self.account_name}: Storage state saved to cache file")
+                    results.append(await self._authorize(page, context, request))
 
-                    except Exception as e:
-                        print(f"❌ {self.account_name}: Error occurred while signing in linux.do: {e}")
-                        await take_screenshot(page, "signin_bypass_error", self.account_name)
-                        return False, {"error": "Linux.do sign-in error"}
+                return results
 
-                    # 登录后访问授权页面
-                    try:
-                        print(f"ℹ️ {self.account_name}: Navigating to authorization page: {oauth_url}")
-                        await page.goto(oauth_url, wait_until="domcontentloaded")
-                    except Exception as e:
-                        print(f"❌ {self.account_name}: Failed to navigate to authorization page: {e}")
-                        await take_screenshot(page, "auth_page_navigation_failed_bypass", self.account_name)
-                        return False, {"error": "Linux.do authorization page navigation failed"}
-
-                # 统一处理授权逻辑（无论是否通过缓存登录）
-                try:
-                    # 等待授权按钮出现，最多等待30秒
-                    print(f"ℹ️ {self.account_name}: Waiting for authorization button...")
-                    await page.wait_for_selector('a[href^="/oauth2/approve"]', timeout=30000)
-                    allow_btn_ele = await page.query_selector('a[href^="/oauth2/approve"]')
-
-                    if allow_btn_ele:
-                        print(f"ℹ️ {self.account_name}: Clicking authorization button...")
-                        await allow_btn_ele.click()
-                        await page.wait_for_url(f"**{self.provider_config.origin}/oauth/**", timeout=30000)
-
-                        # 从 localStorage 获取 user 对象并提取 id
-                        api_user = None
-                        try:
-                            try:
-                                await page.wait_for_function('localStorage.getItem("user") !== null', timeout=10000)
-                            except Exception:
-                                await page.wait_for_timeout(5000)
-
-                            user_data = await page.evaluate("() => localStorage.getItem('user')")
-                            if user_data:
-                                user_obj = json.loads(user_data)
-                                api_user = user_obj.get("id")
-                                if api_user:
-                                    print(f"✅ {self.account_name}: Got api user: {api_user}")
-                                else:
-                                    print(f"⚠️ {self.account_name}: User id not found in localStorage")
-                            else:
-                                print(f"⚠️ {self.account_name}: User data not found in localStorage")
-                        except Exception as e:
-                            print(f"⚠️ {self.account_name}: Error reading user from localStorage: {e}")
+            except Exception as e:
+                print(f"❌ {self.account_name}: Error occurred while processing linux.do page: {e}")
+                await take_screenshot(page, "page_navigation_error_bypass", self.account_name)
+                return [(False, {"error": "Linux.do page navigation error"}) for _ in requests]
+            finally:
+                await page.close()
+                await context.close()
 
-                        if api_user:
-                            print(f"✅ {self.account_name}: OAuth authorization successful")
+    async def _check_login_status(self, page, request: "LinuxDoOAuthRequest", verdict: str) -> bool:
+        """通过访问授权页面检查缓存的登录状态是否有效
 
-                            # 提取 session cookie，只保留与 provider domain 匹配的
-                            restore_cookies = await page.context.cookies()
-                            user_cookies = filter_cookies(restore_cookies, self.provider_config.origin)
+        Returns:
+            是否已登录
+        """
+        if verdict == STATE_EXPIRED:
+            return False
+
+        try:
+            print(f"ℹ️ {self.account_name}: Checking login status at {request.oauth_url}")
+            # 直接访问授权页面检查是否已登录
+            response = await page.goto(
+                request.oauth_url, wait_until="domcontentloaded", timeout=self.deadline.clip_ms(30000)
+            )
+            print(f"ℹ️ {self.account_name}: redirected to app page {response.url if response else 'N/A'}")
+            if verdict != STATE_VALID:
+                await save_page_content_to_file(page, "sign_in_check", self.account_name, prefix="linuxdo")
+
+            # 登录后可能直接跳转回应用页面
+            if response and response.url.startswith(request.provider_config.origin):
+                print(f"✅ {self.account_name}: Already logged in via cache, proceeding to authorization")
+                return True
+
+            # 启动前的 HTTP 检查已确认会话有效，无需再检查页面元素
+            if verdict == STATE_VALID:
+                print(f"✅ {self.account_name}: Session verified before launch, proceeding to authorization")
+                return True
+
+            # 检查是否出现授权按钮（表示已登录）
+            allow_btn = await page.query_selector('a[href^="/oauth2/approve"]')
+            if allow_btn:
+                print(f"✅ {self.account_name}: Already logged in via cache, proceeding to authorization")
+                return True
+
+            print(f"ℹ️ {self.account_name}: Cache session expired, need to login again")
+        except Exception as e:
+            print(f"⚠️ {self.account_name}: Failed to check login status: {e}")
+        return False
+
+    async def _login(self, page, context, cache_file_path: str) -> dict | None:
+        """登录 Linux.do 并保存会话状态
 
-                            return True, {"cookies": user_cookies, "api_user": api_user}
-                        else:
-                            print(f"⚠️ {self.account_name}: OAuth callback received but no user ID found")
-                            await take_screenshot(page, "oauth_failed_no_user_id_bypass", self.account_name)
-                            parsed_url = urlparse(page.url)
-                            query_params = parse_qs(parsed_url.query)
-
-                            # 如果 query 中包含 code，说明 OAuth 回调成功
-                            if "code" in query_params:
-                                print(f"✅ {self.account_name}: OAuth code received: {query_params.get('code')}")
-                                return True, query_params
-                            else:
-                                print(f"❌ {self.account_name}: OAuth failed, no code in callback")
-                                return False, {
-                                    "error": "Linux.do OAuth failed - no code in callback",
-                                }
-                    else:
-                        print(f"❌ {self.account_name}: Approve button not found")
-                        await take_screenshot(page, "approve_button_not_found_bypass", self.account_name)
-                        return False, {"error": "Linux.do allow button not found"}
+        Returns:
+            登录失败时返回错误信息字典，成功返回 None
+        """
+        try:
+            print(f"ℹ️ {self.account_name}: Starting to sign in linux.do")
 
-                except Exception as e:
+            await page.goto(
+                "https://linux.do/login", wait_until="domcontentloaded", timeout=self.deadline.clip_ms(30000)
+            )
+            await page.fill("#login-account-name", self.username)
+            await page.wait_for_timeout(self.deadline.clip_ms(2000))
+            await page.fill("#login-account-password", self.password)
+            await page.wait_for_timeout(self.deadline.clip_ms(2000))
+            await page.click("#login-button")
+            await page.wait_for_timeout(self.deadline.clip_ms(10000))
+
+            await save_page_content_to_file(page, "sign_in_result", self.account_name, prefix="linuxdo")
+
+            try:
+                current_url = page.url
+                print(f"ℹ️ {self.account_name}: Current page url is {current_url}")
+                if "linux.do/challenge" in current_url:
                     print(
-                        f"❌ {self.account_name}: Error occurred during authorization: {e}\n\n"
-                        f"Current page is: {page.url}"
+                        f"⚠️ {self.account_name}: Cloudflare challenge detected, "
+                        "Camoufox should bypass it automatically. Waiting..."
                     )
-                    await take_screenshot(page, "authorization_failed_bypass", self.account_name)
-                    return False, {"error": "Linux.do authorization failed"}
+                    # 等待 Cloudflare 验证完成
+                    await page.wait_for_selector('a[href^="/oauth2/approve"]', timeout=self.deadline.clip_ms(60000))
+                    print(f"✅ {self.account_name}: Cloudflare challenge bypassed successfully")
 
             except Exception as e:
-                print(f"❌ {self.account_name}: Error occurred while processing linux.do page: {e}")
-                await take_screenshot(page, "page_navigation_error_bypass", self.account_name)
-                return False, {"error": "Linux.do page navigation error"}
-            finally:
-                await page.close()
-                await context.close()
+                print(f"⚠️ {self.account_name}: Possible Cloudflare challenge: {e}")
+                # 即使超时，也尝试继续
+                pass
+
+            # 保存新的会话状态
+            await context.storage_state(path=cache_file_path)
+            print(f"✅ {self.account_name}: Storage state saved to cache file")
+            mark_storage_state(cache_file_path, STATE_VALID)
+            return None
+
+        except Exception as e:
+            print(f"❌ {self.account_name}: Error occurred while signing in linux.do: {e}")
+            await take_screenshot(page, "signin_bypass_error", self.account_name)
+            return {"error": "Linux.do sign-in error"}
+
+    async def _authorize(self, page, context, request: "LinuxDoOAuthRequest") -> tuple[bool, dict]:
+        """在当前授权页面点击授权，并从 provider 回调页面提取 cookies 和 api_user
+
+        Returns:
+            (成功标志, 用户信息字典)
+        """
+        account_name = request.account_name
+        origin = request.provider_config.origin
+        try:
+            # 等待授权按钮出现，最多等待30秒
+            print(f"ℹ️ {account_name}: Waiting for authorization button...")
+            await page.wait_for_selector('a[href^="/oauth2/approve"]', timeout=self.deadline.clip_ms(30000))
+            allow_btn_ele = await page.query_selector('a[href^="/oauth2/approve"]')
+
+            if allow_btn_ele:
+                print(f"ℹ️ {account_name}: Clicking authorization button...")
+                await allow_btn_ele.click()
+                await page.wait_for_url(f"**{origin}/oauth/**", timeout=self.deadline.clip_ms(30000))
+
+                # 从 localStorage 获取 user 对象并提取 id
+                api_user = None
+                try:
+                    try:
+                        await page.wait_for_function(
+                            'localStorage.getItem("user") !== null', timeout=self.deadline.clip_ms(10000)
+                        )
+                    except Exception:
+                        await page.wait_for_timeout(self.deadline.clip_ms(5000))
+
+                    user_data = await page.evaluate("() => localStorage.getItem('user')")
+                    if user_data:
+                        user_obj = json.loads(user_data)
+                        api_user = user_obj.get("id")
+                        if api_user:
+                            print(f"✅ {account_name}: Got api user: {api_user}")
+                        else:
+                            print(f"⚠️ {account_name}: User id not found in localStorage")
+                    else:
+                        print(f"⚠️ {account_name}: User data not found in localStorage")
+                except Exception as e:
+                    print(f"⚠️ {account_name}: Error reading user from localStorage: {e}")
+
+                if api_user:
+                    print(f"✅ {account_name}: OAuth authorization successful")
+
+                    # 提取 session cookie，只保留与 provider domain 匹配的
+                    restore_cookies = await context.cookies()
+                    user_cookies = filter_cookies(restore_cookies, origin)
+
+                    return True, {"cookies": user_cookies, "api_user": api_user}
+                else:
+                    print(f"⚠️ {account_name}: OAuth callback received but no user ID found")
+                    await take_screenshot(page, "oauth_failed_no_user_id_bypass", account_name)
+                    parsed_url = urlparse(page.url)
+                    query_params = parse_qs(parsed_url.query)
+
+                    # 如果 query 中包含 code，说明 OAuth 回调成功
+                    if "code" in query_params:
+                        print(f"✅ {account_name}: OAuth code received: {query_params.get('code')}")
+                        return True, query_params
+                    else:
+                        print(f"❌ {account_name}: OAuth failed, no code in callback")
+                        return False, {
+                            "error": "Linux.do OAuth failed - no code in callback",
+                        }
+            else:
+                print(f"❌ {account_name}: Approve button not found")
+                await take_screenshot(page, "approve_button_not_found_bypass", account_name)
+                return False, {"error": "Linux.do allow button not found"}
+
+        except Exception as e:
+            print(f"❌ {account_name}: Error occurred during authorization: {e}\n\n" f"Current page is: {page.url}")
+            await take_screenshot(page, "authorization_failed_bypass", account_name)
+            return False, {"error": "Linux.do authorization failed"}
+
+
+@dataclass
+class LinuxDoOAuthRequest:
+    """单个 provider 的 Linux.do OAuth 授权请求"""
+
+    account_name: str
+    provider_config: ProviderConfig
+    client_id: str
+    auth_state: str
+    auth_cookies: list = field(default_factory=list)
+
+    @property
+    def oauth_url(self) -> str:
+        """Linux.do 授权页面 URL"""
+        return (
+            f"https://connect.linux.do/oauth2/authorize?"
+            f"response_type=code&client_id={self.client_id}&state={self.auth_state}"
+        )
@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.config import AccountConfig, ProviderConfig
+from utils.worker_pool import AccountJob
+
+
+@pytest.fixture
+def make_job():
+	"""账号任务工厂: make_job(index, provider, name=..., provider_config=..., **账号配置)"""
+
+	def factory(index=0, provider='wong', name=None, provider_config=None, **account_config):
+		provider_config = provider_config or ProviderConfig(name=provider, origin=f'https://{provider}.example.com')
+		return AccountJob(
+			index=index,
+			account_name=name or f'Account {index + 1}',
+			account_config=AccountConfig(provider=provider_config.name, **account_config),
+			provider_config=provider_config,
+		)
+
+	return factory
@@ -0,0 +1,49 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.cdk_ledger import CDK_REDEEMED, MAX_CDK_ATTEMPTS, CdkLedger
+
+
+def test_leftover_codes_are_pending_after_reload(tmp_path):
+	ledger = CdkLedger('x666', 'Account 1', str(tmp_path))
+	ledger.record_fetched(['a', 'b', 'c'])
+	ledger.record_redeemed('a')
+	ledger.record_failed('b', 'rate limited')
+
+	reloaded = CdkLedger('x666', 'Account 1', str(tmp_path))
+
+	assert reloaded.get_pending() == ['b', 'c']
+	assert reloaded.is_redeemed('a')
+	assert not reloaded.is_redeemable('a')
+
+
+def test_fetched_again_keeps_status(tmp_path):
+	ledger = CdkLedger('x666', 'Account 1', str(tmp_path))
+	ledger.record_fetched(['a'])
+	ledger.record_redeemed('a', already_used=True)
+	ledger.record_fetched(['a'])
+
+	assert ledger.codes['a']['status'] == CDK_REDEEMED
+
+
+def test_failed_code_gives_up_after_max_attempts(tmp_path):
+	ledger = CdkLedger('x666', 'Account 1', str(tmp_path))
+	for _ in range(MAX_CDK_ATTEMPTS):
+		ledger.record_failed('a', 'invalid')
+
+	assert ledger.get_pending() == []
+
+
+def test_old_redeemed_codes_are_pruned():
+	old = (datetime.now(timezone.utc) - timedelta(days=60)).isoformat()
+	codes = {
+		'a': {'status': 'redeemed', 'attempts': 1, 'updated_at': old},
+		'b': {'status': 'fetched', 'attempts': 0, 'updated_at': old},
+	}
+
+	assert list(CdkLedger._prune(codes)) == ['b']
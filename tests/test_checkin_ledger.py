@@ -0,0 +1,53 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.checkin_ledger import CheckInLedger
+from utils.config import ProviderConfig
+
+
+@pytest.fixture
+def provider():
+	return ProviderConfig(name='test', origin='https://example.com', timezone='Asia/Shanghai')
+
+
+@pytest.fixture
+def ledger(tmp_path):
+	return CheckInLedger(str(tmp_path / 'ledger.json'))
+
+
+def test_not_done_without_record(ledger, provider):
+	assert not ledger.is_done_today('acc', provider, 'cookies')
+
+
+def test_done_within_same_provider_day(ledger, provider):
+	# 北京时间 2026-01-01 09:00
+	checked_in = datetime(2026, 1, 1, 1, 0, tzinfo=timezone.utc)
+	ledger.record_success('acc', 'test', 'cookies', {'display': 'ok'}, now=checked_in)
+
+	# 北京时间 2026-01-01 23:00，仍是同一签到日
+	assert ledger.is_done_today('acc', provider, 'cookies', now=checked_in + timedelta(hours=14))
+	# 北京时间 2026-01-02 01:00，进入新的签到日
+	assert not ledger.is_done_today('acc', provider, 'cookies', now=checked_in + timedelta(hours=16))
+
+
+def test_methods_are_tracked_separately(ledger, provider):
+	ledger.record_success('acc', 'test', 'github', {'display': 'ok'})
+
+	assert ledger.is_done_today('acc', provider, 'github')
+	assert not ledger.is_done_today('acc', provider, 'linux.do')
+
+
+def test_save_and_reload(ledger, provider):
+	ledger.record_success('acc', 'test', 'cookies', {'display': 'ok', 'quota': 1.5})
+	ledger.save()
+
+	reloaded = CheckInLedger(ledger.ledger_file)
+	assert reloaded.is_done_today('acc', provider, 'cookies')
+	assert reloaded.get_user_info('acc', 'test', 'cookies')['quota'] == 1.5
@@ -0,0 +1,143 @@
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.circuit_breaker import CircuitBreaker, CircuitBreakerTransport, create_http_client, get_origin
+
+ORIGIN = 'https://anyrouter.top'
+
+
+def test_opens_after_consecutive_failures():
+	breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=60)
+	breaker.record_failure(ORIGIN, now=0)
+	breaker.record_failure(ORIGIN, now=1)
+	breaker.record_success(ORIGIN)
+	breaker.record_failure(ORIGIN, now=2)
+	breaker.record_failure(ORIGIN, now=3)
+	assert breaker.allow_request(ORIGIN, now=4)
+
+	breaker.record_failure(ORIGIN, now=5)
+	assert breaker.is_open(ORIGIN, now=6)
+	assert not breaker.allow_request(ORIGIN, now=6)
+	assert breaker.allow_request('https://wong.example.com', now=6)
+
+
+def test_half_open_allows_single_probe():
+	breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=60)
+	breaker.record_failure(ORIGIN, now=0)
+
+	assert not breaker.is_open(ORIGIN, now=61)
+	assert breaker.allow_request(ORIGIN, now=61)
+	assert not breaker.allow_request(ORIGIN, now=62)
+
+	# 探测失败后重新熔断
+	breaker.record_failure(ORIGIN, now=63)
+	assert not breaker.allow_request(ORIGIN, now=100)
+
+	assert breaker.allow_request(ORIGIN, now=130)
+	breaker.record_success(ORIGIN)
+	assert breaker.allow_request(ORIGIN, now=131)
+	assert not breaker.is_open(ORIGIN, now=131)
+
+
+def test_get_origin():
+	assert get_origin('https://anyrouter.top/api/user/self') == ORIGIN
+	assert get_origin('http://127.0.0.1:8080/api/status') == 'http://127.0.0.1:8080'
+
+
+def test_open_circuits_merge_keeps_opened_time():
+	worker = CircuitBreaker(failure_threshold=1, cooldown_seconds=60)
+	worker.record_failure(ORIGIN, now=100)
+	worker.trip('https://wong.example.com', now=40)
+
+	# 只导出指定时间之后熔断的 origin
+	assert worker.get_open_circuits(since=50, now=110) == {ORIGIN: 10}
+
+	main = CircuitBreaker(failure_threshold=1, cooldown_seconds=60)
+	main.merge_open_circuits(worker.get_open_circuits(since=50, now=110), now=1000)
+	assert main.is_open(ORIGIN, now=1049)
+	# 冷却时间从工作进程中的熔断时间开始计算
+	assert not main.is_open(ORIGIN, now=1051)
+	assert main.allow_request(ORIGIN, now=1051)
+	assert not main.is_open('https://wong.example.com', now=1000)
+
+
+def test_merge_does_not_reset_newer_circuit():
+	breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=60)
+	breaker.record_failure(ORIGIN, now=100)
+
+	# 更早的熔断状态不会推迟本地的冷却时间
+	breaker.merge_open_circuits({ORIGIN: 50}, now=110)
+	assert not breaker.is_open(ORIGIN, now=161)
+
+
+def _failing_transport(monkeypatch, breaker, error, proxy=None):
+	def handle_request(self, request):
+		raise error
+
+	monkeypatch.setattr(httpx.HTTPTransport, 'handle_request', handle_request)
+	return CircuitBreakerTransport(breaker, proxy=proxy)
+
+
+def test_proxy_connect_errors_do_not_trip_origin(monkeypatch):
+	breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=60)
+	transport = _failing_transport(monkeypatch, breaker, httpx.ConnectError('proxy down'), 'http://127.0.0.1:9')
+
+	with pytest.raises(httpx.ConnectError):
+		transport.handle_request(httpx.Request('GET', f'{ORIGIN}/api/user/self'))
+	assert not breaker.is_open(ORIGIN)
+
+	direct = CircuitBreakerTransport(breaker)
+	with pytest.raises(httpx.ConnectError):
+		direct.handle_request(httpx.Request('GET', f'{ORIGIN}/api/user/self'))
+	assert breaker.is_open(ORIGIN)
+
+
+def test_proxy_error_releases_half_open_probe(monkeypatch):
+	breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=60)
+	breaker.record_failure(ORIGIN, now=time.monotonic() - 61)
+	transport = _failing_transport(monkeypatch, breaker, httpx.ProxyError('bad gateway'), 'http://127.0.0.1:9')
+
+	with pytest.raises(httpx.ProxyError):
+		transport.handle_request(httpx.Request('GET', f'{ORIGIN}/api/user/self'))
+
+	# 代理故障不影响熔断状态，下一个请求重新探测
+	assert breaker.allow_request(ORIGIN)
+
+
+def _set_proxy_env(monkeypatch, **env):
+	for name in ('HTTP_PROXY', 'HTTPS_PROXY', 'ALL_PROXY', 'NO_PROXY'):
+		monkeypatch.delenv(name, raising=False)
+		monkeypatch.delenv(name.lower(), raising=False)
+	for name, value in env.items():
+		monkeypatch.setenv(name, value)
+
+
+def test_client_uses_environment_proxy(monkeypatch):
+	_set_proxy_env(monkeypatch, HTTPS_PROXY='http://127.0.0.1:8080', NO_PROXY='wong.example.com')
+
+	with create_http_client() as client:
+		proxied = client._transport_for_url(httpx.URL(f'{ORIGIN}/api/user/self'))
+		assert isinstance(proxied, CircuitBreakerTransport)
+		assert proxied.proxied
+
+		# NO_PROXY 和未配置代理的协议直连
+		direct = client._transport_for_url(httpx.URL('https://wong.example.com/api/user/self'))
+		assert direct is client._transport
+		assert not direct.proxied
+		assert client._transport_for_url(httpx.URL('http://127.0.0.1:3000/api/status')) is client._transport
+
+
+def test_explicit_proxy_overrides_environment(monkeypatch):
+	_set_proxy_env(monkeypatch, HTTPS_PROXY='http://127.0.0.1:8080')
+
+	with create_http_client(httpx.URL('http://127.0.0.1:9090')) as client:
+		assert client._transport_for_url(httpx.URL(f'{ORIGIN}/api/user/self')) is client._transport
+		assert client._transport.proxied
@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.cookie_store import CookieStore, get_cookie_store_secret
+
+
+def test_cookies_round_trip_encrypted(tmp_path):
+	store_file = tmp_path / 'provider_cookies.enc'
+	store = CookieStore(str(store_file), secret='secret')
+	store.set('Account 1', 'wong', {'session': 'refreshed', 'acw_tc': 'waf'}, {'session': 'configured'}, 2000.0)
+	store.save()
+
+	assert b'refreshed' not in store_file.read_bytes()
+
+	reloaded = CookieStore(str(store_file), secret='secret')
+	assert reloaded.get('Account 1', 'wong', {'session': 'configured'}, now=1000.0) == {'session': 'refreshed'}
+	assert CookieStore(str(store_file), secret='other').get('Account 1', 'wong', {'session': 'configured'}) is None
+
+
+def test_expired_or_reconfigured_cookies_are_ignored(tmp_path):
+	store = CookieStore(str(tmp_path / 'provider_cookies.enc'), secret='secret')
+	store.set('Account 1', 'wong', {'session': 'refreshed'}, {'session': 'configured'}, 2000.0)
+
+	assert store.get('Account 1', 'wong', {'session': 'configured'}, now=3000.0) is None
+
+	store.set('Account 1', 'wong', {'session': 'refreshed'}, {'session': 'configured'})
+	assert store.get('Account 1', 'wong', {'session': 'pasted-again'}) is None
+
+
+def test_disabled_without_secret(tmp_path):
+	store = CookieStore(str(tmp_path / 'provider_cookies.enc'))
+	store.set('Account 1', 'wong', {'session': 'refreshed'}, {'session': 'configured'})
+	store.save()
+
+	assert not store.enabled
+	assert not (tmp_path / 'provider_cookies.enc').exists()
+
+
+def test_secret_requires_dedicated_key(monkeypatch):
+	monkeypatch.delenv('COOKIE_STORE_KEY', raising=False)
+	monkeypatch.setenv('ACCOUNTS', '[{"cookies": "session=abc"}]')
+
+	assert get_cookie_store_secret() is None
+
+	monkeypatch.setenv('COOKIE_STORE_KEY', 'secret')
+	assert get_cookie_store_secret() == 'secret'
@@ -0,0 +1,77 @@
+import asyncio
+import math
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.deadline import Deadline, DeadlineExceededError, get_account_deadline_seconds
+
+
+def test_remaining_and_expired():
+	deadline = Deadline(60, now=100)
+	assert deadline.remaining(now=130) == 30
+	assert not deadline.expired(now=130)
+	assert deadline.remaining(now=200) == 0
+	assert deadline.expired(now=160)
+
+
+def test_unlimited_deadline():
+	deadline = Deadline()
+	assert deadline.remaining() == math.inf
+	assert deadline.clip(30) == 30
+	assert deadline.clip_ms(5000) == 5000
+
+
+def test_clip_to_remaining_time():
+	deadline = Deadline(10)
+	assert deadline.clip(30) <= 10
+	assert deadline.clip(5) == 5
+	assert deadline.clip_ms(60000) <= 10000
+
+	expired = Deadline(0)
+	assert expired.clip(30) == 0
+	# Playwright 中 0 表示不限制，至少保留 1 毫秒
+	assert expired.clip_ms(30000) == 1
+	with pytest.raises(DeadlineExceededError):
+		expired.check()
+
+
+def test_run_cancels_slow_coroutine():
+	cancelled = []
+
+	async def slow():
+		try:
+			await asyncio.sleep(10)
+		except asyncio.CancelledError:
+			cancelled.append(True)
+			raise
+
+	async def main():
+		return await Deadline(0.05).run(slow())
+
+	with pytest.raises(DeadlineExceededError):
+		asyncio.run(main())
+	assert cancelled
+
+
+def test_run_returns_result_within_deadline():
+	async def fast():
+		return 'ok'
+
+	assert asyncio.run(Deadline(5).run(fast())) == 'ok'
+
+
+def test_deadline_seconds_from_env(monkeypatch):
+	monkeypatch.delenv('ACCOUNT_DEADLINE', raising=False)
+	assert get_account_deadline_seconds() == 600
+	monkeypatch.setenv('ACCOUNT_DEADLINE', '120')
+	assert get_account_deadline_seconds() == 120
+	monkeypatch.setenv('ACCOUNT_DEADLINE', '0')
+	assert get_account_deadline_seconds() is None
+	monkeypatch.setenv('ACCOUNT_DEADLINE', 'abc')
+	assert get_account_deadline_seconds() == 600
@@ -0,0 +1,150 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils import geoip_cache as geoip_cache_module
+from utils.geoip_cache import GeoipCache, get_camoufox_geoip, get_geoip_cache_ttl, get_proxy_key, launch_camoufox
+from utils.proxy_pool import ProxyPool
+
+
+def make_resolver(ips):
+	calls = []
+
+	def resolver(proxy_config):
+		calls.append(proxy_config['server'])
+		return ips[proxy_config['server']]
+
+	return resolver, calls
+
+
+def test_resolve_caches_per_proxy():
+	resolver, calls = make_resolver({'http://a:1': '1.1.1.1', 'http://b:2': '2.2.2.2'})
+	cache = GeoipCache(resolver)
+
+	assert cache.resolve({'server': 'http://a:1'}, 60) == '1.1.1.1'
+	assert cache.resolve({'server': 'http://a:1'}, 60) == '1.1.1.1'
+	assert cache.resolve({'server': 'http://b:2'}, 60) == '2.2.2.2'
+	assert calls == ['http://a:1', 'http://b:2']
+
+
+def test_proxy_key_includes_credentials():
+	# 同一代理服务器的不同认证信息可能对应不同的出口 IP
+	first = get_proxy_key({'server': 'http://a:1', 'username': 'u1', 'password': 'p'})
+	second = get_proxy_key({'server': 'http://a:1', 'username': 'u2', 'password': 'p'})
+	assert first != second
+	assert get_proxy_key({'server': 'http://a:1'}) != first
+
+
+def test_entries_expire():
+	cache = GeoipCache()
+	cache.set('http://a:1', '1.1.1.1', 60, now=100.0)
+
+	assert cache.get('http://a:1', now=159.0) == '1.1.1.1'
+	assert cache.get('http://a:1', now=160.0) is None
+	# 过期后删除
+	assert cache.get('http://a:1', now=100.0) is None
+
+
+def test_resolve_failure_is_not_cached():
+	attempts = []
+
+	def resolver(proxy_config):
+		attempts.append(proxy_config['server'])
+		if len(attempts) == 1:
+			raise RuntimeError('timeout')
+		return '1.1.1.1'
+
+	cache = GeoipCache(resolver)
+	assert cache.resolve({'server': 'http://a:1'}, 60) is None
+	assert cache.resolve({'server': 'http://a:1'}, 60) == '1.1.1.1'
+	assert len(attempts) == 2
+
+
+def test_concurrent_resolve_queries_once():
+	calls = []
+	started = threading.Event()
+
+	def resolver(proxy_config):
+		calls.append(proxy_config['server'])
+		started.wait(0.2)
+		return '1.1.1.1'
+
+	cache = GeoipCache(resolver)
+	results = []
+	threads = [
+		threading.Thread(target=lambda: results.append(cache.resolve({'server': 'http://a:1'}, 60))) for _ in range(4)
+	]
+	for thread in threads:
+		thread.start()
+	started.set()
+	for thread in threads:
+		thread.join()
+
+	assert results == ['1.1.1.1'] * 4
+	assert calls == ['http://a:1']
+
+
+def test_get_camoufox_geoip(monkeypatch):
+	resolver, calls = make_resolver({'http://a:1': '1.1.1.1'})
+	monkeypatch.setattr(geoip_cache_module, 'geoip_cache', GeoipCache(resolver))
+	monkeypatch.delenv('GEOIP_CACHE_TTL', raising=False)
+
+	assert asyncio.run(get_camoufox_geoip(None)) is False
+	assert asyncio.run(get_camoufox_geoip({'server': 'http://a:1'})) == '1.1.1.1'
+	assert asyncio.run(get_camoufox_geoip({'server': 'http://a:1'})) == '1.1.1.1'
+	assert calls == ['http://a:1']
+
+	# 缓存关闭时由 Camoufox 自行查询
+	monkeypatch.setenv('GEOIP_CACHE_TTL', '0')
+	assert asyncio.run(get_camoufox_geoip({'server': 'http://a:1'})) is True
+
+
+def test_get_geoip_cache_ttl(monkeypatch):
+	monkeypatch.setenv('GEOIP_CACHE_TTL', '120')
+	assert get_geoip_cache_ttl() == 120
+	monkeypatch.setenv('GEOIP_CACHE_TTL', 'abc')
+	assert get_geoip_cache_ttl() == 3600
+
+
+def test_failed_launch_invalidates_cached_ip(monkeypatch):
+	cache = GeoipCache(make_resolver({'http://a:1': '1.1.1.1'})[0])
+	monkeypatch.setattr(geoip_cache_module, 'geoip_cache', cache)
+	monkeypatch.delenv('GEOIP_CACHE_TTL', raising=False)
+
+	class FailingCamoufox:
+		def __init__(self, **kwargs):
+			pass
+
+		async def __aenter__(self):
+			raise RuntimeError('proxy refused')
+
+		async def __aexit__(self, *args):
+			return None
+
+	monkeypatch.setattr('camoufox.async_api.AsyncCamoufox', FailingCamoufox)
+
+	async def launch():
+		async with launch_camoufox({'server': 'http://a:1'}, headless=True):
+			pass
+
+	with pytest.raises(RuntimeError):
+		asyncio.run(launch())
+	assert cache.get(get_proxy_key({'server': 'http://a:1'})) is None
+
+
+def test_mark_unhealthy_invalidates_cached_ip(monkeypatch):
+	cache = GeoipCache()
+	monkeypatch.setattr(geoip_cache_module, 'geoip_cache', cache)
+	proxy_config = {'server': 'http://a:1', 'username': 'u', 'password': 'p'}
+	cache.set(get_proxy_key(proxy_config), '1.1.1.1', 60)
+
+	ProxyPool([proxy_config]).mark_unhealthy('http://a:1', 'ConnectError')
+
+	assert cache.get(get_proxy_key(proxy_config)) is None
@@ -0,0 +1,84 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.health_probe import (
+	DECISION_DEFER,
+	DECISION_PROCESS,
+	DECISION_SKIP,
+	MAX_REQUEST_TIMEOUT,
+	MIN_REQUEST_TIMEOUT,
+	evaluate_health,
+	merge_health,
+	preflight_probe,
+)
+
+
+def test_fast_origin_is_processed():
+	health = evaluate_health('https://anyrouter.top', 0.2, 200)
+
+	assert health.decision == DECISION_PROCESS
+	assert health.request_timeout == MIN_REQUEST_TIMEOUT
+	assert health.concurrency is None
+
+
+def test_challenge_page_is_still_reachable():
+	assert evaluate_health('https://anyrouter.top', 0.5, 403).decision == DECISION_PROCESS
+
+
+def test_slow_origin_is_deferred_with_longer_timeout():
+	health = evaluate_health('https://fuli.hxi.me', 4.0, 200)
+
+	assert health.decision == DECISION_DEFER
+	assert health.request_timeout == 40.0
+	assert health.concurrency
+
+	assert evaluate_health('https://fuli.hxi.me', 9.0, 200).request_timeout == MAX_REQUEST_TIMEOUT
+
+
+def test_unreachable_or_failing_origin_is_skipped():
+	assert evaluate_health('https://qd.x666.me', None, error='ConnectError').decision == DECISION_SKIP
+	assert evaluate_health('https://qd.x666.me', 0.3, 502).decision == DECISION_SKIP
+
+
+def test_origin_reachable_through_any_proxy_is_not_skipped():
+	merged = merge_health([
+		evaluate_health('https://anyrouter.top', None, error='ProxyError'),
+		evaluate_health('https://anyrouter.top', 2.0, 200),
+		evaluate_health('https://anyrouter.top', 0.2, 200),
+	])
+
+	assert merged.decision == DECISION_PROCESS
+	assert merged.request_timeout == 20.0
+
+
+def test_preflight_probes_through_each_account_proxy(monkeypatch):
+	probed = []
+
+	def probe_origin(origin, probe_url, proxy_config=None):
+		probed.append((origin, (proxy_config or {}).get('server')))
+		if proxy_config and proxy_config['server'] == 'http://dead:8080':
+			return evaluate_health(origin, None, error='ProxyError')
+		return evaluate_health(origin, 0.2, 200)
+
+	monkeypatch.setattr('utils.health_probe.probe_origin', probe_origin)
+	health = asyncio.run(
+		preflight_probe(
+			{'https://anyrouter.top': 'https://anyrouter.top/api/status', 'https://wong.example.com': 'https://wong.example.com/api/status'},
+			{'server': 'http://global:8080'},
+			origin_proxies={
+				'https://anyrouter.top': [{'server': 'http://dead:8080'}, {'server': 'http://pool:8080'}, {'server': 'http://pool:8080'}],
+			},
+		)
+	)
+
+	assert sorted(probed) == [
+		('https://anyrouter.top', 'http://dead:8080'),
+		('https://anyrouter.top', 'http://pool:8080'),
+		('https://wong.example.com', 'http://global:8080'),
+	]
+	assert health['https://anyrouter.top'].decision == DECISION_PROCESS
@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.identity_registry import IdentityRegistry
+
+
+def test_first_result_is_kept_for_aliases():
+	registry = IdentityRegistry()
+	assert registry.get_result('https://wong.example.com', 42) is None
+
+	registry.record_result('https://wong.example.com/', '42', 'Account 1', {'quota': 1})
+	registry.record_result('https://wong.example.com', 42, 'Account 2', {'quota': 2})
+
+	assert registry.get_result('https://wong.example.com', '42') == ('Account 1', {'quota': 1})
+	assert registry.get_result('https://x666.example.com', '42') is None
+
+
+def test_topup_claimed_once_per_identity():
+	registry = IdentityRegistry()
+
+	assert registry.claim_topup('https://wong.example.com', 42, 'Account 1') is None
+	assert registry.claim_topup('https://wong.example.com', '42', 'Account 2') == 'Account 1'
+	assert registry.claim_topup('https://wong.example.com', 7, 'Account 2') is None
+
+
+def test_own_topup_claim_is_not_treated_as_claimed():
+	registry = IdentityRegistry()
+
+	assert registry.claim_topup('https://wong.example.com', 42, 'Account 1') is None
+	# 同一账号重试（例如保存的 cookies 失败后用配置中的 cookies）仍然由自己执行充值
+	assert registry.claim_topup('https://wong.example.com', 42, 'Account 1') is None
+
+
+def test_failed_topup_releases_claim():
+	registry = IdentityRegistry()
+	registry.claim_topup('https://wong.example.com', 42, 'Account 1')
+
+	# 只有申请者自己可以释放
+	registry.release_topup('https://wong.example.com', 42, 'Account 2')
+	assert registry.claim_topup('https://wong.example.com', 42, 'Account 2') == 'Account 1'
+
+	registry.release_topup('https://wong.example.com', 42, 'Account 1')
+	assert registry.claim_topup('https://wong.example.com', 42, 'Account 2') is None
@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.job_history import JobHistory
+from utils.worker_pool import (
+	DEFAULT_BROWSER_JOB_SECONDS,
+	DEFAULT_HTTP_JOB_SECONDS,
+	estimate_job_duration,
+)
+
+
+@pytest.fixture
+def history(tmp_path):
+	return JobHistory(str(tmp_path / 'history.json'))
+
+
+def test_record_duration_smooths(history):
+	history.record_duration('acc', 'wong', 10)
+	history.record_duration('acc', 'wong', 30)
+
+	assert history.get_duration('acc', 'wong') == 20
+
+
+def test_estimate_uses_account_then_provider_history(history, make_job):
+	history.record_duration('a', 'wong', 40)
+	history.record_duration('b', 'wong', 20)
+
+	assert estimate_job_duration(make_job(name='a'), history) == 40
+	assert estimate_job_duration(make_job(name='new'), history) == 30
+
+
+def test_estimate_defaults_without_history(history, make_job):
+	assert estimate_job_duration(make_job(name='a'), history) == DEFAULT_HTTP_JOB_SECONDS
+	job = make_job(name='b', linux_do={'username': 'alice', 'password': 'x'})
+	assert estimate_job_duration(job, history) == DEFAULT_BROWSER_JOB_SECONDS
+
+
+def test_save_and_reload(history):
+	history.record_duration('acc', 'wong', 12.5)
+	history.save()
+
+	assert JobHistory(history.history_file).get_duration('acc', 'wong') == 12.5
+
+
+def test_rank_auth_methods_prefers_cheap_reliable_methods(history):
+	methods = ['linux.do', 'cookies', 'github']
+
+	assert history.rank_auth_methods('acc', 'wong', methods)[0] == 'cookies'
+
+	# cookies 频繁失败后，OAuth 方式排到前面
+	for _ in range(30):
+		history.record_method('acc', 'wong', 'cookies', False)
+		history.record_method('acc', 'wong', 'github', True)
+
+	assert history.rank_auth_methods('acc', 'wong', methods)[0] == 'github'
@@ -103,3 +103,22 @@ def test_push_message(mock_feishu, mock_pushplus, mock_wecom, mock_dingtalk, moc
 	assert mock_wecom.called
 	assert mock_pushplus.called
 	assert mock_feishu.called
+
+
+def test_batched_push_message(notification_kit):
+	with patch.object(NotificationKit, 'send_dingtalk') as mock_dingtalk:
+		notification_kit.start_batch()
+		notification_kit.push_message('签到', '签到内容')
+		notification_kit.push_message('阅读', '阅读内容')
+		assert not mock_dingtalk.called
+
+		notification_kit.flush_batch('汇总')
+		mock_dingtalk.assert_called_once()
+		title, content = mock_dingtalk.call_args.args
+		assert title == '汇总'
+		assert '【签到】\n签到内容' in content
+		assert '【阅读】\n阅读内容' in content
+
+		# 合并结束后恢复直接发送
+		notification_kit.push_message('单条', '内容')
+		assert mock_dingtalk.call_count == 2
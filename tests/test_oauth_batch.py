@@ -0,0 +1,155 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.config import AccountConfig, ProviderConfig
+from utils.deadline import Deadline
+from utils.oauth_batch import OAUTH_RESULT_MAX_AGE_SECONDS, _preauthorize, estimate_batch_seconds, preauthorize_linuxdo
+
+
+class FakeCheckIn:
+	def __init__(self, account_name, prepare_success=False):
+		self.account_name = account_name
+		self.account_config = SimpleNamespace(linux_do={'username': 'shared', 'password': 'secret'}, github=None)
+		self.provider_config = SimpleNamespace(name=account_name)
+		self.prepare_success = prepare_success
+		self.prepared = False
+		self.oauth_results = {}
+
+	def get_ledger_user_info(self, auth_method):
+		return None
+
+	async def get_waf_cookies(self):
+		self.prepared = True
+		return {}
+
+	async def prepare_linuxdo_oauth(self, waf_cookies):
+		if not self.prepare_success:
+			return {'success': False}
+		return {'success': True, 'client_id': 'client', 'state': self.account_name}
+
+	def get_linuxdo_cache_file_path(self, username):
+		return f'linuxdo_{username}.json'
+
+
+def test_batch_skipped_when_deadline_too_short():
+	checkins = [FakeCheckIn('Account 1'), FakeCheckIn('Account 2')]
+
+	asyncio.run(preauthorize_linuxdo(checkins, Deadline(estimate_batch_seconds(2) - 1)))
+
+	assert not any(checkin.prepared for checkin in checkins)
+
+
+def test_batch_prepared_when_deadline_allows():
+	checkins = [FakeCheckIn('Account 1'), FakeCheckIn('Account 2')]
+
+	asyncio.run(preauthorize_linuxdo(checkins, Deadline(estimate_batch_seconds(2) + 60)))
+
+	assert all(checkin.prepared for checkin in checkins)
+
+
+def make_checkin():
+	from checkin import CheckIn
+
+	return CheckIn(
+		'Account 1',
+		AccountConfig(provider='wong', linux_do={'username': 'shared', 'password': 'secret'}),
+		ProviderConfig(name='wong', origin='https://wong.example.com'),
+	)
+
+
+def test_failed_batched_linuxdo_result_falls_back_to_sign_in():
+	checkin = make_checkin()
+	checkin.oauth_results['linux.do'] = (
+		False,
+		{'error': 'Linux.do allow button not found'},
+		{'success': True},
+		time.monotonic(),
+	)
+	prepared = []
+
+	async def prepare_linuxdo_oauth(waf_cookies):
+		prepared.append(waf_cookies)
+		return {'success': False, 'error': 'stop here'}
+
+	checkin.prepare_linuxdo_oauth = prepare_linuxdo_oauth
+	success, result = asyncio.run(checkin.check_in_with_linuxdo('shared', 'secret', {}))
+
+	assert prepared == [{}]
+	assert not success
+	assert result['error'] == 'stop here'
+	assert 'linux.do' not in checkin.oauth_results
+
+
+class FakeRequest:
+	def __init__(self, account_name, **kwargs):
+		self.account_name = account_name
+
+
+class FakeSignIn:
+	def __init__(self, **kwargs):
+		pass
+
+	async def signin_batch(self, requests, cache_file_path):
+		return [
+			(True, {'cookies': {'session': 'ok'}, 'api_user': 1}),
+			(False, {'error': 'Linux.do allow button not found'}),
+		]
+
+
+def test_only_successful_batch_results_are_stored():
+	checkins = [FakeCheckIn('Account 1', prepare_success=True), FakeCheckIn('Account 2', prepare_success=True)]
+
+	asyncio.run(
+		_preauthorize(
+			{'shared': checkins},
+			auth_method='linux.do',
+			label='Linux.do',
+			sign_in_class=FakeSignIn,
+			request_class=FakeRequest,
+			deadline=Deadline(),
+		)
+	)
+
+	success, result_data, oauth_prep, _ = checkins[0].oauth_results['linux.do']
+	assert success and result_data['api_user'] == 1 and oauth_prep['state'] == 'Account 1'
+	assert 'linux.do' not in checkins[1].oauth_results
+
+
+def test_failed_batched_github_result_falls_back_to_sign_in():
+	checkin = make_checkin()
+	checkin.oauth_results['github'] = (
+		False,
+		{'error': 'GitHub page navigation error'},
+		{'success': True},
+		time.monotonic(),
+	)
+	prepared = []
+
+	async def prepare_github_oauth(waf_cookies):
+		prepared.append(waf_cookies)
+		return {'success': False, 'error': 'stop here'}
+
+	checkin.prepare_github_oauth = prepare_github_oauth
+	success, result = asyncio.run(checkin.check_in_with_github('shared', 'secret', {}))
+
+	assert prepared == [{}]
+	assert result['error'] == 'stop here'
+
+
+def test_expired_batched_result_falls_back_to_sign_in():
+	checkin = make_checkin()
+	authorized_at = time.monotonic() - OAUTH_RESULT_MAX_AGE_SECONDS - 1
+	checkin.oauth_results['linux.do'] = (True, {'api_user': 1}, {'success': True}, authorized_at)
+
+	assert checkin.pop_preauthorized('linux.do', 'Linux.do') is None
+	assert 'linux.do' not in checkin.oauth_results
+
+	checkin.oauth_results['linux.do'] = (True, {'api_user': 1}, {'success': True}, time.monotonic())
+	assert checkin.pop_preauthorized('linux.do', 'Linux.do') == (True, {'api_user': 1}, {'success': True})
@@ -0,0 +1,61 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.proxy_pool import ProxyHealth, ProxyPool
+
+
+def make_pool(count=4):
+	return ProxyPool([{'server': f'http://proxy{i}.example.com:8080'} for i in range(count)])
+
+
+def test_from_env_parses_strings_and_dicts(monkeypatch):
+	monkeypatch.setenv(
+		'PROXY_POOL',
+		'["http://a:1", {"server": "http://b:2", "username": "u", "password": "p", "max_concurrency": 2}, 5]',
+	)
+	monkeypatch.setenv('PROXY_POOL_CONCURRENCY', '4')
+	pool = ProxyPool.from_env()
+
+	# max_concurrency 不会传给 Camoufox / httpx
+	assert pool.proxies == [{'server': 'http://a:1'}, {'server': 'http://b:2', 'username': 'u', 'password': 'p'}]
+	assert pool.get_limits() == {'http://a:1': 4, 'http://b:2': 2}
+
+
+def test_from_env_comma_separated(monkeypatch):
+	monkeypatch.setenv('PROXY_POOL', 'http://a:1, http://b:2')
+	assert [proxy['server'] for proxy in ProxyPool.from_env().proxies] == ['http://a:1', 'http://b:2']
+
+
+def test_assignment_is_sticky():
+	pool = make_pool()
+	assigned = {name: pool.get_candidates(name)[0]['server'] for name in ['a1', 'a2', 'a3', 'a4', 'a5']}
+
+	# 同一账号总是分配到同一个代理，增加代理时已分配的账号只会换到新代理
+	assert assigned == {name: make_pool().get_candidates(name)[0]['server'] for name in assigned}
+	larger = make_pool(5)
+	for name, server in assigned.items():
+		new_server = larger.get_candidates(name)[0]['server']
+		assert new_server in (server, 'http://proxy4.example.com:8080')
+
+
+def test_unhealthy_proxy_moves_to_end():
+	pool = make_pool()
+	original = pool.get_candidates('a1')
+	pool.health = {original[0]['server']: ProxyHealth(original[0]['server'], None, 'timeout')}
+
+	candidates = pool.get_candidates('a1')
+	assert candidates[0] == original[1]
+	assert candidates[-1] == original[0]
+
+
+def test_failover_without_available_proxy():
+	pool = ProxyPool([{'server': 'http://127.0.0.1:1'}, {'server': 'http://127.0.0.1:2'}], probe_url='http://127.0.0.1:3/')
+
+	assert asyncio.run(pool.find_failover({'server': 'http://127.0.0.1:1'}, 'a1')) is None
+	assert not pool.is_healthy('http://127.0.0.1:1')
+	assert not pool.is_healthy('http://127.0.0.1:2')
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.rerun import SELECTOR_ACCOUNTS, SELECTOR_FAILED, SELECTOR_PROVIDERS, parse_rerun_selector, select_rerun_jobs
+from utils.run_checkpoint import RunCheckpoint
+
+
+def test_parse_rerun_selector():
+	assert parse_rerun_selector(None) == (SELECTOR_FAILED, set())
+	assert parse_rerun_selector('failed') == (SELECTOR_FAILED, set())
+	assert parse_rerun_selector('accounts: a1, a2') == (SELECTOR_ACCOUNTS, {'a1', 'a2'})
+	assert parse_rerun_selector('providers:anyrouter') == (SELECTOR_PROVIDERS, {'anyrouter'})
+	with pytest.raises(ValueError):
+		parse_rerun_selector('names:a1')
+	with pytest.raises(ValueError):
+		parse_rerun_selector('accounts:')
+
+
+def test_select_failed_accounts(tmp_path, make_job):
+	checkpoint = RunCheckpoint(str(tmp_path))
+	jobs = [
+		make_job(0, 'p1', name='ok'),
+		make_job(1, 'p1', name='bad'),
+		make_job(2, 'p2', name='new'),
+		make_job(3, 'p2', name='skip'),
+	]
+	checkpoint.save('ok', jobs[0].provider_config, [('cookies', True, {'display': 'ok'})])
+	checkpoint.save('bad', jobs[1].provider_config, [('cookies', False, {'error': 'expired'})])
+	checkpoint.save(
+		'skip',
+		jobs[3].provider_config,
+		[('cookies', True, {'display': 'ok'}), ('linux.do', False, {'skipped': True})],
+	)
+
+	carried = select_rerun_jobs(jobs, (SELECTOR_FAILED, set()), checkpoint)
+	# 失败的账号和没有检查点的账号被重跑
+	assert set(carried) == {0, 3}
+	assert carried[0][0][2]['display'] == 'ok'
+
+
+def test_select_by_provider(tmp_path, make_job):
+	checkpoint = RunCheckpoint(str(tmp_path))
+	jobs = [make_job(0, 'p1', name='a1'), make_job(1, 'p2', name='a2')]
+	carried = select_rerun_jobs(jobs, (SELECTOR_PROVIDERS, {'p2'}), checkpoint)
+	assert carried == {0: None}
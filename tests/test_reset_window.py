@@ -0,0 +1,62 @@
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.config import ProviderConfig
+from utils.reset_window import plan_start_times
+from utils.run_budget import RunBudget
+
+UTC8 = timezone(timedelta(hours=8))
+
+
+def test_provider_day_follows_reset_time():
+	provider = ProviderConfig(name='test', origin='https://example.com', reset_time='08:00')
+	# UTC+8 2026-01-02 07:30 仍属于 1 月 1 日的签到日
+	moment = datetime(2026, 1, 2, 7, 30, tzinfo=UTC8)
+	assert provider.get_provider_day(moment).isoformat() == '2026-01-01'
+	assert provider.get_last_reset(moment) == datetime(2026, 1, 1, 8, 0, tzinfo=UTC8)
+	assert provider.get_next_reset(moment) == datetime(2026, 1, 2, 8, 0, tzinfo=UTC8)
+
+
+def test_invalid_reset_time_falls_back_to_midnight():
+	provider = ProviderConfig.from_dict('test', {'origin': 'https://example.com', 'reset_time': '25:00'})
+	assert provider.reset_time == '00:00'
+
+
+def test_spreads_accounts_inside_window(make_job):
+	jobs = [make_job(0, 'a'), make_job(1, 'b'), make_job(2, 'a'), make_job(3, 'a')]
+	# 零点后 10 分钟开始运行，窗口 30 分钟，剩余 20 分钟
+	now = datetime(2026, 1, 1, 0, 10, tzinfo=UTC8).timestamp()
+
+	start_times = plan_start_times(jobs, window_seconds=1800, now=now)
+
+	# 每个 provider 的第一个账号立即启动，其余账号均匀分布在剩余的窗口内
+	assert 0 not in start_times and 1 not in start_times
+	assert start_times[2] == now + 400
+	assert start_times[3] == now + 800
+
+
+def test_outside_window_only_jitter(make_job):
+	jobs = [make_job(0, 'a'), make_job(1, 'a')]
+	now = datetime(2026, 1, 1, 9, 0, tzinfo=UTC8).timestamp()
+
+	assert plan_start_times(jobs, window_seconds=1800, now=now) == {}
+	start_times = plan_start_times(jobs, window_seconds=1800, jitter_seconds=30, now=now, rng=random.Random(1))
+	assert all(now < start_at <= now + 30 for start_at in start_times.values())
+
+
+def test_start_time_respects_run_budget(make_job):
+	jobs = [make_job(0, 'a'), make_job(1, 'a')]
+	now = datetime(2026, 1, 1, 0, 0, tzinfo=UTC8).timestamp()
+	for job in jobs:
+		job.run_budget = RunBudget(ends_at=now + 600)
+		job.estimated_seconds = 100
+
+	start_times = plan_start_times(jobs, window_seconds=3600, now=now)
+
+	assert start_times[1] == now + 500
@@ -0,0 +1,72 @@
+import pickle
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.run_budget import (
+	SHED_ACCOUNT,
+	SHED_NONE,
+	SHED_SECONDARY_METHODS,
+	SHED_TOPUP,
+	RunBudget,
+	RunTally,
+	project_durations,
+)
+
+
+def test_from_env(monkeypatch):
+	monkeypatch.delenv('RUN_BUDGET', raising=False)
+	monkeypatch.delenv('RUN_BUDGET_RESERVE', raising=False)
+	monkeypatch.delenv('GITHUB_ACTIONS', raising=False)
+	assert RunBudget.from_env(started_at=1000) is None
+
+	monkeypatch.setenv('GITHUB_ACTIONS', 'true')
+	assert RunBudget.from_env(started_at=1000).ends_at == 1000 + 340 * 60 - 120
+
+	monkeypatch.setenv('RUN_BUDGET', '600')
+	monkeypatch.setenv('RUN_BUDGET_RESERVE', '60')
+	budget = RunBudget.from_env(started_at=1000)
+	assert budget.ends_at == 1540
+	assert budget.remaining(now=1500) == 40
+
+	monkeypatch.setenv('RUN_BUDGET', '0')
+	assert RunBudget.from_env(started_at=1000) is None
+
+
+def test_shed_levels():
+	budget = RunBudget(ends_at=1000)
+	assert budget.get_shed_level(account_seconds=10, pending_seconds=50, now=900) == SHED_NONE
+	assert budget.get_shed_level(account_seconds=10, pending_seconds=200, now=900) == SHED_TOPUP
+	assert budget.get_shed_level(account_seconds=150, pending_seconds=200, now=900) == SHED_SECONDARY_METHODS
+	assert budget.get_shed_level(account_seconds=10, pending_seconds=50, now=1000) == SHED_ACCOUNT
+
+
+def test_project_durations_from_finished_accounts():
+	assert project_durations([10, 20], []) == [10, 20]
+	# 已完成的账号实际耗时是预估的两倍
+	assert project_durations([10, 20], [(5, 10), (15, 30)]) == [20, 40]
+
+
+def test_run_tally_projects_from_whole_run():
+	tally = RunTally({1: 10, 2: 20, 3: 30, 4: 40}, parallelism=2)
+	tally.record(1, 20)
+
+	# 其它任务组完成的账号实际耗时是预估的两倍，剩余账号按两个并行任务组换算
+	assert tally.project(2) == (40, 90)
+
+	tally.drop([3])
+	assert tally.project(4) == (80, 80)
+
+
+def test_run_tally_merges_worker_snapshot():
+	tally = RunTally({1: 10, 2: 20})
+	snapshot = pickle.loads(pickle.dumps(tally))
+	snapshot.record(1, 5)
+
+	tally.merge_finished(snapshot.get_finished([1, 2]))
+
+	assert tally.finished == {1: (10, 5)}
+	assert tally.project(2) == (10, 10)
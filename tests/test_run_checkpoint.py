@@ -0,0 +1,50 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.config import ProviderConfig
+from utils.run_checkpoint import RunCheckpoint
+
+
+@pytest.fixture
+def provider():
+	return ProviderConfig(name='test', origin='https://example.com', timezone='Asia/Shanghai')
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+	return RunCheckpoint(str(tmp_path / 'run-checkpoints'))
+
+
+def test_no_checkpoint(checkpoint, provider):
+	assert checkpoint.load('acc', provider) is None
+
+
+def test_resume_within_same_provider_day(checkpoint, provider):
+	# 北京时间 2026-01-01 09:00
+	finished = datetime(2026, 1, 1, 1, 0, tzinfo=timezone.utc)
+	results = [
+		('cookies', True, {'success': True, 'display': 'ok', 'session': {'cookies': {'session': 'secret'}}}),
+		('linux.do', False, {'error': 'failed'}),
+	]
+	checkpoint.save('acc', provider, results, now=finished)
+
+	resumed = checkpoint.load('acc', provider, now=finished + timedelta(hours=14))
+	assert resumed == [
+		('cookies', True, {'success': True, 'display': 'ok', 'resumed': True}),
+		('linux.do', False, {'error': 'failed', 'resumed': True}),
+	]
+	# 北京时间 2026-01-02 01:00，进入新的签到日
+	assert checkpoint.load('acc', provider, now=finished + timedelta(hours=16)) is None
+
+
+def test_session_cookies_not_written(checkpoint, provider, tmp_path):
+	checkpoint.save('acc', provider, [('cookies', True, {'session': {'cookies': {'session': 'secret'}}})])
+	content = ''.join(path.read_text(encoding='utf-8') for path in (tmp_path / 'run-checkpoints').iterdir())
+	assert 'secret' not in content
@@ -0,0 +1,65 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.config import ProviderConfig
+from utils.scheduler import CronSchedule
+from utils.waf_detector import WafCookieCache
+
+UTC8 = timezone(timedelta(hours=8))
+
+
+def test_cron_next_after_hours_list():
+	schedule = CronSchedule('0 0,8,16 * * *', UTC8)
+	moment = datetime(2026, 1, 1, 9, 30, tzinfo=UTC8)
+	assert schedule.next_after(moment) == datetime(2026, 1, 1, 16, 0, tzinfo=UTC8)
+	assert schedule.next_after(datetime(2026, 1, 1, 16, 0, tzinfo=UTC8)) == datetime(2026, 1, 2, 0, 0, tzinfo=UTC8)
+
+
+def test_cron_next_after_converts_timezone():
+	schedule = CronSchedule('30 9 * * *', UTC8)
+	# UTC 02:00 即 UTC+8 10:00，当天的 09:30 已过
+	moment = datetime(2026, 1, 1, 2, 0, tzinfo=timezone.utc)
+	assert schedule.next_after(moment) == datetime(2026, 1, 2, 9, 30, tzinfo=UTC8)
+
+
+def test_cron_steps_ranges_and_weekdays():
+	schedule = CronSchedule('*/20 10-12 * * 7', UTC8)
+	# 2026-01-01 是周四，下一个周日是 2026-01-04
+	assert schedule.next_after(datetime(2026, 1, 1, 0, 0, tzinfo=UTC8)) == datetime(2026, 1, 4, 10, 0, tzinfo=UTC8)
+	assert schedule.next_after(datetime(2026, 1, 4, 10, 0, tzinfo=UTC8)) == datetime(2026, 1, 4, 10, 20, tzinfo=UTC8)
+	assert schedule.next_after(datetime(2026, 1, 4, 12, 40, tzinfo=UTC8)) == datetime(2026, 1, 11, 10, 0, tzinfo=UTC8)
+
+
+def test_cron_day_and_weekday_match_either():
+	schedule = CronSchedule('0 0 15 * 1', UTC8)
+	# 2026-01-05 是周一，早于 15 日
+	assert schedule.next_after(datetime(2026, 1, 1, 0, 0, tzinfo=UTC8)) == datetime(2026, 1, 5, 0, 0, tzinfo=UTC8)
+	assert schedule.next_after(datetime(2026, 1, 13, 0, 0, tzinfo=UTC8)) == datetime(2026, 1, 15, 0, 0, tzinfo=UTC8)
+
+
+def test_cron_invalid_expressions():
+	for expression in ['0 0 * *', '60 0 * * *', '0 */0 * * *', '0 a * * *', '0 5-3 * * *']:
+		with pytest.raises(ValueError):
+			CronSchedule(expression, UTC8)
+
+
+def test_provider_next_reset_uses_provider_timezone():
+	provider = ProviderConfig(name='test', origin='https://example.com', timezone='Asia/Shanghai')
+	# UTC 2026-01-01 17:00 即 UTC+8 2026-01-02 01:00，下一次重置为 UTC+8 2026-01-03 零点
+	next_reset = provider.get_next_reset(datetime(2026, 1, 1, 17, 0, tzinfo=timezone.utc))
+	assert next_reset == datetime(2026, 1, 3, 0, 0, tzinfo=UTC8)
+
+
+def test_waf_cookie_cache_expires():
+	cache = WafCookieCache()
+	cache.set('https://example.com', '', {'acw_tc': 'x'}, ttl=60, now=100.0)
+	assert cache.get('https://example.com', now=150.0) == {'acw_tc': 'x'}
+	assert cache.get('https://example.com', 'http://proxy:8080', now=150.0) is None
+	assert cache.get('https://example.com', now=160.0) is None
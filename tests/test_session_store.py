@@ -0,0 +1,44 @@
+import json
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.session_store import SessionStore
+
+
+def test_sessions_round_trip_encrypted(tmp_path):
+	store_file = tmp_path / 'provider_sessions.enc'
+	store = SessionStore(str(store_file), secret='secret')
+	store.set('Account 1', 'wong', 'github', {'session': 'abc'}, 42)
+	store.save()
+
+	assert b'abc' not in store_file.read_bytes()
+
+	reloaded = SessionStore(str(store_file), secret='secret')
+	assert reloaded.get('Account 1', 'wong', 'github')['cookies'] == {'session': 'abc'}
+	assert SessionStore(str(store_file), secret='other').get('Account 1', 'wong', 'github') is None
+
+
+def test_legacy_plaintext_sessions_are_migrated(tmp_path):
+	legacy_file = tmp_path / 'provider_sessions.json'
+	legacy_file.write_text(json.dumps({'wong|Account 1|github': {'cookies': {'session': 'abc'}, 'api_user': '42'}}))
+	store_file = tmp_path / 'provider_sessions.enc'
+
+	store = SessionStore(str(store_file), secret='secret', legacy_file=str(legacy_file))
+	assert store.get('Account 1', 'wong', 'github')['api_user'] == '42'
+
+	store.save()
+	assert not legacy_file.exists()
+	assert SessionStore(str(store_file), secret='secret').get('Account 1', 'wong', 'github')['api_user'] == '42'
+
+
+def test_disabled_without_secret(tmp_path):
+	store = SessionStore(str(tmp_path / 'provider_sessions.enc'))
+	store.set('Account 1', 'wong', 'github', {'session': 'abc'}, 42)
+	store.save()
+
+	assert not store.enabled
+	assert not (tmp_path / 'provider_sessions.enc').exists()
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.storage_state_check import (
+	STATE_EXPIRED,
+	STATE_UNKNOWN,
+	STATE_VALID,
+	check_storage_state,
+	get_storage_state_kind,
+	get_storage_state_verdict,
+	load_storage_state_cookies,
+	mark_storage_state,
+	sweep_storage_states,
+)
+
+
+def write_state(path, cookies):
+	path.write_text(json.dumps({'cookies': cookies, 'origins': []}), encoding='utf-8')
+	return str(path)
+
+
+def test_storage_state_kind():
+	assert get_storage_state_kind('storage-states/linuxdo_abc_storage_state.json') == 'linux.do'
+	assert get_storage_state_kind('storage-states/github_abc_storage_state.json') == 'github'
+	assert get_storage_state_kind('storage-states/provider_sessions.json') is None
+
+
+def test_load_cookies_filters_domain(tmp_path):
+	path = write_state(
+		tmp_path / 'linuxdo_abc_storage_state.json',
+		[
+			{'name': '_t', 'value': 'token', 'domain': 'linux.do'},
+			{'name': 'cf_clearance', 'value': 'cf', 'domain': '.linux.do'},
+			{'name': 'session', 'value': 'x', 'domain': 'anyrouter.top'},
+		],
+	)
+
+	assert load_storage_state_cookies(path, 'linux.do') == {'_t': 'token', 'cf_clearance': 'cf'}
+
+
+def test_missing_session_cookie_is_expired(tmp_path):
+	path = write_state(tmp_path / 'github_abc_storage_state.json', [{'name': '_octo', 'value': 'x', 'domain': '.github.com'}])
+
+	assert check_storage_state(path) == STATE_EXPIRED
+
+
+def test_verdict_lookup(tmp_path):
+	path = write_state(tmp_path / 'linuxdo_def_storage_state.json', [])
+
+	assert get_storage_state_verdict(str(tmp_path / 'linuxdo_missing_storage_state.json')) == STATE_EXPIRED
+	assert get_storage_state_verdict(path) == STATE_UNKNOWN
+	mark_storage_state(path, STATE_VALID)
+	assert get_storage_state_verdict(path) == STATE_VALID
+
+
+def test_sweep_skips_sessions_verified_in_process(tmp_path):
+	refreshed = write_state(tmp_path / 'linuxdo_aaa_storage_state.json', [])
+	stale = write_state(tmp_path / 'linuxdo_bbb_storage_state.json', [])
+	mark_storage_state(refreshed, STATE_VALID)
+
+	verdicts = asyncio.run(sweep_storage_states(str(tmp_path), skip_valid=True))
+
+	# 已确认有效的会话不再检查，其它会话照常检查（缺少会话 cookie 判定为过期）
+	assert verdicts[str(Path(refreshed).resolve())] == STATE_VALID
+	assert verdicts[str(Path(stale).resolve())] == STATE_EXPIRED
+	assert get_storage_state_verdict(refreshed) == STATE_VALID
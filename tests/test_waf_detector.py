@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+import httpx
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.config import ProviderConfig
+from utils.waf_detector import WafDecisionCache, is_challenge_response
+
+
+def test_json_response_is_not_challenge():
+	response = httpx.Response(200, json={'success': True, 'data': {}})
+
+	assert not is_challenge_response(response)
+
+
+def test_html_response_is_challenge():
+	response = httpx.Response(
+		200,
+		headers={'content-type': 'text/html; charset=utf-8'},
+		text='<html><script>var arg1="abc";</script></html>',
+	)
+
+	assert is_challenge_response(response)
+
+
+def test_decision_cache_expires():
+	cache = WafDecisionCache()
+	cache.set('https://anyrouter.top', '', True, ttl=60, now=100.0)
+
+	assert cache.get('https://anyrouter.top', now=159.0) is True
+	assert cache.get('https://anyrouter.top', now=160.0) is None
+
+
+def test_decision_cache_is_per_proxy():
+	cache = WafDecisionCache()
+	cache.set('https://anyrouter.top', 'http://proxy1:8080', True, ttl=60, now=100.0)
+
+	assert cache.get('https://anyrouter.top', 'http://proxy1:8080', now=110.0) is True
+	assert cache.get('https://anyrouter.top', 'http://proxy2:8080', now=110.0) is None
+	assert cache.get('https://anyrouter.top', now=110.0) is None
+
+
+def test_custom_provider_keeps_plain_http_by_default():
+	provider = ProviderConfig.from_dict('custom', {'origin': 'https://example.com'})
+
+	assert not provider.is_waf_adaptive()
+	assert not provider.needs_waf_cookies()
+
+	provider = ProviderConfig.from_dict('custom', {'origin': 'https://example.com', 'bypass_method': 'auto'})
+	assert provider.is_waf_adaptive()
+
+
+def test_failed_probe_is_not_cached(monkeypatch):
+	from utils import waf_detector
+
+	cache = WafDecisionCache()
+	results = [None, False]
+	monkeypatch.setattr(waf_detector, 'waf_decisions', cache)
+	monkeypatch.setattr(waf_detector, 'probe_waf_challenge', lambda probe_url, proxy_config=None: results.pop(0))
+
+	assert waf_detector.detect_waf_challenge('https://anyrouter.top', 'https://anyrouter.top/api/status') is True
+	assert cache.get('https://anyrouter.top') is None
+
+	assert waf_detector.detect_waf_challenge('https://anyrouter.top', 'https://anyrouter.top/api/status') is False
+	assert cache.get('https://anyrouter.top') is False
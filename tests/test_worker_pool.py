@@ -0,0 +1,148 @@
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.worker_pool import group_jobs, job_needs_browser
+
+
+def test_group_jobs_by_linuxdo_identity(make_job):
+	alice = {'username': 'alice', 'password': 'x'}
+	jobs = [
+		make_job(0, 'anyrouter', linux_do=alice),
+		make_job(1, 'wong', linux_do={'username': 'bob', 'password': 'x'}),
+		make_job(2, 'x666', linux_do=alice),
+		make_job(3, 'aiai.li'),
+	]
+
+	groups = group_jobs(jobs)
+
+	assert [[job.index for job in group] for group in groups] == [[0, 2], [1], [3]]
+
+
+def test_group_jobs_without_batching(make_job):
+	alice = {'username': 'alice', 'password': 'x'}
+	jobs = [make_job(0, 'anyrouter', linux_do=alice), make_job(1, 'wong', linux_do=alice)]
+
+	assert [[job.index for job in group] for group in group_jobs(jobs, batch_oauth=False)] == [[0], [1]]
+
+
+def test_group_jobs_merges_linuxdo_and_github_identities(make_job):
+	alice = {'username': 'alice', 'password': 'x'}
+	carol = {'username': 'carol', 'password': 'x'}
+	jobs = [
+		make_job(0, 'anyrouter', github=carol),
+		make_job(1, 'wong', linux_do={'username': 'bob', 'password': 'x'}),
+		make_job(2, 'x666', linux_do=alice),
+		make_job(3, 'aiai.li', linux_do=alice, github=carol),
+	]
+
+	groups = group_jobs(jobs)
+
+	assert [[job.index for job in group] for group in groups] == [[0, 2, 3], [1]]
+
+
+def test_job_needs_browser_for_oauth_only(make_job):
+	assert not job_needs_browser(make_job(0, 'wong'))
+	assert job_needs_browser(make_job(1, 'wong', linux_do={'username': 'alice', 'password': 'x'}))
+
+
+def test_job_needs_browser_for_waf_provider(make_job):
+	job = make_job(0, 'anyrouter')
+	job.provider_config.bypass_method = 'waf_cookies'
+
+	assert job_needs_browser(job)
+
+
+def test_group_jobs_by_api_user_without_batching(make_job):
+	jobs = [make_job(index, 'wong') for index in range(3)]
+	for job in jobs:
+		job.account_config.cookies = {'session': f'session-{job.index}'}
+	jobs[0].account_config.api_user = '42'
+	jobs[1].account_config.api_user = '7'
+	jobs[2].account_config.api_user = '42'
+
+	groups = group_jobs(jobs, batch_oauth=False)
+
+	assert [[job.index for job in group] for group in groups] == [[0, 2], [1]]
+
+
+def test_merge_worker_state_marks_proxies_and_circuits(make_job):
+	from utils.circuit_breaker import circuit_breaker
+	from utils.proxy_pool import ProxyHealth, ProxyPool
+	from utils.worker_pool import _merge_worker_state
+
+	pool = ProxyPool([{'server': 'http://a:1'}, {'server': 'http://b:2'}])
+	job = make_job(0, 'merge-state')
+	job.proxy_pool = pool
+	origin = 'https://merge-state.example.com'
+
+	_merge_worker_state(
+		[job],
+		{
+			'unhealthy_proxies': {'http://a:1': ProxyHealth('http://a:1', None, 'ProxyError')},
+			'open_circuits': {origin: 0.0},
+		},
+	)
+
+	assert not pool.is_healthy('http://a:1')
+	assert pool.is_healthy('http://b:2')
+	assert circuit_breaker.is_open(origin)
+	circuit_breaker.record_success(origin)
+
+
+def test_job_needs_browser_for_challenged_auto_provider(make_job):
+	from utils.waf_detector import waf_decisions
+
+	job = make_job(0, 'auto-waf')
+	job.provider_config.bypass_method = 'auto'
+	job.global_proxy = {'server': 'http://proxy1:8080'}
+
+	# 尚未探测时按需要浏览器处理
+	assert job_needs_browser(job)
+
+	waf_decisions.set(job.provider_config.origin, 'http://proxy1:8080', False, ttl=60)
+	assert not job_needs_browser(job)
+
+	waf_decisions.set(job.provider_config.origin, 'http://proxy1:8080', True, ttl=60)
+	assert job_needs_browser(job)
+	waf_decisions.invalidate(job.provider_config.origin, 'http://proxy1:8080')
+
+
+def test_browser_slot_held_once_per_group():
+	import asyncio
+
+	from utils.browser_transport import BrowserSlots, acquire_browser_slot, bind_browser_slots, release_browser_slot
+
+	slots = BrowserSlots(1)
+
+	async def run_group():
+		bind_browser_slots(slots)
+		try:
+			# 同一任务组多次启动浏览器只占用一个名额
+			await acquire_browser_slot('Account 1')
+			await acquire_browser_slot('Account 1')
+			assert not slots._semaphore.acquire(blocking=False)
+		finally:
+			release_browser_slot()
+
+	asyncio.run(run_group())
+	assert slots._semaphore.acquire(blocking=False)
+
+
+def test_late_starting_jobs_skip_batch_oauth(make_job):
+	from types import SimpleNamespace
+
+	from utils.oauth_batch import BATCH_MAX_START_DELAY_SECONDS
+	from utils.worker_pool import _get_batch_checkins
+
+	alice = {'username': 'alice', 'password': 'x'}
+	jobs = [make_job(index, f'late-start-{index}', linux_do=alice) for index in range(3)]
+	jobs[1].start_at = 1000 + BATCH_MAX_START_DELAY_SECONDS
+	# 计划启动时间较晚的账号等到开始时单独登录，授权结果不会在等待期间过期
+	jobs[2].start_at = 1000 + BATCH_MAX_START_DELAY_SECONDS + 1
+	checkins = [SimpleNamespace(first_success=False, provider_config=job.provider_config) for job in jobs]
+
+	assert _get_batch_checkins(jobs, checkins, now=1000) == checkins[:2]
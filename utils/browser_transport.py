@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+浏览器传输模块
+
+httpx 请求返回 HTML（WAF 挑战页面）而不是 JSON 时，在已经打开并通过验证的 provider 页面中用 fetch() 重新发起请求。
+每个代理共用一个浏览器，每个 origin 保留一个预热页面，多次 API 调用共享同一次验证结果，不再每次调用都启动浏览器。
+HTTP 通道中的任务组需要启动浏览器时，先占用与浏览器通道共用的浏览器名额
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+from camoufox.async_api import AsyncCamoufox
+
+from utils.browser_utils import aliyun_captcha_check
+from utils.config import ProviderConfig
+from utils.geoip_cache import get_camoufox_geoip, invalidate_proxy_geoip
+
+# 浏览器中 fetch 不允许设置的请求头，由浏览器自动填充
+FORBIDDEN_FETCH_HEADERS = {
+    "user-agent",
+    "accept-encoding",
+    "connection",
+    "origin",
+    "referer",
+    "host",
+    "cookie",
+    "content-length",
+}
+
+# 等待浏览器名额时的检查间隔（秒）
+BROWSER_SLOT_POLL_SECONDS = 0.5
+
+
+def _domain_matches(cookie_domain: str, provider_domain: str) -> bool:
+    """判断 cookie 域名是否适用于 provider 域名"""
+    cookie_domain = cookie_domain.lstrip(".")
+    return bool(cookie_domain) and (provider_domain == cookie_domain or provider_domain.endswith(f".{cookie_domain}"))
+
+
+class BrowserSlots:
+    """主进程中同时使用浏览器的任务组数上限（线程安全，HTTP 通道的线程与浏览器通道共用）"""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._semaphore = threading.Semaphore(self.size)
+
+    async def acquire(self) -> None:
+        """等待空闲名额（轮询等待，取消时不会占用名额）"""
+        # 名额由多个线程中的事件循环共用，只能使用 threading.Semaphore；在线程中阻塞等待的话，
+        # 协程被取消后线程仍会拿到名额且无人释放，因此在事件循环中非阻塞地轮询
+        while not self._semaphore.acquire(blocking=False):  # noqa: ASYNC110
+            await asyncio.sleep(BROWSER_SLOT_POLL_SECONDS)
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+
+# 当前线程中执行的任务组绑定的浏览器名额 (slots, 是否已占用)
+_group_slot = threading.local()
+
+
+def bind_browser_slots(slots: BrowserSlots | None) -> None:
+    """为当前线程中执行的任务组绑定浏览器名额，任务组第一次启动浏览器时占用一个名额，None 表示不限制"""
+    _group_slot.slots = slots
+    _group_slot.held = False
+
+
+async def acquire_browser_slot(account_name: str) -> None:
+    """启动浏览器前调用: 当前任务组绑定了浏览器名额且尚未占用时，等待浏览器通道的空闲名额"""
+    slots = getattr(_group_slot, "slots", None)
+    if slots is None or _group_slot.held:
+        return
+    print(f"⏳ {account_name}: Browser needed, waiting for a browser lane slot")
+    await slots.acquire()
+    _group_slot.held = True
+
+
+def release_browser_slot() -> None:
+    """任务组结束时释放占用的浏览器名额，并解除绑定"""
+    slots = getattr(_group_slot, "slots", None)
+    if slots is not None and _group_slot.held:
+        slots.release()
+    bind_browser_slots(None)
+
+
+@dataclass
+class BrowserFetchResult:
+    """浏览器 fetch 结果"""
+
+    status: int
+    data: dict | None
+    cookies: list[dict] = field(default_factory=list)
+    error: str | None = None
+
+
+@dataclass
+class _WarmPage:
+    """已通过验证的 origin 页面"""
+
+    context: object
+    page: object
+    # 页面验证后得到的 cookies（WAF cookies），每次请求前恢复，避免不同账号的会话互相影响
+    base_cookies: list[dict]
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class BrowserTransport:
+    """在预热页面中执行 API 请求的浏览器传输"""
+
+    def __init__(self, proxy_config: dict | None = None):
+        """初始化
+
+        Args:
+            proxy_config: Camoufox 代理配置
+        """
+        self.proxy_config = proxy_config
+        self._camoufox = None
+        self._browser = None
+        self._pages: dict[str, _WarmPage] = {}
+        self._lock = asyncio.Lock()
+
+    async def _get_browser(self, account_name: str = "Shared browser"):
+        if self._browser is None:
+            await acquire_browser_slot(account_name)
+            print(
+                f"ℹ️ Starting shared browser (using proxy: {'true' if self.proxy_config else 'false'})"
+            )
+            self._camoufox = AsyncCamoufox(
+                headless=False,
+                humanize=True,
+                locale="en-US",
+                geoip=await get_camoufox_geoip(self.proxy_config),
+                proxy=self.proxy_config,
+            )
+            try:
+                self._browser = await self._camoufox.__aenter__()
+            except Exception:
+                # 启动失败时缓存的出口 IP 可能已经不正确，下次启动重新查询
+                invalidate_proxy_geoip(self.proxy_config)
+                self._camoufox = None
+                raise
+        return self._browser
+
+    async def _warm_up(self, provider_config: ProviderConfig, account_name: str) -> _WarmPage:
+        """打开 provider 登录页面完成 WAF 验证"""
+        browser = await self._get_browser(account_name)
+        context = await browser.new_context()
+        page = await context.new_page()
+
+        print(f"ℹ️ {account_name}: Warming up browser page for {provider_config.origin}")
+        await page.goto(provider_config.get_login_url(), wait_until="networkidle")
+        try:
+            await page.wait_for_function('document.readyState === "complete"', timeout=5000)
+        except Exception:
+            await page.wait_for_timeout(3000)
+
+        if provider_config.aliyun_captcha:
+            captcha_check = await aliyun_captcha_check(page, account_name)
+            if captcha_check:
+                await page.wait_for_timeout(3000)
+
+        return _WarmPage(context=context, page=page, base_cookies=await context.cookies())
+
+    async def _get_page(self, provider_config: ProviderConfig, account_name: str) -> _WarmPage:
+        async with self._lock:
+            warm_page = self._pages.get(provider_config.origin)
+            if warm_page is None:
+                warm_page = await self._warm_up(provider_config, account_name)
+                self._pages[provider_config.origin] = warm_page
+            return warm_page
+
+    async def _discard_page(self, origin: str) -> None:
+        async with self._lock:
+            warm_page = self._pages.pop(origin, None)
+        if warm_page:
+            try:
+                await warm_page.context.close()
+            except Exception:
+                pass
+
+    async def fetch_json(
+        self,
+        provider_config: ProviderConfig,
+        url: str,
+        account_name: str,
+        method: str = "GET",
+        headers: dict | None = None,
+        cookies: dict | None = None,
+    ) -> BrowserFetchResult:
+        """在预热页面中执行 fetch 并解析 JSON
+
+        返回 HTML 时说明页面验证已失效，重新预热一次后重试
+
+        Args:
+            provider_config: provider 配置
+            url: 请求地址
+            account_name: 账号名称（用于日志）
+            method: 请求方法
+            headers: 请求头，浏览器禁止设置的请求头会被忽略
+            cookies: 账号 cookies（例如 session）
+
+        Returns:
+            BrowserFetchResult，cookies 为请求后 provider 域名下的 cookies（Camoufox 格式）
+        """
+        fetch_headers = {
+            key: value
+            for key, value in (headers or {}).items()
+            if key.lower() not in FORBIDDEN_FETCH_HEADERS and not key.lower().startswith("sec-")
+        }
+
+        result = BrowserFetchResult(status=0, data=None, error="Browser fetch not executed")
+        for attempt in range(2):
+            try:
+                warm_page = await self._get_page(provider_config, account_name)
+                async with warm_page.lock:
+                    # 恢复验证后的 cookies，再设置当前账号的 cookies
+                    await warm_page.context.clear_cookies()
+                    if warm_page.base_cookies:
+                        await warm_page.context.add_cookies(warm_page.base_cookies)
+                    if cookies:
+                        await warm_page.context.add_cookies(
+                            [
+                                {"name": name, "value": value, "url": provider_config.origin}
+                                for name, value in cookies.items()
+                            ]
+                        )
+
+                    response = await warm_page.page.evaluate(
+                        """async ({url, method, headers}) => {
+                            try {
+                                const response = await fetch(url, {method, headers, credentials: 'include'});
+                                const text = await response.text();
+                                try {
+                                    return {status: response.status, data: JSON.parse(text)};
+                                } catch (e) {
+                                    return {status: response.status, data: null, error: 'Invalid JSON response'};
+                                }
+                            } catch (e) {
+                                return {status: 0, data: null, error: e.message};
+                            }
+                        }""",
+                        {"url": url, "method": method, "headers": fetch_headers},
+                    )
+
+                    provider_domain = urlparse(provider_config.origin).netloc
+                    context_cookies = [
+                        cookie
+                        for cookie in await warm_page.context.cookies()
+                        if _domain_matches(cookie.get("domain", ""), provider_domain)
+                    ]
+
+                result = BrowserFetchResult(
+                    status=response.get("status", 0),
+                    data=response.get("data"),
+                    cookies=context_cookies,
+                    error=response.get("error"),
+                )
+            except Exception as e:
+                result = BrowserFetchResult(status=0, data=None, error=f"{e}")
+
+            if result.data is not None:
+                return result
+
+            if attempt == 0:
+                print(f"⚠️ {account_name}: Browser fetch failed ({result.error}), warming up page again")
+                await self._discard_page(provider_config.origin)
+
+        return result
+
+    async def close(self) -> None:
+        """关闭所有页面和浏览器"""
+        for origin in list(self._pages.keys()):
+            await self._discard_page(origin)
+        if self._camoufox is not None:
+            try:
+                await self._camoufox.__aexit__(None, None, None)
+            except Exception:
+                pass
+        self._camoufox = None
+        self._browser = None
+
+
+# 共享的浏览器传输 {(事件循环 id, 代理地址): BrowserTransport}，不同事件循环（线程）之间互不共享
+_transports: dict[tuple[int, str], BrowserTransport] = {}
+
+# 保持浏览器常驻的事件循环 id（常驻模式的主事件循环），其中的浏览器在多次运行之间复用
+_warm_loops: set[int] = set()
+
+
+def keep_browser_transports_warm() -> None:
+    """当前事件循环中的浏览器传输在任务结束后不关闭，供后续运行复用（由 close_browser_transports(force=True) 关闭）"""
+    _warm_loops.add(id(asyncio.get_running_loop()))
+
+
+def get_browser_transport(proxy_config: dict | None = None) -> BrowserTransport:
+    """获取当前事件循环中指定代理对应的浏览器传输，同一代理的账号共用"""
+    key = (id(asyncio.get_running_loop()), (proxy_config or {}).get("server", ""))
+    transport = _transports.get(key)
+    if transport is None:
+        transport = BrowserTransport(proxy_config)
+        _transports[key] = transport
+    return transport
+
+
+async def get_shared_browser(proxy_config: dict | None = None):
+    """获取当前事件循环中指定代理的共享浏览器（与 API 回退共用）
+
+    调用方在独立的 context 中使用，不要关闭浏览器，由 close_browser_transports 统一关闭
+    """
+    return await get_browser_transport(proxy_config)._get_browser()
+
+
+async def close_browser_transports(force: bool = False) -> None:
+    """关闭当前事件循环中的所有浏览器传输
+
+    Args:
+        force: 是否同时关闭保持常驻的浏览器
+    """
+    loop_id = id(asyncio.get_running_loop())
+    if loop_id in _warm_loops and not force:
+        return
+    _warm_loops.discard(loop_id)
+    keys = [key for key in _transports if key[0] == loop_id]
+    for key in keys:
+        await _transports.pop(key).close()
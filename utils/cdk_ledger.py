@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+CDK 记录模块
+
+按 (provider, 账号) 持久化每个 CDK 的状态（已获取 / 已兑换 / 兑换失败）。
+充值中断时剩余的 CDK 留到下次运行优先兑换，已兑换的 CDK 不再重复提交
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+# CDK 状态
+CDK_FETCHED = "fetched"
+CDK_REDEEMED = "redeemed"
+CDK_FAILED = "failed"
+
+# 兑换失败达到该次数后不再重试
+MAX_CDK_ATTEMPTS = 3
+
+# 已兑换和放弃的 CDK 保留天数，用于识别 get_cdk 再次返回的旧 CDK
+CDK_RETENTION_DAYS = 30
+
+
+class CdkLedger:
+    """单个 (provider, 账号) 的 CDK 记录
+
+    每个账号使用单独的文件，多个工作进程同时写入不会互相覆盖；每次状态变化后立即保存，
+    进程中途退出时已获取的 CDK 也不会丢失
+    """
+
+    def __init__(self, provider_name: str, account_name: str, ledger_dir: str = "cdk-ledger"):
+        """初始化
+
+        Args:
+            provider_name: provider 名称
+            account_name: 账号名称
+            ledger_dir: 记录目录
+        """
+        safe_name = "".join(c if c.isalnum() else "_" for c in f"{provider_name}_{account_name}")
+        self.ledger_file = os.path.join(ledger_dir, f"{safe_name}.json")
+        self.codes: dict[str, dict] = self._load()
+
+    def _load(self) -> dict[str, dict]:
+        """加载记录文件，清理过期的记录"""
+        try:
+            if os.path.exists(self.ledger_file):
+                with open(self.ledger_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        return self._prune(data)
+        except Exception as e:
+            print(f"⚠️ Failed to load CDK ledger {self.ledger_file}: {e}")
+        return {}
+
+    @staticmethod
+    def _prune(codes: dict[str, dict], now: datetime | None = None) -> dict[str, dict]:
+        """删除超过保留天数且不会再兑换的记录"""
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=CDK_RETENTION_DAYS)
+        kept = {}
+        for code, entry in codes.items():
+            finished = entry.get("status") == CDK_REDEEMED or entry.get("attempts", 0) >= MAX_CDK_ATTEMPTS
+            try:
+                expired = datetime.fromisoformat(entry.get("updated_at", "")) < cutoff
+            except (TypeError, ValueError):
+                expired = False
+            if not (finished and expired):
+                kept[code] = entry
+        return kept
+
+    def save(self) -> None:
+        """保存记录文件"""
+        try:
+            os.makedirs(os.path.dirname(self.ledger_file) or ".", exist_ok=True)
+            with open(self.ledger_file, "w", encoding="utf-8") as f:
+                json.dump(self.codes, f, ensure_ascii=False, indent=2, sort_keys=True)
+        except Exception as e:
+            print(f"Warning: Failed to save CDK ledger: {e}")
+
+    def _update(self, code: str, **fields) -> None:
+        entry = self.codes.get(code) or {"status": CDK_FETCHED, "attempts": 0}
+        entry.update(fields)
+        if entry["status"] == CDK_REDEEMED:
+            entry.pop("error", None)
+        entry["updated_at"] = datetime.now(timezone.utc).isoformat()
+        self.codes[code] = entry
+        self.save()
+
+    def is_redeemed(self, code: str) -> bool:
+        """判断 CDK 是否已兑换"""
+        entry = self.codes.get(code)
+        return bool(entry) and entry.get("status") == CDK_REDEEMED
+
+    def is_redeemable(self, code: str) -> bool:
+        """判断 CDK 是否还可以提交兑换（未兑换且失败次数未达上限）"""
+        entry = self.codes.get(code)
+        if not entry:
+            return True
+        return entry.get("status") != CDK_REDEEMED and entry.get("attempts", 0) < MAX_CDK_ATTEMPTS
+
+    def get_pending(self) -> list[str]:
+        """获取上次运行遗留的待兑换 CDK，按获取时间排序"""
+        pending = [code for code in self.codes if self.is_redeemable(code)]
+        return sorted(pending, key=lambda code: self.codes[code].get("fetched_at", ""))
+
+    def record_fetched(self, codes: list[str]) -> None:
+        """记录新获取的 CDK，已有记录的 CDK 保持原状态"""
+        new_codes = [code for code in codes if code not in self.codes]
+        if not new_codes:
+            return
+        now = datetime.now(timezone.utc).isoformat()
+        for code in new_codes:
+            self.codes[code] = {"status": CDK_FETCHED, "attempts": 0, "fetched_at": now, "updated_at": now}
+        self.save()
+
+    def record_redeemed(self, code: str, already_used: bool = False) -> None:
+        """记录 CDK 已兑换（already_used 表示 provider 返回已被使用）"""
+        entry = self.codes.get(code) or {}
+        self._update(code, status=CDK_REDEEMED, attempts=entry.get("attempts", 0) + 1, already_used=already_used)
+
+    def record_failed(self, code: str, error: str) -> None:
+        """记录 CDK 兑换失败"""
+        entry = self.codes.get(code) or {}
+        self._update(code, status=CDK_FAILED, attempts=entry.get("attempts", 0) + 1, error=error)
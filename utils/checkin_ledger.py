@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+签到记录模块
+
+跨运行记录 (账号, provider, 认证方式) 最近一次成功签到的时间，
+用于跳过同一签到日内已经完成的签到
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+from utils.config import ProviderConfig
+
+
+class CheckInLedger:
+    """签到记录"""
+
+    def __init__(self, ledger_file: str = "checkin_ledger.json"):
+        """初始化
+
+        Args:
+            ledger_file: 记录文件路径
+        """
+        self.ledger_file = ledger_file
+        self.entries: dict[str, dict] = self._load()
+
+    def _load(self) -> dict[str, dict]:
+        """加载记录文件"""
+        try:
+            if os.path.exists(self.ledger_file):
+                with open(self.ledger_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        return data
+        except Exception as e:
+            print(f"⚠️ Failed to load check-in ledger: {e}")
+        return {}
+
+    def save(self) -> None:
+        """保存记录文件"""
+        try:
+            with open(self.ledger_file, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+        except Exception as e:
+            print(f"Warning: Failed to save check-in ledger: {e}")
+
+    @staticmethod
+    def make_key(account_name: str, provider_name: str, method: str) -> str:
+        """生成记录键"""
+        return f"{provider_name}|{account_name}|{method}"
+
+    def get_entry(self, account_name: str, provider_name: str, method: str) -> dict | None:
+        """获取记录"""
+        return self.entries.get(self.make_key(account_name, provider_name, method))
+
+    def is_done_today(
+        self,
+        account_name: str,
+        provider_config: ProviderConfig,
+        method: str,
+        now: datetime | None = None,
+    ) -> bool:
+        """判断在 provider 的当前签到日内是否已经成功签到
+
+        Args:
+            account_name: 账号名称
+            provider_config: provider 配置（用于确定时区）
+            method: 认证方式
+            now: 当前时间，默认为系统当前时间
+        """
+        entry = self.get_entry(account_name, provider_config.name, method)
+        if not entry or not entry.get("timestamp"):
+            return False
+
+        try:
+            last_success = datetime.fromisoformat(entry["timestamp"])
+        except (TypeError, ValueError):
+            return False
+
+        return provider_config.get_provider_day(last_success) == provider_config.get_provider_day(now)
+
+    def get_user_info(self, account_name: str, provider_name: str, method: str) -> dict | None:
+        """获取上次成功签到时记录的用户信息"""
+        entry = self.get_entry(account_name, provider_name, method)
+        if not entry:
+            return None
+        return entry.get("user_info")
+
+    def record_success(
+        self,
+        account_name: str,
+        provider_name: str,
+        method: str,
+        user_info: dict | None,
+        now: datetime | None = None,
+    ) -> None:
+        """记录一次成功签到
+
+        Args:
+            account_name: 账号名称
+            provider_name: provider 名称
+            method: 认证方式
+            user_info: 签到后获取到的用户信息
+            now: 签到时间，默认为系统当前时间
+        """
+        moment = now or datetime.now(timezone.utc)
+        self.entries[self.make_key(account_name, provider_name, method)] = {
+            "timestamp": moment.isoformat(),
+            "user_info": user_info,
+        }
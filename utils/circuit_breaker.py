@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Provider 熔断模块
+
+按 origin 统计连续的连接失败和 5xx 响应，达到阈值后熔断：同一进程中后续发往该 origin 的请求立即失败，
+不再等待超时；冷却时间过后放行一个探测请求，成功则恢复，失败则继续熔断。
+通过代理请求时，连不上代理或代理拒绝转发属于代理故障，不计入 origin 的失败次数
+"""
+
+import os
+import threading
+import time
+
+import httpx
+from httpx._utils import get_environment_proxies
+
+# 默认连续失败次数阈值
+DEFAULT_FAILURE_THRESHOLD = 3
+
+# 默认熔断冷却时间（秒）
+DEFAULT_COOLDOWN_SECONDS = 60
+
+# 熔断状态
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class ProviderUnavailableError(Exception):
+    """origin 处于熔断状态，请求未发送"""
+
+    def __init__(self, origin: str):
+        self.origin = origin
+        super().__init__(f"Provider unavailable: {origin} is failing, request skipped")
+
+
+def _get_int_env(env_name: str, default: int) -> int:
+    """从环境变量读取整数配置"""
+    value = os.getenv(env_name, "").strip()
+    if not value:
+        return default
+    try:
+        return max(1, int(value))
+    except ValueError:
+        print(f"⚠️ Invalid {env_name} value '{value}', using default {default}")
+        return default
+
+
+def get_origin(url: httpx.URL | str) -> str:
+    """获取 URL 的 origin（scheme://host[:port]）"""
+    url = httpx.URL(url)
+    port = f":{url.port}" if url.port else ""
+    return f"{url.scheme}://{url.host}{port}"
+
+
+class CircuitBreaker:
+    """按 origin 管理熔断状态（线程安全，HTTP 通道的多个线程共享）"""
+
+    def __init__(self, failure_threshold: int | None = None, cooldown_seconds: int | None = None):
+        """初始化
+
+        Args:
+            failure_threshold: 连续失败次数阈值，默认读取 CIRCUIT_BREAKER_THRESHOLD
+            cooldown_seconds: 熔断冷却时间（秒），默认读取 CIRCUIT_BREAKER_COOLDOWN
+        """
+        self.failure_threshold = failure_threshold or _get_int_env(
+            "CIRCUIT_BREAKER_THRESHOLD", DEFAULT_FAILURE_THRESHOLD
+        )
+        self.cooldown_seconds = cooldown_seconds or _get_int_env("CIRCUIT_BREAKER_COOLDOWN", DEFAULT_COOLDOWN_SECONDS)
+        # {origin: {"state", "failures", "opened_at", "probing"}}
+        self._circuits: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _get_circuit(self, origin: str) -> dict:
+        return self._circuits.setdefault(
+            origin, {"state": STATE_CLOSED, "failures": 0, "opened_at": 0.0, "probing": False}
+        )
+
+    def is_open(self, origin: str, now: float | None = None) -> bool:
+        """origin 是否处于熔断状态（冷却中，或半开且已有探测请求在进行）"""
+        with self._lock:
+            circuit = self._circuits.get(origin)
+            if not circuit or circuit["state"] == STATE_CLOSED:
+                return False
+            now = now if now is not None else time.monotonic()
+            return now - circuit["opened_at"] < self.cooldown_seconds or circuit["probing"]
+
+    def allow_request(self, origin: str, now: float | None = None) -> bool:
+        """判断是否允许向 origin 发送请求
+
+        关闭状态总是允许；熔断冷却时间过后只放行一个探测请求，探测结束前其它请求仍然拒绝
+        """
+        with self._lock:
+            circuit = self._get_circuit(origin)
+            if circuit["state"] == STATE_CLOSED:
+                return True
+            now = now if now is not None else time.monotonic()
+            if now - circuit["opened_at"] < self.cooldown_seconds or circuit["probing"]:
+                return False
+            circuit["state"] = STATE_HALF_OPEN
+            circuit["probing"] = True
+            return True
+
+    def record_success(self, origin: str) -> None:
+        """记录成功请求，关闭熔断"""
+        with self._lock:
+            circuit = self._get_circuit(origin)
+            if circuit["state"] != STATE_CLOSED:
+                print(f"✅ Provider {origin} recovered, closing circuit")
+            circuit.update(state=STATE_CLOSED, failures=0, probing=False)
+
+    def record_failure(self, origin: str, now: float | None = None) -> None:
+        """记录失败请求，连续失败达到阈值或探测请求失败时熔断"""
+        with self._lock:
+            circuit = self._get_circuit(origin)
+            circuit["failures"] += 1
+            if circuit["state"] == STATE_HALF_OPEN or circuit["failures"] >= self.failure_threshold:
+                if circuit["state"] == STATE_CLOSED:
+                    print(
+                        f"⚠️ Provider {origin} failed {circuit['failures']} times in a row, "
+                        f"failing fast for {self.cooldown_seconds}s"
+                    )
+                circuit.update(
+                    state=STATE_OPEN,
+                    opened_at=now if now is not None else time.monotonic(),
+                    probing=False,
+                )
+
+    def release_probe(self, origin: str) -> None:
+        """探测请求未能得出结果（例如代理故障）时释放探测，下一个请求重新探测"""
+        with self._lock:
+            circuit = self._circuits.get(origin)
+            if circuit:
+                circuit["probing"] = False
+
+    def trip(self, origin: str, now: float | None = None) -> None:
+        """直接熔断 origin（例如启动前的探测已确认不可用）"""
+        with self._lock:
+            circuit = self._get_circuit(origin)
+            circuit.update(
+                state=STATE_OPEN,
+                failures=max(circuit["failures"], self.failure_threshold),
+                opened_at=now if now is not None else time.monotonic(),
+                probing=False,
+            )
+
+    def get_open_circuits(self, since: float | None = None, now: float | None = None) -> dict[str, float]:
+        """导出熔断中的 origin，用于在进程之间传递熔断状态
+
+        Args:
+            since: 可选，只导出在该时间（time.monotonic）之后熔断的 origin
+            now: 当前时间，默认为 time.monotonic()
+
+        Returns:
+            {origin: 已熔断的秒数}
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            return {
+                origin: now - circuit["opened_at"]
+                for origin, circuit in self._circuits.items()
+                if circuit["state"] == STATE_OPEN and (since is None or circuit["opened_at"] >= since)
+            }
+
+    def merge_open_circuits(self, circuits: dict[str, float], now: float | None = None) -> None:
+        """合并其它进程导出的熔断状态，保留熔断时间，冷却时间过后同样进入半开状态
+
+        本地已经关闭、或熔断时间更早的 origin 采用导出的状态；半开（探测中）的 origin 不变
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            for origin, elapsed in circuits.items():
+                opened_at = now - elapsed
+                circuit = self._get_circuit(origin)
+                if circuit["state"] == STATE_HALF_OPEN:
+                    continue
+                if circuit["state"] == STATE_OPEN and circuit["opened_at"] >= opened_at:
+                    continue
+                circuit.update(
+                    state=STATE_OPEN,
+                    failures=max(circuit["failures"], self.failure_threshold),
+                    opened_at=opened_at,
+                    probing=False,
+                )
+
+
+# 当前进程共享的熔断状态
+circuit_breaker = CircuitBreaker()
+
+
+class CircuitBreakerTransport(httpx.HTTPTransport):
+    """在发送请求前检查熔断状态，并根据结果更新熔断状态的 httpx 传输"""
+
+    def __init__(self, breaker: CircuitBreaker | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.breaker = breaker or circuit_breaker
+        self.proxied = kwargs.get("proxy") is not None
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        origin = get_origin(request.url)
+        if not self.breaker.allow_request(origin):
+            raise ProviderUnavailableError(origin)
+
+        try:
+            response = super().handle_request(request)
+        except (httpx.ProxyError, httpx.ConnectError):
+            # 使用代理时连接错误发生在代理一侧，不能说明 origin 不可用（由代理池故障转移处理）
+            if self.proxied:
+                self.breaker.release_probe(origin)
+            else:
+                self.breaker.record_failure(origin)
+            raise
+        except httpx.TransportError:
+            self.breaker.record_failure(origin)
+            raise
+
+        if response.status_code >= 500:
+            self.breaker.record_failure(origin)
+        else:
+            self.breaker.record_success(origin)
+        return response
+
+
+class _SharedTransport(CircuitBreakerTransport):
+    """多个客户端共用的传输，客户端关闭时保留连接池（由 close_shared_transports 关闭）"""
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def close_pool(self) -> None:
+        super().close()
+
+
+# 共享的传输 {(代理地址, 是否启用 HTTP/2): _SharedTransport}，为 None 时不共享
+_shared_transports: dict[tuple[str, bool], _SharedTransport] | None = None
+_shared_transports_lock = threading.Lock()
+
+
+def set_transport_sharing(enabled: bool) -> None:
+    """启用或停用连接池共享
+
+    常驻模式下启用后，同一代理的客户端共用连接池，多次运行之间保持连接（cookies 仍然属于各自的客户端）；
+    停用时关闭已有的共享传输
+    """
+    global _shared_transports
+    with _shared_transports_lock:
+        if enabled and _shared_transports is None:
+            _shared_transports = {}
+            return
+    if not enabled:
+        close_shared_transports()
+        with _shared_transports_lock:
+            _shared_transports = None
+
+
+def close_shared_transports() -> None:
+    """关闭所有共享的传输（共享保持启用时，后续请求会重新建立连接池）"""
+    with _shared_transports_lock:
+        transports = list((_shared_transports or {}).values())
+        if _shared_transports:
+            _shared_transports.clear()
+    for transport in transports:
+        transport.close_pool()
+
+
+def _get_transport(proxy: httpx.URL | None, http2: bool) -> CircuitBreakerTransport:
+    """获取传输，启用共享时按代理和 HTTP/2 复用"""
+    with _shared_transports_lock:
+        if _shared_transports is None:
+            return CircuitBreakerTransport(http2=http2, proxy=proxy)
+        key = (str(proxy) if proxy else "", http2)
+        transport = _shared_transports.get(key)
+        if transport is None:
+            transport = _SharedTransport(http2=http2, proxy=proxy)
+            _shared_transports[key] = transport
+        return transport
+
+
+def _get_env_mounts(http2: bool) -> dict[str, CircuitBreakerTransport | None]:
+    """按环境变量中的代理（HTTP_PROXY、HTTPS_PROXY、ALL_PROXY、NO_PROXY）挂载传输
+
+    传入 transport 时 httpx 不再读取环境变量中的代理，这里按 httpx 相同的规则为每个代理挂载经过熔断检查的传输；
+    NO_PROXY 中的地址挂载为 None，即使用客户端默认的直连传输
+    """
+    return {
+        pattern: _get_transport(httpx.URL(url), http2) if url else None
+        for pattern, url in get_environment_proxies().items()
+    }
+
+
+def create_http_client(
+    proxy: httpx.URL | None = None,
+    timeout: float = 30.0,
+    http2: bool = True,
+) -> httpx.Client:
+    """创建经过熔断检查的 httpx 客户端
+
+    Args:
+        proxy: 代理地址，为空时使用环境变量中的代理（与 httpx 默认行为一致）
+        timeout: 超时时间（秒）
+        http2: 是否启用 HTTP/2
+
+    Returns:
+        httpx.Client
+    """
+    mounts = _get_env_mounts(http2) if proxy is None else None
+    return httpx.Client(timeout=timeout, transport=_get_transport(proxy, http2), mounts=mounts)
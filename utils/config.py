@@ -6,10 +6,15 @@
 import json
 import os
 from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone as dt_timezone, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from typing import Callable, Dict, Generator, List, Literal
 
+from utils.deadline import Deadline
 from utils.signature import aiai_li_sign_in_url
 from utils.get_cdk import (
+    BROWSER_CDK_GETTERS,
+    CDK_ORIGINS,
     get_b4u_cdk,
     get_runawaytime_checkin_cdk,
     get_runawaytime_wheel_cdk,
@@ -19,8 +24,19 @@ from utils.get_cdk import (
 
 # 前向声明 AccountConfig 类型，用于类型注解
 # 实际的 AccountConfig 类在后面定义
-# 定义 CDK 获取函数的类型：接收 AccountConfig 参数，返回 str | List[str] | None
-CdkGetterFunc = Callable[["AccountConfig"], str | List[str] | None]
+# 定义 CDK 获取函数的类型：接收 AccountConfig 参数（以及可选的 deadline 关键字参数），返回 str | List[str] | None
+CdkGetterFunc = Callable[..., str | List[str] | None]
+
+
+def _parse_reset_time(value: str) -> timedelta | None:
+    """解析 HH:MM 格式的每日重置时间，格式无效时返回 None"""
+    try:
+        hours, minutes = (int(part) for part in str(value).split(":"))
+    except ValueError:
+        return None
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        return None
+    return timedelta(hours=hours, minutes=minutes)
 
 
 @dataclass
@@ -42,7 +58,12 @@ class ProviderConfig:
     linuxdo_client_id: str | None = None
     linuxdo_auth_path: str = "/api/oauth/lunuxdo",
     aliyun_captcha: bool = False
-    bypass_method: Literal["waf_cookies"] | None = None
+    bypass_method: Literal["waf_cookies", "auto"] | None = None
+    timezone: str = "Asia/Shanghai"
+    # 每日重置时间（provider 时区，HH:MM），签到日从该时间开始
+    reset_time: str = "00:00"
+    # 同时处理该 provider 账号的最大任务组数，None 时使用 PROVIDER_CONCURRENCY
+    max_concurrency: int | None = None
 
     @classmethod
     def from_dict(cls, name: str, data: dict) -> "ProviderConfig":
@@ -51,7 +72,13 @@ class ProviderConfig:
         配置格式:
         - 基础: {"origin": "https://example.com"}
         - 完整: {"origin": "https://example.com", "login_path": "/login", "api_user_key": "x-api-user", "bypass_method": "waf_cookies", ...}
+
+        bypass_method 为 "auto" 时根据探测结果决定是否需要 WAF cookies；未配置时不获取 WAF cookies
         """
+        reset_time = data.get("reset_time", "00:00")
+        if _parse_reset_time(reset_time) is None:
+            print(f"⚠️ Invalid reset_time '{reset_time}' of provider '{name}', using 00:00")
+            reset_time = "00:00"
         return cls(
             name=name,
             origin=data["origin"],
@@ -69,12 +96,19 @@ class ProviderConfig:
             linuxdo_auth_path=data.get("linuxdo_auth_path", "/api/oauth/linuxdo"),
             aliyun_captcha=data.get("aliyun_captcha", False),
             bypass_method=data.get("bypass_method"),
+            timezone=data.get("timezone", "Asia/Shanghai"),
+            reset_time=reset_time,
+            max_concurrency=data.get("max_concurrency"),
         )
 
     def needs_waf_cookies(self) -> bool:
-        """判断是否需要获取 WAF cookies"""
+        """判断是否总是需要获取 WAF cookies"""
         return self.bypass_method == "waf_cookies"
 
+    def is_waf_adaptive(self) -> bool:
+        """判断是否先通过 HTTP 探测 WAF 挑战，再决定是否需要获取 WAF cookies"""
+        return self.bypass_method == "auto"
+
     def needs_manual_check_in(self) -> bool:
         """判断是否需要手动调用签到接口"""
         return self.sign_in_path is not None
@@ -86,6 +120,66 @@ class ProviderConfig:
         """
         return self.topup_path is not None and self.get_cdk is not None
 
+    def needs_browser_cdk(self) -> bool:
+        """判断充值流程中的 CDK 获取是否需要启动浏览器"""
+        if not self.needs_manual_topup():
+            return False
+        getters = self.get_cdk if isinstance(self.get_cdk, list) else [self.get_cdk]
+        return any(getter in BROWSER_CDK_GETTERS for getter in getters)
+
+    def get_cdk_origins(self) -> list[str]:
+        """获取充值流程中 CDK 获取函数访问的站点"""
+        if not self.needs_manual_topup():
+            return []
+        getters = self.get_cdk if isinstance(self.get_cdk, list) else [self.get_cdk]
+        origins = [CDK_ORIGINS[getter] for getter in getters if getter in CDK_ORIGINS]
+        return list(dict.fromkeys(origins))
+
+    def get_tzinfo(self) -> tzinfo:
+        """获取 provider 所在时区
+
+        Windows 等缺少时区数据库的环境下，Asia/Shanghai 回退为固定的 UTC+8
+        """
+        try:
+            return ZoneInfo(self.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            if self.timezone == "Asia/Shanghai":
+                return dt_timezone(timedelta(hours=8), self.timezone)
+            print(f"⚠️ Timezone '{self.timezone}' of provider '{self.name}' not found, using UTC")
+            return dt_timezone.utc
+
+    def get_reset_offset(self) -> timedelta:
+        """获取每日重置时间相对 provider 时区零点的偏移，格式无效时按零点处理"""
+        return _parse_reset_time(self.reset_time) or timedelta()
+
+    def get_provider_day(self, moment: datetime | None = None) -> date:
+        """获取指定时间在 provider 时区中所属的签到日（每日重置时间之前属于前一天）
+
+        Args:
+            moment: 时间点，默认为当前时间
+        """
+        moment = moment or datetime.now(dt_timezone.utc)
+        return (moment.astimezone(self.get_tzinfo()) - self.get_reset_offset()).date()
+
+    def get_last_reset(self, moment: datetime | None = None) -> datetime:
+        """获取指定时间所属签到日的开始时间（最近一次每日重置时间）
+
+        Args:
+            moment: 时间点，默认为当前时间
+        """
+        day_start = datetime.combine(self.get_provider_day(moment), datetime.min.time(), tzinfo=self.get_tzinfo())
+        return day_start + self.get_reset_offset()
+
+    def get_next_reset(self, moment: datetime | None = None) -> datetime:
+        """获取指定时间之后 provider 的下一次每日重置时间（即下一个签到日开始）
+
+        Args:
+            moment: 时间点，默认为当前时间
+        """
+        next_day = self.get_provider_day(moment) + timedelta(days=1)
+        day_start = datetime.combine(next_day, datetime.min.time(), tzinfo=self.get_tzinfo())
+        return day_start + self.get_reset_offset()
+
     def get_login_url(self) -> str:
         """获取登录 URL"""
         return f"{self.origin}{self.login_path}"
@@ -137,7 +231,11 @@ class ProviderConfig:
         """获取 LinuxDo 认证 URL"""
         return f"{self.origin}{self.linuxdo_auth_path}"
 
-    def iter_get_cdk(self, account_config: "AccountConfig") -> Generator[List[str], None, None]:
+    def iter_get_cdk(
+        self,
+        account_config: "AccountConfig",
+        deadline: Deadline | None = None,
+    ) -> Generator[List[str], None, None]:
         """迭代获取 CDK（生成器方式）
         
         每次调用一个 get_cdk 函数，将结果统一转换为 list[str] 后 yield 返回
@@ -145,6 +243,7 @@ class ProviderConfig:
         
         Args:
             account_config: 账号配置对象
+            deadline: 账号截止时间（可选），传递给每个 get_cdk 函数
         
         Yields:
             List[str]: CDK 字符串列表（每次 yield 一个 get_cdk 函数的结果）
@@ -154,7 +253,7 @@ class ProviderConfig:
         
         # 如果是单个函数
         if callable(self.get_cdk):
-            result = self.get_cdk(account_config)
+            result = self.get_cdk(account_config, deadline=deadline)
             if result:
                 if isinstance(result, list):
                     yield result
@@ -166,7 +265,7 @@ class ProviderConfig:
         if isinstance(self.get_cdk, list):
             for func in self.get_cdk:
                 if callable(func):
-                    result = func(account_config)
+                    result = func(account_config, deadline=deadline)
                     if result:
                         if isinstance(result, list):
                             yield result
@@ -311,7 +410,7 @@ class AppConfig:
                 linuxdo_client_id="8w2uZtoWH9AUXrZr1qeCEEmvXLafea3c",
                 linuxdo_auth_path="/api/oauth/linuxdo",
                 aliyun_captcha=False,
-                bypass_method="waf_cookies",
+                bypass_method="auto",
             ),
             "agentrouter": ProviderConfig(
                 name="agentrouter",
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Cookie 回写模块
+
+cookies 方式签到时，provider 通过 Set-Cookie 刷新的会话 cookies 会加密保存到本地，
+后续运行优先使用保存的 cookies，配置中的 cookies 过期后账号仍可以继续走 HTTP 签到
+"""
+
+import base64
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from cryptography.fernet import Fernet, InvalidToken
+
+
+def get_cookie_store_secret() -> str | None:
+    """获取加密密钥来源 COOKIE_STORE_KEY
+
+    必须单独设置，不使用 ACCOUNTS 等会被修改的配置，避免修改账号配置后已保存的 cookies 和会话无法解密
+    """
+    return os.getenv("COOKIE_STORE_KEY", "").strip() or None
+
+
+def create_fernet(secret: str | None) -> Fernet | None:
+    """根据密钥来源创建 Fernet，为空时返回 None（不读写加密缓存）"""
+    if not secret:
+        return None
+    return Fernet(base64.urlsafe_b64encode(hashlib.sha256(secret.encode("utf-8")).digest()))
+
+
+def fingerprint_cookies(cookies: dict) -> str:
+    """计算配置 cookies 的指纹，配置被手动更新后保存的 cookies 失效"""
+    cookies_json = json.dumps(cookies, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(cookies_json.encode("utf-8")).hexdigest()[:16]
+
+
+class CookieStore:
+    """加密保存的 provider cookies"""
+
+    def __init__(self, store_file: str = "storage-states/provider_cookies.enc", secret: str | None = None):
+        """初始化
+
+        Args:
+            store_file: 缓存文件路径，默认与 storage state 放在同一目录以便一起缓存
+            secret: 加密密钥来源，为空时不读写缓存
+        """
+        self.store_file = store_file
+        self._fernet = create_fernet(secret)
+        self.entries: dict[str, dict] = self._load()
+
+    @property
+    def enabled(self) -> bool:
+        """是否配置了加密密钥"""
+        return self._fernet is not None
+
+    def _load(self) -> dict[str, dict]:
+        """加载并解密缓存文件"""
+        if not self.enabled or not os.path.exists(self.store_file):
+            return {}
+        try:
+            with open(self.store_file, "rb") as f:
+                data = json.loads(self._fernet.decrypt(f.read()))
+                if isinstance(data, dict):
+                    return data
+        except InvalidToken:
+            print("⚠️ Failed to decrypt cookie store (key changed?), ignoring stored cookies")
+        except Exception as e:
+            print(f"⚠️ Failed to load cookie store: {e}")
+        return {}
+
+    def save(self) -> None:
+        """加密保存缓存文件"""
+        if not self.enabled:
+            return
+        try:
+            store_dir = os.path.dirname(self.store_file)
+            if store_dir:
+                os.makedirs(store_dir, exist_ok=True)
+            data = json.dumps(self.entries, ensure_ascii=False, sort_keys=True).encode("utf-8")
+            with open(self.store_file, "wb") as f:
+                f.write(self._fernet.encrypt(data))
+        except Exception as e:
+            print(f"Warning: Failed to save cookie store: {e}")
+
+    @staticmethod
+    def make_key(account_name: str, provider_name: str) -> str:
+        """生成缓存键"""
+        return f"{provider_name}|{account_name}"
+
+    def get(
+        self,
+        account_name: str,
+        provider_name: str,
+        configured_cookies: dict,
+        now: float | None = None,
+    ) -> dict | None:
+        """获取保存的 cookies
+
+        Args:
+            account_name: 账号名称
+            provider_name: provider 名称
+            configured_cookies: 配置中的 cookies，与保存时不一致说明配置已更新，此时使用配置
+            now: 当前时间戳，默认为当前时间
+
+        Returns:
+            保存的 cookies，没有缓存、已过期或配置已更新时返回 None
+        """
+        key = self.make_key(account_name, provider_name)
+        entry = self.entries.get(key)
+        if not entry or not entry.get("cookies"):
+            return None
+        if entry.get("source") != fingerprint_cookies(configured_cookies):
+            self.entries.pop(key, None)
+            return None
+        expires_at = entry.get("expires_at")
+        if expires_at is not None and (now if now is not None else time.time()) >= expires_at:
+            self.entries.pop(key, None)
+            return None
+        return entry["cookies"]
+
+    def set(
+        self,
+        account_name: str,
+        provider_name: str,
+        cookies: dict,
+        configured_cookies: dict,
+        expires_at: float | None = None,
+    ) -> None:
+        """保存 cookies
+
+        Args:
+            account_name: 账号名称
+            provider_name: provider 名称
+            cookies: 签到后的 cookies（只保存配置中出现的 cookie 名称）
+            configured_cookies: 配置中的 cookies
+            expires_at: 会话 cookie 的过期时间戳，未知时沿用已有记录
+        """
+        key = self.make_key(account_name, provider_name)
+        previous = self.entries.get(key) or {}
+        self.entries[key] = {
+            "cookies": {name: cookies.get(name, value) for name, value in configured_cookies.items()},
+            "source": fingerprint_cookies(configured_cookies),
+            "expires_at": expires_at if expires_at is not None else previous.get("expires_at"),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def remove(self, account_name: str, provider_name: str) -> None:
+        """删除 cookies"""
+        self.entries.pop(self.make_key(account_name, provider_name), None)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+账号截止时间模块
+
+每个账号开始处理时创建一个截止时间，传递给签到、登录和 CDK 获取的每个步骤：
+各步骤的超时不超过剩余时间，截止时间到达后正在进行的浏览器操作被取消并关闭
+"""
+
+import asyncio
+import math
+import os
+import time
+
+# 默认每个账号的处理时间上限（秒）
+DEFAULT_ACCOUNT_DEADLINE = 600
+
+
+class DeadlineExceededError(Exception):
+    """账号处理时间已用完"""
+
+    def __init__(self, message: str = "Account deadline exceeded"):
+        super().__init__(message)
+
+
+def get_account_deadline_seconds(env_name: str = "ACCOUNT_DEADLINE") -> float | None:
+    """从环境变量获取每个账号的处理时间上限（秒），设置为 0 时不限制"""
+    value = os.getenv(env_name, "").strip()
+    if not value:
+        return DEFAULT_ACCOUNT_DEADLINE
+    try:
+        seconds = float(value)
+    except ValueError:
+        print(f"⚠️ Invalid {env_name} value '{value}', using default {DEFAULT_ACCOUNT_DEADLINE}s")
+        return DEFAULT_ACCOUNT_DEADLINE
+    return seconds if seconds > 0 else None
+
+
+class Deadline:
+    """截止时间（基于 time.monotonic，只在创建它的进程内有效）"""
+
+    def __init__(self, seconds: float | None = None, now: float | None = None):
+        """初始化
+
+        Args:
+            seconds: 从现在开始的可用时间（秒），None 表示不限制
+            now: 当前时间，默认为 time.monotonic()
+        """
+        start = now if now is not None else time.monotonic()
+        self.expires_at = start + seconds if seconds is not None else None
+
+    def remaining(self, now: float | None = None) -> float:
+        """剩余时间（秒），不限制时为 inf"""
+        if self.expires_at is None:
+            return math.inf
+        return max(0.0, self.expires_at - (now if now is not None else time.monotonic()))
+
+    def expired(self, now: float | None = None) -> bool:
+        """是否已到截止时间"""
+        return self.remaining(now) <= 0
+
+    def check(self) -> None:
+        """已到截止时间时抛出 DeadlineExceededError"""
+        if self.expired():
+            raise DeadlineExceededError()
+
+    def clip(self, timeout: float) -> float:
+        """将超时（秒）限制在剩余时间内"""
+        return min(timeout, self.remaining())
+
+    def clip_ms(self, timeout_ms: float) -> float:
+        """将 Playwright 超时（毫秒）限制在剩余时间内，至少保留 1 毫秒（0 在 Playwright 中表示不限制）"""
+        return max(1.0, min(timeout_ms, self.remaining() * 1000))
+
+    async def run(self, awaitable):
+        """在剩余时间内执行协程，超时后取消协程（async with 中的浏览器会被关闭）并抛出 DeadlineExceededError"""
+        if self.expired():
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceededError()
+        if self.expires_at is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.remaining())
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceededError() from e
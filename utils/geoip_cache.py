@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Camoufox geoip 缓存模块
+
+Camoufox 使用 geoip=True 启动时，每次都要通过代理请求公网 IP 接口获取出口 IP，再据此计算时区、语言和地理位置。
+同一代理的出口 IP 按代理地址缓存一段时间，之后的启动直接传入缓存的 IP（geoip="<IP>"），
+时区和地理位置由 Camoufox 从本地 GeoIP 数据库查询，不再发起网络请求。
+代理被标记为不可用或通过该代理启动浏览器失败时删除缓存的出口 IP，下次启动重新查询
+"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from utils.http_utils import proxy_resolve
+
+# 默认出口 IP 缓存时间（秒），0 表示不缓存（每次启动由 Camoufox 自行查询）
+DEFAULT_GEOIP_CACHE_TTL = 3600
+
+
+def get_geoip_cache_ttl(env_name: str = "GEOIP_CACHE_TTL") -> int:
+    """从环境变量获取出口 IP 缓存时间（秒）"""
+    value = os.getenv(env_name, "").strip()
+    if not value:
+        return DEFAULT_GEOIP_CACHE_TTL
+    try:
+        return max(0, int(value))
+    except ValueError:
+        print(f"⚠️ Invalid {env_name} value '{value}', using default {DEFAULT_GEOIP_CACHE_TTL}s")
+        return DEFAULT_GEOIP_CACHE_TTL
+
+
+def get_proxy_key(proxy_config: dict) -> str:
+    """代理的缓存 key（包含认证信息，同一代理服务器的不同账号可能对应不同的出口 IP）"""
+    return str(proxy_resolve(proxy_config) or proxy_config.get("server", ""))
+
+
+def lookup_public_ip(proxy_config: dict) -> str:
+    """通过代理查询出口 IP（与 Camoufox geoip=True 时的查询方式相同）"""
+    from camoufox.ip import Proxy, public_ip
+
+    return public_ip(Proxy(**proxy_config).as_string())
+
+
+class GeoipCache:
+    """按代理地址缓存的出口 IP（线程安全，HTTP 通道和浏览器通道的多个线程共享）"""
+
+    def __init__(self, resolver=lookup_public_ip):
+        """初始化
+
+        Args:
+            resolver: 查询出口 IP 的函数，参数为代理配置
+        """
+        self.resolver = resolver
+        # {代理 key: (出口 IP, 过期时间)}
+        self._ips: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        # {代理 key: 查询锁}，同一代理同时启动多个浏览器时只查询一次
+        self._resolve_locks: dict[str, threading.Lock] = {}
+
+    def get(self, proxy_key: str, now: float | None = None) -> str | None:
+        """获取未过期的出口 IP，没有时返回 None"""
+        with self._lock:
+            entry = self._ips.get(proxy_key)
+            if not entry:
+                return None
+            ip, expires_at = entry
+            if (now if now is not None else time.monotonic()) >= expires_at:
+                self._ips.pop(proxy_key, None)
+                return None
+            return ip
+
+    def set(self, proxy_key: str, ip: str, ttl: int, now: float | None = None) -> None:
+        """记录出口 IP"""
+        with self._lock:
+            self._ips[proxy_key] = (ip, (now if now is not None else time.monotonic()) + ttl)
+
+    def invalidate(self, proxy_key: str) -> None:
+        """删除出口 IP"""
+        with self._lock:
+            self._ips.pop(proxy_key, None)
+
+    def resolve(self, proxy_config: dict, ttl: int) -> str | None:
+        """获取代理的出口 IP，缓存过期时重新查询
+
+        Args:
+            proxy_config: 代理配置
+            ttl: 缓存时间（秒）
+
+        Returns:
+            出口 IP，查询失败时返回 None
+        """
+        proxy_key = get_proxy_key(proxy_config)
+        ip = self.get(proxy_key)
+        if ip:
+            return ip
+
+        with self._lock:
+            resolve_lock = self._resolve_locks.setdefault(proxy_key, threading.Lock())
+        with resolve_lock:
+            # 等待锁期间其它线程可能已经查询完成
+            ip = self.get(proxy_key)
+            if ip:
+                return ip
+            try:
+                ip = self.resolver(proxy_config)
+            except Exception as e:
+                print(f"⚠️ Failed to resolve egress IP via proxy {proxy_config.get('server')}: {e}")
+                return None
+            self.set(proxy_key, ip, ttl)
+            print(f"ℹ️ Resolved egress IP {ip} via proxy {proxy_config.get('server')}, cached for {ttl}s")
+            return ip
+
+
+# 当前进程共享的出口 IP 缓存
+geoip_cache = GeoipCache()
+
+
+async def get_camoufox_geoip(proxy_config: dict | None) -> str | bool:
+    """获取 Camoufox 启动参数 geoip 的值
+
+    Args:
+        proxy_config: Camoufox 使用的代理配置
+
+    Returns:
+        未使用代理时返回 False；返回缓存的出口 IP；未启用缓存或查询失败时返回 True（由 Camoufox 自行查询）
+    """
+    if not proxy_config:
+        return False
+    ttl = get_geoip_cache_ttl()
+    if ttl <= 0:
+        return True
+    ip = await asyncio.to_thread(geoip_cache.resolve, proxy_config, ttl)
+    return ip or True
+
+
+def invalidate_proxy_geoip(proxy_config: dict | None) -> None:
+    """删除代理缓存的出口 IP（代理故障或更换出口后，缓存的 IP 可能已经不正确）"""
+    if proxy_config:
+        geoip_cache.invalidate(get_proxy_key(proxy_config))
+
+
+@asynccontextmanager
+async def launch_camoufox(proxy_config: dict | None, **kwargs):
+    """启动 Camoufox，geoip 使用缓存的出口 IP；浏览器启动失败时删除该代理缓存的出口 IP
+
+    Args:
+        proxy_config: Camoufox 使用的代理配置
+        **kwargs: 其它 AsyncCamoufox 参数
+    """
+    from camoufox.async_api import AsyncCamoufox
+
+    launched = False
+    try:
+        async with AsyncCamoufox(geoip=await get_camoufox_geoip(proxy_config), proxy=proxy_config, **kwargs) as browser:
+            launched = True
+            yield browser
+    except Exception:
+        if not launched:
+            invalidate_proxy_geoip(proxy_config)
+        raise
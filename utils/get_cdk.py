@@ -9,21 +9,23 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-import httpx
-
+from utils.circuit_breaker import create_http_client
+from utils.deadline import Deadline, DeadlineExceededError
+from utils.geoip_cache import launch_camoufox
 from utils.http_utils import proxy_resolve, response_resolve
 
 if TYPE_CHECKING:
     from utils.config import AccountConfig
 
 
-def get_runawaytime_checkin_cdk(account_config: "AccountConfig") -> str | None:
+def get_runawaytime_checkin_cdk(account_config: "AccountConfig", deadline: Deadline | None = None) -> str | None:
     """获取 runawaytime 签到 CDK
     
     通过 fuli.hxi.me 签到获取 CDK
     
     Args:
         account_config: 账号配置对象，需要包含 fuli_cookies 在 extra 中
+        deadline: 账号截止时间（可选），请求超时不超过剩余时间
     
     Returns:
         str | None: CDK 字符串，如果获取失败则返回 None
@@ -37,9 +39,13 @@ def get_runawaytime_checkin_cdk(account_config: "AccountConfig") -> str | None:
         return None
     
     http_proxy = proxy_resolve(proxy)
+    deadline = deadline or Deadline()
+    if deadline.expired():
+        print(f"⏰ {account_name}: Account deadline reached, skipping CDK request")
+        return None
     
     try:
-        client = httpx.Client(http2=False, timeout=30.0, proxy=http_proxy)
+        client = create_http_client(http_proxy, http2=False)
         try:
             # 构建基础请求头
             headers = {
@@ -70,7 +76,7 @@ def get_runawaytime_checkin_cdk(account_config: "AccountConfig") -> str | None:
             status_response = client.get(
                 "https://fuli.hxi.me/api/checkin/status",
                 headers=status_headers,
-                timeout=30
+                timeout=deadline.clip(30)
             )
             
             if status_response.status_code == 200:
@@ -93,7 +99,7 @@ def get_runawaytime_checkin_cdk(account_config: "AccountConfig") -> str | None:
             response = client.post(
                 "https://fuli.hxi.me/api/checkin",
                 headers=checkin_headers,
-                timeout=30
+                timeout=deadline.clip(30)
             )
             
             if response.status_code in [200, 400]:
@@ -122,13 +128,14 @@ def get_runawaytime_checkin_cdk(account_config: "AccountConfig") -> str | None:
         return None
 
 
-def get_runawaytime_wheel_cdk(account_config: "AccountConfig") -> list[str] | None:
+def get_runawaytime_wheel_cdk(account_config: "AccountConfig", deadline: Deadline | None = None) -> list[str] | None:
     """获取 runawaytime 大转盘 CDK
     
     通过 fuli.hxi.me 大转盘获取 CDK，支持多次转盘
     
     Args:
         account_config: 账号配置对象，需要包含 fuli_cookies 在 extra 中
+        deadline: 账号截止时间（可选），请求超时不超过剩余时间
     
     Returns:
         list[str] | None: CDK 字符串列表，如果获取失败则返回 None
@@ -142,10 +149,14 @@ def get_runawaytime_wheel_cdk(account_config: "AccountConfig") -> list[str] | No
         return None
     
     http_proxy = proxy_resolve(proxy)
+    deadline = deadline or Deadline()
+    if deadline.expired():
+        print(f"⏰ {account_name}: Account deadline reached, skipping CDK request")
+        return None
     cdks: list[str] = []
     
     try:
-        client = httpx.Client(http2=False, timeout=30.0, proxy=http_proxy)
+        client = create_http_client(http_proxy, http2=False)
         try:
             # 构建基础请求头
             headers = {
@@ -176,7 +187,7 @@ def get_runawaytime_wheel_cdk(account_config: "AccountConfig") -> list[str] | No
             status_response = client.get(
                 "https://fuli.hxi.me/api/wheel/status",
                 headers=status_headers,
-                timeout=30
+                timeout=deadline.clip(30)
             )
             
             remaining = 0
@@ -206,7 +217,7 @@ def get_runawaytime_wheel_cdk(account_config: "AccountConfig") -> list[str] | No
                 response = client.post(
                     "https://fuli.hxi.me/api/wheel",
                     headers=wheel_headers,
-                    timeout=30
+                    timeout=deadline.clip(30)
                 )
                 
                 if response.status_code in [200, 400]:
@@ -246,7 +257,7 @@ def get_runawaytime_wheel_cdk(account_config: "AccountConfig") -> list[str] | No
         return cdks if cdks else None
 
 
-def get_b4u_cdk(account_config: "AccountConfig") -> list[str] | None:
+def get_b4u_cdk(account_config: "AccountConfig", deadline: Deadline | None = None) -> list[str] | None:
     """获取 b4u 大转盘抽奖 CDK
 
     通过 tw.b4u.qzz.io/luckydraw 大转盘抽奖获取 CDK
@@ -255,26 +266,44 @@ def get_b4u_cdk(account_config: "AccountConfig") -> list[str] | None:
 
     Args:
         account_config: 账号配置对象，需要包含 linux_do 认证信息
+        deadline: 账号截止时间（可选），请求超时不超过剩余时间
 
     Returns:
         list[str] | None: CDK 字符串列表，如果获取失败则返回 None
     """
     import asyncio
 
+    deadline = deadline or Deadline()
+    if deadline.expired():
+        print(f"⏰ {account_config.get_display_name()}: Account deadline reached, skipping b4u lucky draw")
+        return None
+
+    def _coroutine():
+        # 截止时间到达时取消抽奖流程，浏览器随 async with 关闭
+        return deadline.run(_get_b4u_cdk_async(account_config))
+
     # 使用 asyncio 运行异步函数
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # 如果事件循环已在运行，创建新任务
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, _get_b4u_cdk_async(account_config))
-                return future.result()
-        else:
-            return loop.run_until_complete(_get_b4u_cdk_async(account_config))
-    except RuntimeError:
-        # 没有事件循环，创建新的
-        return asyncio.run(_get_b4u_cdk_async(account_config))
+        try:
+            loop = asyncio.get_event_loop()
+            if loop.is_running():
+                # 如果事件循环已在运行，创建新任务
+                import concurrent.futures
+                with concurrent.futures.ThreadPoolExecutor() as executor:
+                    future = executor.submit(asyncio.run, _coroutine())
+                    return future.result()
+            else:
+                return loop.run_until_complete(_coroutine())
+        except RuntimeError:
+            # 没有事件循环，创建新的
+            return asyncio.run(_coroutine())
+    except DeadlineExceededError:
+        print(f"⏰ {account_config.get_display_name()}: Account deadline reached during b4u lucky draw")
+        return None
+
+
+# 需要启动浏览器的 CDK 获取函数，调度时按浏览器任务处理
+BROWSER_CDK_GETTERS = (get_b4u_cdk,)
 
 
 async def _get_b4u_cdk_async(account_config: "AccountConfig") -> list[str] | None:
@@ -290,7 +319,6 @@ async def _get_b4u_cdk_async(account_config: "AccountConfig") -> list[str] | Non
     """
     import hashlib
     import os
-    from camoufox.async_api import AsyncCamoufox
     from utils.browser_utils import take_screenshot
 
     account_name = account_config.get_display_name()
@@ -317,12 +345,11 @@ async def _get_b4u_cdk_async(account_config: "AccountConfig") -> list[str] | Non
     print(f"ℹ️ {account_name}: Starting Camoufox browser to get b4u CDK")
 
     try:
-        async with AsyncCamoufox(
+        async with launch_camoufox(
+            proxy,
             headless=True,
             humanize=True,
             locale="zh-CN",
-            geoip=True if proxy else False,
-            proxy=proxy,
         ) as browser:
             # 只有在缓存文件存在时才加载 storage_state
             storage_state = cache_file_path if os.path.exists(cache_file_path) else None
@@ -702,13 +729,14 @@ async def _get_b4u_cdk_async(account_config: "AccountConfig") -> list[str] | Non
         return None
 
 
-def get_x666_cdk(account_config: "AccountConfig") -> str | None:
+def get_x666_cdk(account_config: "AccountConfig", deadline: Deadline | None = None) -> str | None:
     """获取 x666 抽奖 CDK
 
     通过 qd.x666.me 抽奖获取 CDK
 
     Args:
         account_config: 账号配置对象，需要包含 access_token 在 extra 中
+        deadline: 账号截止时间（可选），请求超时不超过剩余时间
 
     Returns:
         str | None: CDK 字符串，如果获取失败则返回 None
@@ -722,9 +750,13 @@ def get_x666_cdk(account_config: "AccountConfig") -> str | None:
         return None
     
     http_proxy = proxy_resolve(proxy)
+    deadline = deadline or Deadline()
+    if deadline.expired():
+        print(f"⏰ {account_name}: Account deadline reached, skipping CDK request")
+        return None
     
     try:
-        client = httpx.Client(http2=False, timeout=30.0, proxy=http_proxy)
+        client = create_http_client(http_proxy, http2=False)
         try:
             # 构建基础请求头
             headers = {
@@ -757,7 +789,7 @@ def get_x666_cdk(account_config: "AccountConfig") -> str | None:
             info_response = client.post(
                 "https://qd.x666.me/api/user/info",
                 headers=info_headers,
-                timeout=30
+                timeout=deadline.clip(30)
             )
             
             if info_response.status_code == 200:
@@ -793,7 +825,7 @@ def get_x666_cdk(account_config: "AccountConfig") -> str | None:
             response = client.post(
                 "https://qd.x666.me/api/lottery/spin",
                 headers=spin_headers,
-                timeout=30
+                timeout=deadline.clip(30)
             )
             
             if response.status_code in [200, 400]:
@@ -821,4 +853,13 @@ def get_x666_cdk(account_config: "AccountConfig") -> str | None:
             client.close()
     except Exception as e:
         print(f"❌ {account_name}: Error getting x666 CDK - {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+# 各 CDK 获取函数访问的站点，用于启动前的健康探测
+CDK_ORIGINS = {
+    get_runawaytime_checkin_cdk: "https://fuli.hxi.me",
+    get_runawaytime_wheel_cdk: "https://fuli.hxi.me",
+    get_b4u_cdk: "https://tw.b4u.qzz.io",
+    get_x666_cdk: "https://qd.x666.me",
+}
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+启动前健康探测模块
+
+签到开始前并发探测本次用到的所有 provider（/api/status）和 CDK 站点，根据结果决定每个站点
+正常处理、延后处理还是直接跳过，并按测得的延迟设置本次运行中该站点的请求超时和并发数。
+每个站点通过访问它的账号实际使用的代理（账号代理、代理池分配的代理或全局代理）探测，任一代理可达即视为站点可用
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from utils.browser_utils import get_random_user_agent
+from utils.http_utils import proxy_resolve
+
+# 探测结论
+DECISION_PROCESS = "process"
+DECISION_DEFER = "defer"
+DECISION_SKIP = "skip"
+
+# 探测请求超时（秒）
+PROBE_TIMEOUT = 10.0
+
+# 延迟超过该值（秒）的站点延后处理
+SLOW_LATENCY_SECONDS = 3.0
+
+# 请求超时 = 延迟 * 倍数，限制在最小值和最大值之间
+TIMEOUT_LATENCY_MULTIPLIER = 10
+MIN_REQUEST_TIMEOUT = 15.0
+MAX_REQUEST_TIMEOUT = 60.0
+
+# 延后处理站点的最大并发账号数
+DEFERRED_CONCURRENCY = 2
+
+
+@dataclass
+class OriginHealth:
+    """单个站点的探测结果"""
+
+    origin: str
+    latency: float | None
+    decision: str
+    request_timeout: float
+    # 该站点同时执行的账号数上限，None 表示使用通道默认并发数
+    concurrency: int | None = None
+    status_code: int | None = None
+    error: str | None = None
+
+
+def is_preflight_enabled(env_name: str = "PREFLIGHT_PROBE") -> bool:
+    """是否启用启动前健康探测（默认启用）"""
+    return os.getenv(env_name, "true").strip().lower() != "false"
+
+
+def evaluate_health(
+    origin: str,
+    latency: float | None,
+    status_code: int | None = None,
+    error: str | None = None,
+) -> OriginHealth:
+    """根据探测结果决定站点的处理方式
+
+    连接失败、超时或返回 5xx 时跳过；延迟超过 SLOW_LATENCY_SECONDS 时延后处理并限制并发；
+    其它响应（包括 WAF 挑战页面和 4xx）说明站点可达，正常处理
+
+    Args:
+        origin: 站点 origin
+        latency: 响应耗时（秒），请求失败时为 None
+        status_code: 响应状态码
+        error: 请求失败原因
+
+    Returns:
+        OriginHealth
+    """
+    if latency is None or error or (status_code is not None and status_code >= 500):
+        return OriginHealth(
+            origin=origin,
+            latency=latency,
+            decision=DECISION_SKIP,
+            request_timeout=MIN_REQUEST_TIMEOUT,
+            status_code=status_code,
+            error=error or f"HTTP {status_code}",
+        )
+
+    request_timeout = min(MAX_REQUEST_TIMEOUT, max(MIN_REQUEST_TIMEOUT, latency * TIMEOUT_LATENCY_MULTIPLIER))
+    if latency > SLOW_LATENCY_SECONDS:
+        return OriginHealth(
+            origin=origin,
+            latency=latency,
+            decision=DECISION_DEFER,
+            request_timeout=request_timeout,
+            concurrency=DEFERRED_CONCURRENCY,
+            status_code=status_code,
+        )
+    return OriginHealth(
+        origin=origin,
+        latency=latency,
+        decision=DECISION_PROCESS,
+        request_timeout=request_timeout,
+        status_code=status_code,
+    )
+
+
+def probe_origin(origin: str, probe_url: str, proxy_config: dict | None = None) -> OriginHealth:
+    """探测单个站点
+
+    Args:
+        origin: 站点 origin
+        probe_url: 探测地址
+        proxy_config: 代理配置
+
+    Returns:
+        OriginHealth
+    """
+    start_time = time.monotonic()
+    try:
+        with httpx.Client(http2=True, timeout=PROBE_TIMEOUT, proxy=proxy_resolve(proxy_config)) as client:
+            response = client.get(
+                probe_url,
+                headers={"User-Agent": get_random_user_agent(), "Accept": "application/json, text/plain, */*"},
+            )
+        return evaluate_health(origin, time.monotonic() - start_time, response.status_code)
+    except Exception as e:
+        return evaluate_health(origin, None, error=f"{type(e).__name__}: {e}")
+
+
+def merge_health(results: list[OriginHealth]) -> OriginHealth:
+    """合并同一站点通过多个代理的探测结果
+
+    站点的可用性取最好的结果（某个代理不可达说明该代理有问题，由代理池故障转移处理），
+    请求超时取最大值，保证最慢的代理也有足够的时间
+    """
+    order = {DECISION_PROCESS: 0, DECISION_DEFER: 1, DECISION_SKIP: 2}
+    best = min(results, key=lambda result: (order[result.decision], result.latency or 0))
+    reachable = [result for result in results if result.decision != DECISION_SKIP]
+    if reachable:
+        best.request_timeout = max(result.request_timeout for result in reachable)
+    return best
+
+
+def _get_proxy_id(proxy_config: dict | None) -> tuple:
+    """代理配置的去重 key"""
+    return tuple(sorted((proxy_config or {}).items()))
+
+
+async def preflight_probe(
+    probe_urls: dict[str, str],
+    proxy_config: dict | None = None,
+    concurrency: int = 16,
+    origin_proxies: dict[str, list[dict | None]] | None = None,
+) -> dict[str, OriginHealth]:
+    """并发探测所有站点
+
+    Args:
+        probe_urls: {站点 origin: 探测地址}
+        proxy_config: 代理配置，用于 origin_proxies 中没有列出的站点
+        concurrency: 最大并发数
+        origin_proxies: 可选，{站点 origin: 访问该站点的账号使用的代理配置列表}，每个站点通过其中每个代理探测
+
+    Returns:
+        {站点 origin: OriginHealth}
+    """
+    if not probe_urls:
+        return {}
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _probe(origin: str, probe_url: str, proxy: dict | None) -> OriginHealth:
+        async with semaphore:
+            return await asyncio.to_thread(probe_origin, origin, probe_url, proxy)
+
+    tasks = []
+    for origin, probe_url in probe_urls.items():
+        proxies = (origin_proxies or {}).get(origin) or [proxy_config]
+        unique_proxies = {_get_proxy_id(proxy): proxy for proxy in proxies}
+        tasks.extend(_probe(origin, probe_url, proxy) for proxy in unique_proxies.values())
+
+    grouped: dict[str, list[OriginHealth]] = {}
+    for result in await asyncio.gather(*tasks):
+        grouped.setdefault(result.origin, []).append(result)
+    results = [merge_health(origin_results) for origin_results in grouped.values()]
+    health = {result.origin: result for result in results}
+
+    print("🩺 Pre-flight probe:")
+    for result in results:
+        latency = f"{result.latency:.2f}s" if result.latency is not None else "-"
+        detail = f" ({result.error})" if result.error else ""
+        print(f"  {result.decision:<7} {result.origin} latency {latency}, timeout {result.request_timeout:.0f}s{detail}")
+    return health
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+身份登记模块
+
+多个账号配置或同一账号的多种认证方式可能对应同一个 provider 用户（相同 origin 和 api_user），
+本次运行中每个身份只签到、充值一次，其它别名直接复用第一次的结果，避免重复抽取 CDK 浪费充值次数
+"""
+
+import threading
+
+
+class IdentityRegistry:
+    """按 (provider origin, api_user) 登记的签到结果
+
+    HTTP 通道的多个线程共享同一个登记表，所有读写都加锁
+    """
+
+    def __init__(self):
+        # {身份键: (账号名称, 签到后的用户信息)}
+        self._results: dict[str, tuple[str, dict]] = {}
+        # {身份键: 执行充值的账号名称}
+        self._topups: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(origin: str, api_user: str | int) -> str:
+        """生成身份键"""
+        return f"{origin.rstrip('/')}|{api_user}"
+
+    def get_result(self, origin: str, api_user: str | int) -> tuple[str, dict] | None:
+        """获取身份已完成的签到结果
+
+        Returns:
+            (账号名称, 用户信息)，身份尚未签到成功时返回 None
+        """
+        with self._lock:
+            return self._results.get(self.make_key(origin, api_user))
+
+    def record_result(self, origin: str, api_user: str | int, account_name: str, user_info: dict) -> None:
+        """登记签到成功的结果，已有结果时保留第一次的记录"""
+        with self._lock:
+            self._results.setdefault(self.make_key(origin, api_user), (account_name, user_info))
+
+    def claim_topup(self, origin: str, api_user: str | int, account_name: str) -> str | None:
+        """申请为身份执行充值
+
+        当前账号自己之前的申请不算已申请（例如保存的 cookies 失败后用配置中的 cookies 重试）
+
+        Returns:
+            已经执行过充值的其它账号名称；返回 None 表示申请成功，由当前账号执行充值
+        """
+        with self._lock:
+            key = self.make_key(origin, api_user)
+            owner = self._topups.get(key)
+            if owner is not None and owner != account_name:
+                return owner
+            self._topups[key] = account_name
+            return None
+
+    def release_topup(self, origin: str, api_user: str | int, account_name: str) -> None:
+        """充值失败时释放申请，同一身份的其它别名或重试仍然可以执行充值"""
+        with self._lock:
+            key = self.make_key(origin, api_user)
+            if self._topups.get(key) == account_name:
+                del self._topups[key]
+
+    def clear(self) -> None:
+        """清空登记表"""
+        with self._lock:
+            self._results.clear()
+            self._topups.clear()
+
+
+# 当前进程共享的身份登记表
+identity_registry = IdentityRegistry()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+任务历史模块
+
+跨运行记录每个账号签到任务的耗时，调度时优先启动预计耗时最长的任务，缩短整体运行时间；
+同时记录每种认证方式的成功率，供首次成功模式决定认证方式的尝试顺序
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+# 新记录在平均耗时中的权重（指数移动平均）
+DURATION_SMOOTHING = 0.5
+
+# 认证方式的相对成本: cookies 只需 HTTP 请求，OAuth 需要启动浏览器登录
+AUTH_METHOD_COSTS = {"cookies": 1, "github": 10, "linux.do": 10}
+
+
+class JobHistory:
+    """任务历史"""
+
+    def __init__(self, history_file: str = "job_history.json"):
+        """初始化
+
+        Args:
+            history_file: 历史文件路径
+        """
+        self.history_file = history_file
+        self.entries: dict[str, dict] = self._load()
+
+    def _load(self) -> dict[str, dict]:
+        """加载历史文件"""
+        try:
+            if os.path.exists(self.history_file):
+                with open(self.history_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        return data
+        except Exception as e:
+            print(f"⚠️ Failed to load job history: {e}")
+        return {}
+
+    def save(self) -> None:
+        """保存历史文件"""
+        try:
+            with open(self.history_file, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+        except Exception as e:
+            print(f"Warning: Failed to save job history: {e}")
+
+    @staticmethod
+    def make_key(account_name: str, provider_name: str) -> str:
+        """生成历史键"""
+        return f"{provider_name}|{account_name}"
+
+    def record_duration(self, account_name: str, provider_name: str, seconds: float) -> None:
+        """记录一次任务耗时
+
+        Args:
+            account_name: 账号名称
+            provider_name: provider 名称
+            seconds: 耗时（秒）
+        """
+        key = self.make_key(account_name, provider_name)
+        entry = self.entries.get(key) or {}
+        previous = entry.get("duration")
+        duration = seconds if previous is None else previous + DURATION_SMOOTHING * (seconds - previous)
+        self.entries[key] = {
+            **entry,
+            "provider": provider_name,
+            "duration": round(duration, 2),
+            "runs": entry.get("runs", 0) + 1,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def get_duration(self, account_name: str, provider_name: str) -> float | None:
+        """获取账号的平均耗时，没有历史时返回 None"""
+        entry = self.entries.get(self.make_key(account_name, provider_name))
+        if not entry or entry.get("duration") is None:
+            return None
+        return entry["duration"]
+
+    def get_provider_duration(self, provider_name: str) -> float | None:
+        """获取同一 provider 下所有账号的平均耗时，没有历史时返回 None"""
+        durations = [
+            entry["duration"]
+            for entry in self.entries.values()
+            if entry.get("provider") == provider_name and entry.get("duration") is not None
+        ]
+        if not durations:
+            return None
+        return sum(durations) / len(durations)
+
+    def record_method(self, account_name: str, provider_name: str, method: str, success: bool) -> None:
+        """记录一次认证方式的尝试结果"""
+        key = self.make_key(account_name, provider_name)
+        entry = self.entries.setdefault(key, {"provider": provider_name})
+        methods = entry.setdefault("methods", {})
+        stats = methods.setdefault(method, {"attempts": 0, "successes": 0})
+        stats["attempts"] += 1
+        if success:
+            stats["successes"] += 1
+
+    def get_success_rate(self, account_name: str, provider_name: str, method: str) -> float:
+        """获取认证方式的成功率（拉普拉斯平滑，没有记录时为 0.5）"""
+        entry = self.entries.get(self.make_key(account_name, provider_name)) or {}
+        stats = entry.get("methods", {}).get(method) or {}
+        return (stats.get("successes", 0) + 1) / (stats.get("attempts", 0) + 2)
+
+    def rank_auth_methods(self, account_name: str, provider_name: str, methods: list[str]) -> list[str]:
+        """按预期成本（成本 / 成功率）从低到高排列认证方式，相同时保持原顺序"""
+        return sorted(
+            methods,
+            key=lambda method: AUTH_METHOD_COSTS.get(method, 10)
+            / self.get_success_rate(account_name, provider_name, method),
+        )
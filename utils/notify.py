@@ -17,6 +17,8 @@ class NotificationKit:
 		self.dingding_webhook = os.getenv('DINGDING_WEBHOOK')
 		self.feishu_webhook = os.getenv('FEISHU_WEBHOOK')
 		self.weixin_webhook = os.getenv('WEIXIN_WEBHOOK')
+		# 合并发送时暂存的消息 [(标题, 内容, 消息类型)]，为 None 时直接发送
+		self._batch: list[tuple[str, str, str]] | None = None
 
 	def send_email(self, title: str, content: str, msg_type: Literal['text', 'html'] = 'text'):
 		if not self.email_user or not self.email_pass or not self.email_to:
@@ -80,7 +82,30 @@ class NotificationKit:
 		with httpx.Client(timeout=30.0) as client:
 			client.post(self.weixin_webhook, json=data)
 
+	def start_batch(self):
+		"""开始合并通知，之后的消息暂存，由 flush_batch 合并为一条发送"""
+		self._batch = []
+
+	def flush_batch(self, title: str):
+		"""结束合并通知，把暂存的消息合并为一条发送（只有一条时按原标题发送）"""
+		batch, self._batch = self._batch, None
+		if not batch:
+			return
+		if len(batch) == 1:
+			self.push_message(*batch[0])
+			return
+
+		msg_type = batch[0][2] if all(item[2] == batch[0][2] for item in batch) else 'text'
+		separator = '<hr>' if msg_type == 'html' else '\n\n=============================\n\n'
+		content = separator.join(f'【{item_title}】\n{item_content}' for item_title, item_content, _ in batch)
+		self.push_message(title, content, msg_type)
+
 	def push_message(self, title: str, content: str, msg_type: Literal['text', 'html'] = 'text'):
+		if self._batch is not None:
+			self._batch.append((title, content, msg_type))
+			print(f'🔹 Message "{title}" queued for batched notification')
+			return
+
 		notifications = [
 			('Email', lambda: self.send_email(title, content, msg_type)),
 			('PushPlus', lambda: self.send_pushplus(title, content)),
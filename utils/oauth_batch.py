@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+批量 OAuth 授权模块
+
+多个 provider 账号共用同一个 Linux.do 或 GitHub 身份时，只启动一次浏览器、登录一次，
+在同一个浏览器上下文中依次完成所有 provider 的授权，再把结果交给各自的 CheckIn。
+批量授权受截止时间限制，剩余时间不够完成时跳过，由各账号在自己的截止时间内单独登录。
+授权得到的 code 和 state 会过期，计划启动时间较晚的账号不参与批量授权，超过有效时间的授权结果不再使用
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import TYPE_CHECKING
+
+from utils.deadline import Deadline
+
+if TYPE_CHECKING:
+    from checkin import CheckIn
+
+# 批量授权预计耗时: 启动浏览器并登录一次，加上每个 provider 的授权（秒）
+BATCH_LOGIN_SECONDS = 60
+BATCH_AUTHORIZE_SECONDS = 30
+
+# 批量授权结果的有效时间（秒），超过后各账号单独登录（GitHub 授权 code 约 10 分钟过期）
+OAUTH_RESULT_MAX_AGE_SECONDS = 300
+
+# 参与批量授权的账号计划启动时间最多晚于授权时间的秒数，更晚启动的账号单独登录
+BATCH_MAX_START_DELAY_SECONDS = 120
+
+
+def estimate_batch_seconds(count: int) -> float:
+    """估算 count 个 provider 的批量授权耗时（秒）"""
+    return BATCH_LOGIN_SECONDS + BATCH_AUTHORIZE_SECONDS * count
+
+
+def is_oauth_batch_enabled(env_name: str = "OAUTH_BATCH") -> bool:
+    """是否启用批量 OAuth 授权，默认启用，设置为 false 时禁用"""
+    return os.getenv(env_name, "true").strip().lower() != "false"
+
+
+def _get_credentials(auth_info: dict | None) -> tuple[str, str] | None:
+    """从认证配置中提取用户名和密码"""
+    if not auth_info:
+        return None
+    username = auth_info.get("username")
+    password = auth_info.get("password")
+    if not username or not password:
+        return None
+    return username, password
+
+
+def group_checkins_by_identity(checkins: list["CheckIn"], auth_method: str) -> dict[str, list["CheckIn"]]:
+    """按 OAuth 用户名分组需要执行该方式授权的账号
+
+    当前签到日已经完成该方式签到的账号不参与分组
+
+    Args:
+        checkins: CheckIn 列表
+        auth_method: 认证方式，"linux.do" 或 "github"
+    """
+    groups: dict[str, list["CheckIn"]] = {}
+    for checkin in checkins:
+        auth_info = checkin.account_config.linux_do if auth_method == "linux.do" else checkin.account_config.github
+        credentials = _get_credentials(auth_info)
+        if not credentials:
+            continue
+        if checkin.get_ledger_user_info(auth_method):
+            continue
+        groups.setdefault(credentials[0], []).append(checkin)
+    return groups
+
+
+def group_checkins_by_linuxdo(checkins: list["CheckIn"]) -> dict[str, list["CheckIn"]]:
+    """按 Linux.do 用户名分组需要执行 Linux.do 授权的账号"""
+    return group_checkins_by_identity(checkins, "linux.do")
+
+
+def group_checkins_by_github(checkins: list["CheckIn"]) -> dict[str, list["CheckIn"]]:
+    """按 GitHub 用户名分组需要执行 GitHub 授权的账号"""
+    return group_checkins_by_identity(checkins, "github")
+
+
+async def preauthorize(checkins: list["CheckIn"], deadline: Deadline | None = None) -> None:
+    """对共用 Linux.do 或 GitHub 身份的账号执行批量授权
+
+    Args:
+        checkins: 同一事件循环中待执行的 CheckIn 列表
+        deadline: 批量授权的截止时间（可选）
+    """
+    deadline = deadline or Deadline()
+    await preauthorize_linuxdo(checkins, deadline)
+    await preauthorize_github(checkins, deadline)
+
+
+async def preauthorize_linuxdo(checkins: list["CheckIn"], deadline: Deadline | None = None) -> None:
+    """对共用 Linux.do 身份的账号执行批量授权
+
+    成功的授权结果写入各 CheckIn 的 oauth_results，CheckIn.execute 中直接使用；
+    准备阶段或授权失败的账号仍按原流程单独执行
+
+    Args:
+        checkins: 同一事件循环中待执行的 CheckIn 列表
+        deadline: 批量授权的截止时间（可选）
+    """
+    from sign_in_with_linuxdo import LinuxDoOAuthRequest, LinuxDoSignIn
+
+    await _preauthorize(
+        group_checkins_by_linuxdo(checkins),
+        auth_method="linux.do",
+        label="Linux.do",
+        sign_in_class=LinuxDoSignIn,
+        request_class=LinuxDoOAuthRequest,
+        deadline=deadline or Deadline(),
+    )
+
+
+async def preauthorize_github(checkins: list["CheckIn"], deadline: Deadline | None = None) -> None:
+    """对共用 GitHub 身份的账号执行批量授权
+
+    GitHub 登录可能需要两步验证，批量授权后同一账号每次运行只需要验证一次
+
+    Args:
+        checkins: 同一事件循环中待执行的 CheckIn 列表
+        deadline: 批量授权的截止时间（可选）
+    """
+    from sign_in_with_github import GitHubOAuthRequest, GitHubSignIn
+
+    await _preauthorize(
+        group_checkins_by_github(checkins),
+        auth_method="github",
+        label="GitHub",
+        sign_in_class=GitHubSignIn,
+        request_class=GitHubOAuthRequest,
+        deadline=deadline or Deadline(),
+    )
+
+
+async def _preauthorize(
+    groups: dict[str, list["CheckIn"]],
+    auth_method: str,
+    label: str,
+    sign_in_class,
+    request_class,
+    deadline: Deadline,
+) -> None:
+    """对每个身份分组执行一次登录和多次授权，并将结果写入各 CheckIn 的 oauth_results
+
+    剩余时间不够完成一组的批量授权时跳过该组；授权超过截止时间时浏览器被关闭，各账号回退到单独登录
+    """
+    for username, members in groups.items():
+        if len(members) < 2:
+            continue
+        if deadline.remaining() < estimate_batch_seconds(len(members)):
+            print(
+                f"⏰ Skipping batched {label} authorization for {len(members)} account(s): "
+                f"not enough time left ({deadline.remaining():.0f}s), falling back to per-account sign-in"
+            )
+            continue
+
+        print(f"\n\n🔗 Batching {label} authorization for {len(members)} account(s) sharing one identity")
+
+        requests = []
+        prepared = []
+        for checkin in members:
+            if deadline.expired():
+                break
+            try:
+                waf_cookies = await checkin.get_waf_cookies()
+                if auth_method == "linux.do":
+                    oauth_prep = await checkin.prepare_linuxdo_oauth(waf_cookies)
+                else:
+                    oauth_prep = await checkin.prepare_github_oauth(waf_cookies)
+            except Exception as e:
+                print(f"⚠️ {checkin.account_name}: Failed to prepare {label} authorization: {e}")
+                continue
+
+            if not oauth_prep.get("success"):
+                continue
+
+            requests.append(
+                request_class(
+                    account_name=checkin.account_name,
+                    provider_config=checkin.provider_config,
+                    client_id=oauth_prep["client_id"],
+                    auth_state=oauth_prep["state"],
+                    auth_cookies=oauth_prep.get("cookies", []),
+                )
+            )
+            prepared.append((checkin, oauth_prep))
+
+        if not requests:
+            continue
+
+        first = members[0]
+        auth_info = first.account_config.linux_do if auth_method == "linux.do" else first.account_config.github
+        _, password = _get_credentials(auth_info)
+        if auth_method == "linux.do":
+            cache_file_path = first.get_linuxdo_cache_file_path(username)
+        else:
+            cache_file_path = first.get_github_cache_file_path(username)
+
+        sign_in = sign_in_class(
+            account_name=", ".join(checkin.account_name for checkin, _ in prepared),
+            provider_config=prepared[0][0].provider_config,
+            username=username,
+            password=password,
+            deadline=deadline,
+        )
+        # 以批量授权开始的时间作为所有结果的授权时间，保守判断过期
+        authorized_at = time.monotonic()
+        try:
+            results = await deadline.run(sign_in.signin_batch(requests, cache_file_path))
+        except Exception as e:
+            print(f"⚠️ Batched {label} authorization failed, falling back to per-account sign-in: {e}")
+            continue
+
+        # 只保存成功的授权结果，失败的账号按原流程单独登录
+        for (checkin, oauth_prep), (success, result_data) in zip(prepared, results):
+            if success:
+                checkin.oauth_results[auth_method] = (success, result_data, oauth_prep, authorized_at)
+            else:
+                error = result_data.get("error", "Unknown error") if isinstance(result_data, dict) else ""
+                print(
+                    f"⚠️ {checkin.account_name}: Batched {label} authorization failed ({error}), "
+                    "falling back to per-account sign-in"
+                )
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+代理池模块
+
+PROXY_POOL 配置多个代理时，运行开始前并发探测每个代理的可用性和延迟。每个账号按 rendezvous hash 固定分配代理：
+代理不变时同一账号总是使用同一个代理，WAF cookies 和浏览器指纹保持一致，增减代理时只有少数账号换代理；
+分配的代理不可用时按同样的排序转移到下一个可用代理，并限制每个代理同时处理的任务组数。
+未单独配置代理的账号使用代理池，httpx 请求和 Camoufox 启动都使用分配的代理
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from utils.geoip_cache import invalidate_proxy_geoip
+from utils.http_utils import proxy_resolve
+
+# 探测地址，返回出口 IP 等信息的轻量页面
+DEFAULT_PROBE_URL = "https://www.cloudflare.com/cdn-cgi/trace"
+
+# 探测请求超时（秒）
+PROBE_TIMEOUT = 10.0
+
+# Camoufox / Playwright 支持的代理配置字段
+PROXY_CONFIG_KEYS = ("server", "username", "password", "bypass")
+
+
+@dataclass
+class ProxyHealth:
+    """单个代理的探测结果"""
+
+    server: str
+    latency: float | None
+    error: str | None = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.latency is not None and not self.error
+
+
+def _parse_proxy(item) -> tuple[dict, int | None] | None:
+    """解析代理池中的单个代理
+
+    Returns:
+        (代理配置, 最大并发数)，格式无效时返回 None
+    """
+    if isinstance(item, str) and item.strip():
+        return {"server": item.strip()}, None
+    if isinstance(item, dict) and item.get("server"):
+        proxy_config = {key: item[key] for key in PROXY_CONFIG_KEYS if item.get(key)}
+        max_concurrency = item.get("max_concurrency")
+        return proxy_config, int(max_concurrency) if max_concurrency else None
+    return None
+
+
+def probe_proxy(proxy_config: dict, probe_url: str = DEFAULT_PROBE_URL) -> ProxyHealth:
+    """通过代理请求探测地址，测量可用性和延迟
+
+    Args:
+        proxy_config: 代理配置
+        probe_url: 探测地址
+
+    Returns:
+        ProxyHealth
+    """
+    server = proxy_config["server"]
+    start_time = time.monotonic()
+    try:
+        with httpx.Client(timeout=PROBE_TIMEOUT, proxy=proxy_resolve(proxy_config)) as client:
+            response = client.get(probe_url)
+        if response.status_code >= 500 or response.status_code == 407:
+            return ProxyHealth(server, None, f"HTTP {response.status_code}")
+        return ProxyHealth(server, time.monotonic() - start_time)
+    except Exception as e:
+        return ProxyHealth(server, None, f"{type(e).__name__}: {e}")
+
+
+class ProxyPool:
+    """代理池"""
+
+    def __init__(
+        self,
+        proxies: list[dict],
+        limits: dict[str, int] | None = None,
+        default_limit: int | None = None,
+        probe_url: str = DEFAULT_PROBE_URL,
+    ):
+        """初始化
+
+        Args:
+            proxies: 代理配置列表
+            limits: 可选，{代理地址: 最大并发任务组数}
+            default_limit: 未单独设置时每个代理的最大并发任务组数，None 表示不限制
+            probe_url: 探测地址
+        """
+        self.proxies = proxies
+        self.limits = limits or {}
+        self.default_limit = default_limit
+        self.probe_url = probe_url
+        # {代理地址: ProxyHealth}，未探测的代理视为可用
+        self.health: dict[str, ProxyHealth] = {}
+
+    @classmethod
+    def from_env(cls, pool_env: str = "PROXY_POOL") -> "ProxyPool | None":
+        """从环境变量创建代理池
+
+        PROXY_POOL 为 JSON 数组（元素为代理地址字符串，或与 PROXY 相同格式的字典，可额外设置 max_concurrency），
+        也可以是逗号分隔的代理地址。PROXY_POOL_CONCURRENCY 为每个代理的默认最大并发任务组数，
+        PROXY_POOL_PROBE_URL 为探测地址
+
+        Returns:
+            ProxyPool，未配置时返回 None
+        """
+        value = os.getenv(pool_env, "").strip()
+        if not value:
+            return None
+        try:
+            items = json.loads(value)
+        except json.JSONDecodeError:
+            items = value.split(",")
+        if not isinstance(items, list):
+            items = [items]
+
+        proxies = []
+        limits = {}
+        for item in items:
+            parsed = _parse_proxy(item)
+            if parsed is None:
+                print(f"⚠️ Invalid proxy in {pool_env}: {item}, ignoring")
+                continue
+            proxy_config, max_concurrency = parsed
+            proxies.append(proxy_config)
+            if max_concurrency:
+                limits[proxy_config["server"]] = max_concurrency
+        if not proxies:
+            return None
+
+        default_limit = None
+        limit_value = os.getenv("PROXY_POOL_CONCURRENCY", "").strip()
+        if limit_value:
+            try:
+                default_limit = max(1, int(limit_value))
+            except ValueError:
+                print(f"⚠️ Invalid PROXY_POOL_CONCURRENCY value '{limit_value}', not limiting proxy concurrency")
+
+        probe_url = os.getenv("PROXY_POOL_PROBE_URL", "").strip() or DEFAULT_PROBE_URL
+        print(f"⚙️ Loaded {len(proxies)} proxy(ies) from {pool_env}")
+        return cls(proxies, limits, default_limit, probe_url)
+
+    async def probe(self, concurrency: int = 16) -> dict[str, ProxyHealth]:
+        """并发探测所有代理
+
+        Returns:
+            {代理地址: ProxyHealth}
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def _probe(proxy_config: dict) -> ProxyHealth:
+            async with semaphore:
+                return await asyncio.to_thread(probe_proxy, proxy_config, self.probe_url)
+
+        results = await asyncio.gather(*[_probe(proxy_config) for proxy_config in self.proxies])
+        self.health = {result.server: result for result in results}
+
+        print("🩺 Proxy pool probe:")
+        for result in sorted(results, key=lambda item: (not item.healthy, item.latency or 0)):
+            status = f"latency {result.latency:.2f}s" if result.healthy else f"unavailable ({result.error})"
+            print(f"  {result.server} {status}")
+        return self.health
+
+    def is_healthy(self, server: str) -> bool:
+        """代理是否可用（未探测的代理视为可用）"""
+        health = self.health.get(server)
+        return health is None or health.healthy
+
+    def mark_unhealthy(self, server: str, error: str) -> None:
+        """运行中发现代理不可用时标记，后续分配跳过该代理，并删除该代理缓存的出口 IP（恢复后出口可能已经变化）"""
+        self.health[server] = ProxyHealth(server, None, error)
+        for proxy_config in self.proxies:
+            if proxy_config["server"] == server:
+                invalidate_proxy_geoip(proxy_config)
+
+    def get_unhealthy(self) -> dict[str, ProxyHealth]:
+        """获取被标记为不可用的代理 {代理地址: ProxyHealth}，用于把工作进程中的标记合并回主进程"""
+        return {server: health for server, health in self.health.items() if not health.healthy}
+
+    @staticmethod
+    def _score(server: str, account_key: str) -> int:
+        """rendezvous hash 分数"""
+        return int(hashlib.sha256(f"{server}|{account_key}".encode("utf-8")).hexdigest()[:16], 16)
+
+    def get_candidates(self, account_key: str) -> list[dict]:
+        """获取账号的代理候选列表
+
+        按 rendezvous hash 排序，可用的代理排在前面（列表第一个为固定分配的代理，其余为故障转移顺序）；
+        所有代理都不可用时按原排序返回
+
+        Args:
+            account_key: 账号标识（账号名称）
+
+        Returns:
+            代理配置列表
+        """
+        ranked = sorted(self.proxies, key=lambda proxy: self._score(proxy["server"], account_key), reverse=True)
+        healthy = [proxy for proxy in ranked if self.is_healthy(proxy["server"])]
+        if not healthy:
+            return ranked
+        return healthy + [proxy for proxy in ranked if not self.is_healthy(proxy["server"])]
+
+    async def find_failover(self, current: dict, account_key: str) -> dict | None:
+        """确认当前代理不可用后，按候选顺序查找下一个可用代理
+
+        Args:
+            current: 账号当前使用的代理配置
+            account_key: 账号标识（账号名称）
+
+        Returns:
+            下一个可用的代理配置；当前代理仍然可用（失败与代理无关）或没有可用代理时返回 None
+        """
+        health = await asyncio.to_thread(probe_proxy, current, self.probe_url)
+        if health.healthy:
+            return None
+        self.mark_unhealthy(current["server"], health.error)
+
+        for candidate in self.get_candidates(account_key):
+            if not self.is_healthy(candidate["server"]):
+                continue
+            candidate_health = await asyncio.to_thread(probe_proxy, candidate, self.probe_url)
+            if candidate_health.healthy:
+                return candidate
+            self.mark_unhealthy(candidate["server"], candidate_health.error)
+        return None
+
+    def get_limit(self, server: str) -> int | None:
+        """获取代理的最大并发任务组数"""
+        return self.limits.get(server) or self.default_limit
+
+    def get_limits(self) -> dict[str, int]:
+        """获取所有设置了并发上限的代理 {代理地址: 最大并发任务组数}"""
+        limits = {}
+        for proxy_config in self.proxies:
+            limit = self.get_limit(proxy_config["server"])
+            if limit:
+                limits[proxy_config["server"]] = limit
+        return limits
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+定向重跑模块
+
+只重新处理上次运行失败的账号、指定名称的账号或指定 provider 的账号，
+其余账号使用检查点中记录的上次结果汇总通知
+"""
+
+from utils.run_checkpoint import RunCheckpoint
+
+# 选择器类型
+SELECTOR_FAILED = "failed"
+SELECTOR_ACCOUNTS = "accounts"
+SELECTOR_PROVIDERS = "providers"
+
+
+def parse_rerun_selector(value: str | None) -> tuple[str, set[str]]:
+    """解析重跑选择器
+
+    支持的格式:
+        failed: 上次运行失败的账号（默认）
+        accounts:账号1,账号2: 指定名称的账号
+        providers:provider1,provider2: 指定 provider 的账号
+
+    Args:
+        value: 选择器字符串
+
+    Returns:
+        (选择器类型, 名称集合)
+
+    Raises:
+        ValueError: 选择器格式无效
+    """
+    value = (value or "").strip()
+    if not value or value.lower() == SELECTOR_FAILED:
+        return SELECTOR_FAILED, set()
+
+    kind, _, names = value.partition(":")
+    kind = kind.strip().lower()
+    if kind not in (SELECTOR_ACCOUNTS, SELECTOR_PROVIDERS):
+        raise ValueError(f"Invalid rerun selector '{value}', expected failed, accounts:<names> or providers:<names>")
+    selected = {name.strip() for name in names.split(",") if name.strip()}
+    if not selected:
+        raise ValueError(f"Rerun selector '{value}' does not name any {kind}")
+    return kind, selected
+
+
+def has_failures(results: list[tuple[str, bool, dict | None]]) -> bool:
+    """账号结果中是否有失败的认证方式（被跳过的方式不算失败）"""
+    return any(not success and not (user_info and user_info.get("skipped")) for _, success, user_info in results)
+
+
+def select_rerun_jobs(jobs: list, selector: tuple[str, set[str]], checkpoint: RunCheckpoint) -> dict[int, list | None]:
+    """选择需要重跑的账号任务，并读取其余账号的上次结果
+
+    failed 选择器选择上次结果中有失败认证方式的账号，以及没有检查点（上次运行未完成或出错）的账号
+
+    Args:
+        jobs: 账号任务列表（AccountJob，provider_config 不为 None）
+        selector: parse_rerun_selector 的返回值
+        checkpoint: 运行检查点
+
+    Returns:
+        {不重跑的任务索引: 上次结果，没有记录时为 None}
+    """
+    kind, names = selector
+    carried_results = {}
+    for job in jobs:
+        last_results = checkpoint.load(job.account_name, job.provider_config, current_day_only=False)
+        if kind == SELECTOR_ACCOUNTS:
+            selected = job.account_name in names
+        elif kind == SELECTOR_PROVIDERS:
+            selected = job.provider_config.name in names
+        else:
+            selected = last_results is None or has_failures(last_results)
+        if not selected:
+            carried_results[job.index] = last_results
+    return carried_results
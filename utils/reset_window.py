@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+重置窗口调度模块
+
+所有账号在同一时刻启动时会在几秒内集中访问同一个 provider，容易触发 WAF 挑战和限流。
+根据各 provider 的每日重置时间和时区，把同一 provider 的账号启动时间均匀分散到重置后的时间窗口内，并加入随机抖动；
+运行开始时已经不在窗口内的 provider 只加入抖动
+"""
+
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+
+def _get_seconds_env(env_name: str) -> float:
+    """从环境变量读取秒数，未设置或无效时返回 0"""
+    value = os.getenv(env_name, "").strip()
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        print(f"⚠️ Invalid {env_name} value '{value}', ignoring")
+        return 0.0
+
+
+def get_reset_window_seconds(env_name: str = "RESET_WINDOW") -> float:
+    """从环境变量获取每日重置后分散账号的时间窗口（秒），默认 0 表示不分散"""
+    return _get_seconds_env(env_name)
+
+
+def get_reset_jitter_seconds(env_name: str = "RESET_JITTER") -> float:
+    """从环境变量获取账号启动时间的最大随机抖动（秒），默认 0"""
+    return _get_seconds_env(env_name)
+
+
+def get_provider_concurrency(env_name: str = "PROVIDER_CONCURRENCY") -> int | None:
+    """从环境变量获取每个 provider 同时处理的最大任务组数，未设置时不限制"""
+    value = os.getenv(env_name, "").strip()
+    if not value:
+        return None
+    try:
+        return max(1, int(value))
+    except ValueError:
+        print(f"⚠️ Invalid {env_name} value '{value}', not limiting provider concurrency")
+        return None
+
+
+def plan_start_times(
+    jobs: list,
+    window_seconds: float,
+    jitter_seconds: float = 0.0,
+    now: float | None = None,
+    rng: random.Random | None = None,
+) -> dict[int, float]:
+    """计算账号的计划启动时间
+
+    同一 provider 的账号按配置顺序均匀分布在 [当前时间, 最近一次重置时间 + 窗口] 内，再加入 [0, 抖动] 的随机延迟。
+    设置了运行时间预算时，启动时间不晚于预算结束前预估耗时的时刻
+
+    Args:
+        jobs: 账号任务列表（AccountJob，provider_config 不为 None）
+        window_seconds: 每日重置后的时间窗口（秒）
+        jitter_seconds: 最大随机抖动（秒）
+        now: 当前时间戳，默认为当前时间
+        rng: 随机数生成器，默认使用 random 模块
+
+    Returns:
+        {任务索引: 计划启动时间戳}，只包含需要延后启动的账号
+    """
+    now = now if now is not None else time.time()
+    rng = rng or random
+    moment = datetime.fromtimestamp(now, timezone.utc)
+
+    provider_jobs: dict[str, list] = {}
+    for job in jobs:
+        provider_jobs.setdefault(job.provider_config.name, []).append(job)
+
+    start_times = {}
+    for same_provider_jobs in provider_jobs.values():
+        provider_config = same_provider_jobs[0].provider_config
+        window_end = provider_config.get_last_reset(moment) + timedelta(seconds=window_seconds)
+        span = max(0.0, (window_end - moment).total_seconds()) if window_seconds > 0 else 0.0
+        for position, job in enumerate(sorted(same_provider_jobs, key=lambda item: item.index)):
+            start_at = now + span * position / len(same_provider_jobs)
+            if jitter_seconds > 0:
+                start_at += rng.uniform(0, jitter_seconds)
+            if job.run_budget is not None:
+                start_at = min(start_at, job.run_budget.ends_at - (job.estimated_seconds or 0.0))
+            if start_at > now:
+                start_times[job.index] = start_at
+    return start_times
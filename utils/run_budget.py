@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+运行时间预算模块
+
+CI 作业有硬性时间上限，超时后未处理完的账号会被直接终止且不会发送通知。运行开始时设置整体时间预算，
+根据整体运行中已完成账号的实际耗时预估所有剩余账号的完成时间，时间不够时按优先级逐步削减工作：
+先跳过充值（包括 CDK 获取和转盘抽奖），再跳过次要的认证方式，最后不再开始新的账号；
+预算末尾始终保留写入状态文件和发送汇总通知的时间
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+# GitHub Actions 作业默认时间上限为 360 分钟，扣除安装依赖和缓存步骤的时间
+DEFAULT_CI_RUN_BUDGET = 340 * 60
+
+# 默认为保存状态文件和发送通知保留的时间（秒）
+DEFAULT_RUN_BUDGET_RESERVE = 120
+
+# 削减级别
+SHED_NONE = 0
+# 跳过充值（CDK 获取、转盘抽奖和兑换）
+SHED_TOPUP = 1
+# 同时跳过次要认证方式，只尝试第一个认证方式
+SHED_SECONDARY_METHODS = 2
+# 不再开始新的账号
+SHED_ACCOUNT = 3
+
+
+def _get_seconds_env(env_name: str) -> float | None:
+    """从环境变量读取秒数，未设置或无效时返回 None"""
+    value = os.getenv(env_name, "").strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        print(f"⚠️ Invalid {env_name} value '{value}', ignoring")
+        return None
+
+
+@dataclass
+class RunBudget:
+    """整体运行时间预算（使用 time.time，可以传递到工作进程）"""
+
+    # 账号处理必须结束的时间戳（已扣除保留时间）
+    ends_at: float
+    # 为保存状态文件和发送通知保留的时间（秒）
+    reserve_seconds: float = DEFAULT_RUN_BUDGET_RESERVE
+
+    @classmethod
+    def from_env(cls, started_at: float | None = None) -> "RunBudget | None":
+        """从环境变量创建运行时间预算
+
+        RUN_BUDGET 为整体时间预算（秒），设置为 0 时不限制；未设置时在 GitHub Actions 中使用 DEFAULT_CI_RUN_BUDGET，
+        本地运行不限制。RUN_BUDGET_RESERVE 为保留时间（秒）
+
+        Args:
+            started_at: 运行开始时间戳，默认为当前时间
+
+        Returns:
+            RunBudget，不限制时返回 None
+        """
+        budget_seconds = _get_seconds_env("RUN_BUDGET")
+        if budget_seconds is None and os.getenv("GITHUB_ACTIONS") == "true":
+            budget_seconds = DEFAULT_CI_RUN_BUDGET
+        if not budget_seconds or budget_seconds <= 0:
+            return None
+
+        reserve_seconds = _get_seconds_env("RUN_BUDGET_RESERVE")
+        if reserve_seconds is None or reserve_seconds < 0:
+            reserve_seconds = DEFAULT_RUN_BUDGET_RESERVE
+
+        started_at = started_at if started_at is not None else time.time()
+        return cls(ends_at=started_at + budget_seconds - reserve_seconds, reserve_seconds=reserve_seconds)
+
+    def remaining(self, now: float | None = None) -> float:
+        """账号处理的剩余时间（秒）"""
+        return max(0.0, self.ends_at - (now if now is not None else time.time()))
+
+    def get_shed_level(self, account_seconds: float, pending_seconds: float, now: float | None = None) -> int:
+        """根据预估耗时决定即将开始的账号需要削减的工作
+
+        Args:
+            account_seconds: 即将开始的账号的预估耗时（秒）
+            pending_seconds: 包括该账号在内、整体运行中尚未完成的账号预计还需要的时间（秒）
+            now: 当前时间戳，默认为当前时间
+
+        Returns:
+            削减级别: SHED_NONE / SHED_TOPUP / SHED_SECONDARY_METHODS / SHED_ACCOUNT
+        """
+        remaining = self.remaining(now)
+        if remaining <= 0:
+            return SHED_ACCOUNT
+        if remaining < account_seconds:
+            return SHED_SECONDARY_METHODS
+        if remaining < pending_seconds:
+            return SHED_TOPUP
+        return SHED_NONE
+
+
+def project_durations(estimates: list[float], finished: list[tuple[float, float]]) -> list[float]:
+    """根据已完成账号的实际耗时修正尚未开始的账号的预估耗时
+
+    Args:
+        estimates: 尚未开始的账号的预估耗时（秒）
+        finished: 已完成账号的 (预估耗时, 实际耗时)
+
+    Returns:
+        修正后的预估耗时：按已完成账号的实际耗时与预估耗时之比缩放
+    """
+    estimated_total = sum(estimated for estimated, _ in finished)
+    actual_total = sum(actual for _, actual in finished)
+    scale = actual_total / estimated_total if estimated_total > 0 else 1.0
+    return [estimate * scale for estimate in estimates]
+
+
+class RunTally:
+    """整体运行的账号耗时统计（线程安全）
+
+    记录尚未完成的账号的预估耗时和已完成账号的 (预估耗时, 实际耗时)，所有任务组共用，
+    削减决策根据整体运行中的进度而不是单个任务组的进度。传递到工作进程时复制当时的统计，
+    工作进程中完成的账号由主进程合并回来
+    """
+
+    def __init__(self, estimates: dict[int, float], parallelism: int = 1):
+        """初始化
+
+        Args:
+            estimates: 尚未完成的账号的预估耗时 {任务索引: 秒}
+            parallelism: 同时执行的任务组数，用于把剩余账号的总耗时换算为剩余运行时间
+        """
+        self.pending = dict(estimates)
+        # {任务索引: (预估耗时, 实际耗时)}
+        self.finished: dict[int, tuple[float, float]] = {}
+        self.parallelism = max(1, parallelism)
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        with self._lock:
+            return {"pending": dict(self.pending), "finished": dict(self.finished), "parallelism": self.parallelism}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(self, index: int, actual: float) -> None:
+        """记录账号完成及其实际耗时"""
+        with self._lock:
+            estimate = self.pending.pop(index, None)
+            if estimate is not None:
+                self.finished[index] = (estimate, actual)
+
+    def merge_finished(self, finished: dict[int, tuple[float, float]]) -> None:
+        """合并工作进程中完成的账号"""
+        with self._lock:
+            for index, entry in finished.items():
+                self.pending.pop(index, None)
+                self.finished[index] = entry
+
+    def get_finished(self, indexes: list[int]) -> dict[int, tuple[float, float]]:
+        """获取指定账号的完成记录，用于从工作进程返回"""
+        with self._lock:
+            return {index: self.finished[index] for index in indexes if index in self.finished}
+
+    def drop(self, indexes: list[int]) -> None:
+        """不再执行的账号（未开始或任务组失败）不计入剩余耗时"""
+        with self._lock:
+            for index in indexes:
+                self.pending.pop(index, None)
+
+    def project(self, index: int) -> tuple[float, float]:
+        """按已完成账号修正后的预估耗时
+
+        Returns:
+            (该账号的预估耗时, 所有尚未完成的账号预计还需要的运行时间)；剩余运行时间为总耗时除以并行数，
+            且不小于其中最长的账号
+        """
+        with self._lock:
+            indexes = list(self.pending)
+            projected = project_durations([self.pending[i] for i in indexes], list(self.finished.values()))
+        by_index = dict(zip(indexes, projected))
+        total = max(sum(projected) / self.parallelism, max(projected, default=0.0))
+        return by_index.get(index, 0.0), total
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+运行检查点模块
+
+每个账号处理完成后立即写入检查点（每个账号一个文件，工作进程和 HTTP 通道的线程可以同时写入），
+运行中途被终止时已完成账号的结果不会丢失；续跑模式下跳过当前签到日内已完成的账号，
+并用检查点中的结果汇总完整的通知
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+from utils.config import ProviderConfig
+
+
+class RunCheckpoint:
+    """运行检查点"""
+
+    def __init__(self, checkpoint_dir: str = "run-checkpoints"):
+        """初始化
+
+        Args:
+            checkpoint_dir: 检查点目录
+        """
+        self.checkpoint_dir = checkpoint_dir
+
+    def _get_file_path(self, account_name: str, provider_name: str) -> str:
+        """获取账号的检查点文件路径"""
+        safe_name = "".join(c if c.isalnum() else "_" for c in f"{provider_name}_{account_name}")
+        return os.path.join(self.checkpoint_dir, f"{safe_name}.json")
+
+    @staticmethod
+    def _strip_results(results: list) -> list:
+        """去掉结果中的会话信息（cookies 不写入检查点），并转换为可以 JSON 序列化的列表"""
+        stripped = []
+        for auth_method, success, user_info in results:
+            if isinstance(user_info, dict):
+                user_info = {key: value for key, value in user_info.items() if key != "session"}
+            stripped.append([auth_method, bool(success), user_info])
+        return stripped
+
+    def save(
+        self,
+        account_name: str,
+        provider_config: ProviderConfig,
+        results: list,
+        now: datetime | None = None,
+    ) -> None:
+        """写入账号的检查点
+
+        Args:
+            account_name: 账号名称
+            provider_config: provider 配置（用于确定签到日）
+            results: 账号结果 [(认证方式, 是否成功, 用户信息)]
+            now: 完成时间，默认为系统当前时间
+        """
+        moment = now or datetime.now(timezone.utc)
+        checkpoint = {
+            "account_name": account_name,
+            "provider": provider_config.name,
+            "provider_day": provider_config.get_provider_day(moment).isoformat(),
+            "finished_at": moment.isoformat(),
+            "results": self._strip_results(results),
+        }
+        try:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            file_path = self._get_file_path(account_name, provider_config.name)
+            # 先写临时文件再替换，进程在写入过程中被终止时不会留下损坏的检查点
+            temp_path = f"{file_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(checkpoint, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(temp_path, file_path)
+        except Exception as e:
+            print(f"Warning: Failed to save run checkpoint for {account_name}: {e}")
+
+    def load(
+        self,
+        account_name: str,
+        provider_config: ProviderConfig,
+        now: datetime | None = None,
+        current_day_only: bool = True,
+    ) -> list[tuple[str, bool, dict | None]] | None:
+        """读取账号在 provider 当前签到日内的检查点
+
+        Args:
+            account_name: 账号名称
+            provider_config: provider 配置（用于确定签到日）
+            now: 当前时间，默认为系统当前时间
+            current_day_only: 为 False 时返回最近一次的检查点，不限签到日
+
+        Returns:
+            检查点中的账号结果（用户信息标记为 resumed），没有检查点或不是当前签到日时返回 None
+        """
+        file_path = self._get_file_path(account_name, provider_config.name)
+        if not os.path.exists(file_path):
+            return None
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Failed to load run checkpoint for {account_name}: {e}")
+            return None
+
+        if not isinstance(checkpoint, dict):
+            return None
+        if current_day_only and checkpoint.get("provider_day") != provider_config.get_provider_day(now).isoformat():
+            return None
+
+        results = []
+        for auth_method, success, user_info in checkpoint.get("results") or []:
+            results.append((auth_method, success, {**(user_info or {}), "resumed": True}))
+        return results or None
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+定时调度模块
+
+解析 cron 表达式（分 时 日 月 周，支持 *、*/n、a-b、a-b/n 和逗号列表），计算下一次执行时间，
+供常驻模式的内部调度器使用
+"""
+
+from datetime import datetime, timedelta, tzinfo
+from datetime import time as dt_time
+from datetime import timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# 各字段的取值范围
+FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+FIELD_NAMES = ["minute", "hour", "day", "month", "weekday"]
+
+# 向后查找下一次执行时间的最大天数（覆盖闰年 2 月 29 日）
+MAX_LOOKAHEAD_DAYS = 366 * 8
+
+
+def get_timezone(name: str) -> tzinfo:
+    """获取时区，Windows 等缺少时区数据库的环境下 Asia/Shanghai 回退为固定的 UTC+8，其它无效时区使用 UTC"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        if name == "Asia/Shanghai":
+            return dt_timezone(timedelta(hours=8), name)
+        print(f"⚠️ Timezone '{name}' not found, using UTC")
+        return dt_timezone.utc
+
+
+def _parse_field(expr: str, minimum: int, maximum: int, name: str) -> tuple[set[int], bool]:
+    """解析 cron 表达式的单个字段
+
+    Returns:
+        (允许的取值集合, 是否为 *)
+    """
+    values = set()
+    for part in expr.split(","):
+        part = part.strip()
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            try:
+                step = int(step_str)
+            except ValueError:
+                raise ValueError(f"Invalid step '{step_str}' in cron {name} field '{expr}'")
+            if step <= 0:
+                raise ValueError(f"Invalid step '{step_str}' in cron {name} field '{expr}'")
+
+        if part == "*":
+            start, end = minimum, maximum
+        elif "-" in part:
+            start_str, end_str = part.split("-", 1)
+            try:
+                start, end = int(start_str), int(end_str)
+            except ValueError:
+                raise ValueError(f"Invalid range '{part}' in cron {name} field '{expr}'")
+        else:
+            try:
+                start = int(part)
+            except ValueError:
+                raise ValueError(f"Invalid value '{part}' in cron {name} field '{expr}'")
+            end = maximum if step > 1 else start
+
+        if start < minimum or end > maximum or start > end:
+            raise ValueError(f"Value out of range in cron {name} field '{expr}'")
+        values.update(range(start, end + 1, step))
+    # 星期字段中 7 也表示周日
+    if name == "weekday":
+        values = {value % 7 for value in values}
+    return values, expr.strip() == "*"
+
+
+class CronSchedule:
+    """cron 表达式"""
+
+    def __init__(self, expression: str, tz: tzinfo):
+        """初始化
+
+        Args:
+            expression: cron 表达式（分 时 日 月 周）
+            tz: 表达式所在的时区
+
+        Raises:
+            ValueError: 表达式格式无效
+        """
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression '{expression}', expected 5 fields")
+        self.expression = expression
+        self.tz = tz
+        parsed = [
+            _parse_field(field, minimum, maximum, name)
+            for field, (minimum, maximum), name in zip(fields, FIELD_RANGES, FIELD_NAMES)
+        ]
+        self.minutes = sorted(parsed[0][0])
+        self.hours = sorted(parsed[1][0])
+        self.days, self.day_any = parsed[2]
+        self.months = parsed[3][0]
+        self.weekdays, self.weekday_any = parsed[4]
+
+    def _matches_day(self, day: datetime) -> bool:
+        """判断日期是否匹配（日和周都有限制时满足任一即可，与 cron 一致）"""
+        if day.month not in self.months:
+            return False
+        day_match = day.day in self.days
+        # datetime.weekday() 中周一为 0，cron 中周日为 0
+        weekday_match = (day.weekday() + 1) % 7 in self.weekdays
+        if self.day_any and self.weekday_any:
+            return True
+        if self.day_any:
+            return weekday_match
+        if self.weekday_any:
+            return day_match
+        return day_match or weekday_match
+
+    def next_after(self, moment: datetime) -> datetime:
+        """计算晚于 moment 的下一次执行时间
+
+        Args:
+            moment: 带时区的时间点
+
+        Returns:
+            下一次执行时间（表达式所在时区）
+        """
+        local = moment.astimezone(self.tz).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = local.date()
+        for _ in range(MAX_LOOKAHEAD_DAYS):
+            day_start = datetime.combine(day, dt_time(), tzinfo=self.tz)
+            if self._matches_day(day_start):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = day_start.replace(hour=hour, minute=minute)
+                        if candidate >= local:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Provider 会话缓存模块
+
+记录每个账号各认证方式最近一次签到成功时使用的 provider cookies 和 api_user，
+供余额查询等纯 HTTP 流程复用，无需重新登录。会话与 Cookie 回写使用同一密钥加密保存，未设置密钥时不保存
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+from cryptography.fernet import InvalidToken
+
+from utils.cookie_store import create_fernet
+
+
+class SessionStore:
+    """Provider 会话缓存（加密保存）"""
+
+    def __init__(
+        self,
+        store_file: str = "storage-states/provider_sessions.enc",
+        secret: str | None = None,
+        legacy_file: str | None = None,
+    ):
+        """初始化
+
+        Args:
+            store_file: 缓存文件路径，默认与 storage state 放在同一目录以便一起缓存
+            secret: 加密密钥来源，为空时不读写缓存
+            legacy_file: 可选，旧版本明文保存的会话文件，加密缓存不存在时导入一次，保存后删除
+        """
+        self.store_file = store_file
+        self.legacy_file = legacy_file
+        self._fernet = create_fernet(secret)
+        self.sessions: dict[str, dict] = self._load()
+
+    @property
+    def enabled(self) -> bool:
+        """是否配置了加密密钥"""
+        return self._fernet is not None
+
+    def _load(self) -> dict[str, dict]:
+        """加载并解密缓存文件，加密缓存不存在时导入旧版本的明文文件"""
+        if not self.enabled:
+            return {}
+        try:
+            if os.path.exists(self.store_file):
+                with open(self.store_file, "rb") as f:
+                    data = json.loads(self._fernet.decrypt(f.read()))
+            elif self.legacy_file and os.path.exists(self.legacy_file):
+                with open(self.legacy_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            else:
+                return {}
+            if isinstance(data, dict):
+                return data
+        except InvalidToken:
+            print("⚠️ Failed to decrypt provider sessions (key changed?), ignoring stored sessions")
+        except Exception as e:
+            print(f"⚠️ Failed to load provider sessions: {e}")
+        return {}
+
+    def save(self) -> None:
+        """加密保存缓存文件，并删除旧版本的明文文件"""
+        if not self.enabled:
+            return
+        try:
+            store_dir = os.path.dirname(self.store_file)
+            if store_dir:
+                os.makedirs(store_dir, exist_ok=True)
+            data = json.dumps(self.sessions, ensure_ascii=False, sort_keys=True).encode("utf-8")
+            with open(self.store_file, "wb") as f:
+                f.write(self._fernet.encrypt(data))
+            if self.legacy_file and os.path.exists(self.legacy_file):
+                os.remove(self.legacy_file)
+        except Exception as e:
+            print(f"Warning: Failed to save provider sessions: {e}")
+
+    @staticmethod
+    def make_key(account_name: str, provider_name: str, method: str) -> str:
+        """生成缓存键"""
+        return f"{provider_name}|{account_name}|{method}"
+
+    def get(self, account_name: str, provider_name: str, method: str) -> dict | None:
+        """获取会话
+
+        Returns:
+            {"cookies": dict, "api_user": str, "updated_at": str}，没有缓存时返回 None
+        """
+        session = self.sessions.get(self.make_key(account_name, provider_name, method))
+        if not session or not session.get("cookies") or not session.get("api_user"):
+            return None
+        return session
+
+    def set(self, account_name: str, provider_name: str, method: str, cookies: dict, api_user: str | int) -> None:
+        """保存会话"""
+        self.sessions[self.make_key(account_name, provider_name, method)] = {
+            "cookies": cookies,
+            "api_user": f"{api_user}",
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def remove(self, account_name: str, provider_name: str, method: str) -> None:
+        """删除会话"""
+        self.sessions.pop(self.make_key(account_name, provider_name, method), None)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Storage state 有效性检查模块
+
+在启动任何浏览器之前，使用轻量的 HTTP 请求检查缓存的 Linux.do / GitHub 会话是否仍然有效，
+登录流程根据检查结果选择路径：已过期的直接重新登录，有效的跳过额外的浏览器检查
+"""
+
+import asyncio
+import glob
+import json
+import os
+
+import httpx
+
+from utils.browser_utils import get_random_user_agent
+from utils.http_utils import proxy_resolve
+
+# 检查结果
+STATE_VALID = "valid"
+STATE_EXPIRED = "expired"
+STATE_UNKNOWN = "unknown"
+
+# 会话 cookie 名称：Linux.do (Discourse) 使用 _t，GitHub 使用 user_session
+LINUXDO_SESSION_COOKIE = "_t"
+GITHUB_SESSION_COOKIE = "user_session"
+
+# 当前进程中的检查结果缓存: {缓存文件绝对路径: 检查结果}
+_verdicts: dict[str, str] = {}
+
+
+def _normalize_path(cache_file_path: str) -> str:
+    return os.path.abspath(cache_file_path)
+
+
+def get_storage_state_kind(cache_file_path: str) -> str | None:
+    """根据缓存文件名判断会话类型
+
+    Returns:
+        "linux.do"、"github"，无法识别时返回 None
+    """
+    filename = os.path.basename(cache_file_path)
+    if filename.startswith("linuxdo_"):
+        return "linux.do"
+    if filename.startswith("github_"):
+        return "github"
+    return None
+
+
+def load_storage_state_cookies(cache_file_path: str, domain: str) -> dict:
+    """从 storage state 文件中提取指定域名的 cookies
+
+    Args:
+        cache_file_path: storage state 文件路径
+        domain: 域名，例如 "linux.do"
+
+    Returns:
+        {cookie 名称: cookie 值}
+    """
+    with open(cache_file_path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+
+    cookies = {}
+    for cookie in state.get("cookies", []):
+        cookie_domain = cookie.get("domain", "").lstrip(".")
+        if cookie_domain == domain or cookie_domain.endswith(f".{domain}"):
+            cookies[cookie["name"]] = cookie["value"]
+    return cookies
+
+
+def check_linuxdo_session(cookies: dict, proxy_config: dict | None = None) -> str:
+    """通过 Linux.do 当前会话接口检查会话是否有效
+
+    Args:
+        cookies: linux.do 域名下的 cookies
+        proxy_config: 代理配置
+
+    Returns:
+        检查结果
+    """
+    if not cookies.get(LINUXDO_SESSION_COOKIE):
+        return STATE_EXPIRED
+
+    with httpx.Client(http2=True, timeout=10.0, proxy=proxy_resolve(proxy_config)) as client:
+        client.cookies.update(cookies)
+        response = client.get(
+            "https://linux.do/session/current.json",
+            headers={"User-Agent": get_random_user_agent(), "Accept": "application/json"},
+        )
+
+    # 未登录时返回 404，Cloudflare 验证等情况返回 HTML，无法判断
+    if response.status_code == 404:
+        return STATE_EXPIRED
+    if response.status_code != 200:
+        return STATE_UNKNOWN
+    try:
+        data = response.json()
+    except json.JSONDecodeError:
+        return STATE_UNKNOWN
+    return STATE_VALID if data.get("current_user") else STATE_EXPIRED
+
+
+def check_github_session(cookies: dict, proxy_config: dict | None = None) -> str:
+    """通过访问需要登录的 GitHub 页面检查会话是否有效
+
+    Args:
+        cookies: github.com 域名下的 cookies
+        proxy_config: 代理配置
+
+    Returns:
+        检查结果
+    """
+    if not cookies.get(GITHUB_SESSION_COOKIE):
+        return STATE_EXPIRED
+
+    with httpx.Client(http2=True, timeout=10.0, proxy=proxy_resolve(proxy_config)) as client:
+        client.cookies.update(cookies)
+        response = client.get(
+            "https://github.com/settings/profile",
+            headers={"User-Agent": get_random_user_agent(), "Accept": "text/html"},
+            follow_redirects=False,
+        )
+
+    # 未登录时重定向到登录页面
+    if response.status_code == 200:
+        return STATE_VALID
+    if response.status_code in (301, 302, 303) and "/login" in response.headers.get("location", ""):
+        return STATE_EXPIRED
+    return STATE_UNKNOWN
+
+
+def check_storage_state(cache_file_path: str, proxy_config: dict | None = None) -> str:
+    """检查单个 storage state 文件
+
+    Args:
+        cache_file_path: storage state 文件路径
+        proxy_config: 代理配置
+
+    Returns:
+        检查结果，文件不存在时为 expired，类型无法识别或请求失败时为 unknown
+    """
+    if not os.path.exists(cache_file_path):
+        return STATE_EXPIRED
+
+    kind = get_storage_state_kind(cache_file_path)
+    try:
+        if kind == "linux.do":
+            return check_linuxdo_session(load_storage_state_cookies(cache_file_path, "linux.do"), proxy_config)
+        if kind == "github":
+            return check_github_session(load_storage_state_cookies(cache_file_path, "github.com"), proxy_config)
+    except Exception as e:
+        print(f"⚠️ Failed to check storage state {cache_file_path}: {e}")
+    return STATE_UNKNOWN
+
+
+async def sweep_storage_states(
+    storage_state_dir: str = "storage-states",
+    proxy_config: dict | None = None,
+    concurrency: int = 8,
+    skip_valid: bool = False,
+) -> dict[str, str]:
+    """并发检查目录下所有 Linux.do / GitHub storage state 文件
+
+    结果会写入当前进程的缓存，供 get_storage_state_verdict 使用
+
+    Args:
+        storage_state_dir: storage state 目录
+        proxy_config: 代理配置
+        concurrency: 最大并发数
+        skip_valid: 跳过当前进程中已确认有效的文件（例如同一进程中签到时刚刚检查或重新登录保存的会话）
+
+    Returns:
+        {缓存文件绝对路径: 检查结果}
+    """
+    paths = [
+        path
+        for path in sorted(glob.glob(os.path.join(storage_state_dir, "*.json")))
+        if get_storage_state_kind(path)
+    ]
+    reused = {}
+    if skip_valid:
+        reused = {
+            _normalize_path(path): STATE_VALID
+            for path in paths
+            if _verdicts.get(_normalize_path(path)) == STATE_VALID
+        }
+        paths = [path for path in paths if _normalize_path(path) not in reused]
+        if reused:
+            print(f"ℹ️ Storage state sweep: reusing {len(reused)} session(s) verified earlier in this process")
+    if not paths:
+        return reused
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _check(path: str) -> str:
+        async with semaphore:
+            return await asyncio.to_thread(check_storage_state, path, proxy_config)
+
+    results = await asyncio.gather(*[_check(path) for path in paths])
+    verdicts = {_normalize_path(path): verdict for path, verdict in zip(paths, results)}
+    _verdicts.update(verdicts)
+    verdicts.update(reused)
+
+    summary = {
+        verdict: list(verdicts.values()).count(verdict) for verdict in (STATE_VALID, STATE_EXPIRED, STATE_UNKNOWN)
+    }
+    print(
+        f"🔍 Storage state sweep: {summary[STATE_VALID]} valid, "
+        f"{summary[STATE_EXPIRED]} expired, {summary[STATE_UNKNOWN]} unknown"
+    )
+    return verdicts
+
+
+def set_storage_state_verdicts(verdicts: dict[str, str] | None) -> None:
+    """写入检查结果（用于把主进程的检查结果传递给工作进程）"""
+    if verdicts:
+        _verdicts.update(verdicts)
+
+
+def get_storage_state_verdict(cache_file_path: str) -> str:
+    """获取 storage state 检查结果
+
+    文件不存在时为 expired；未经检查的文件为 unknown，登录流程按原方式在浏览器中检查
+    """
+    if not cache_file_path or not os.path.exists(cache_file_path):
+        return STATE_EXPIRED
+    return _verdicts.get(_normalize_path(cache_file_path), STATE_UNKNOWN)
+
+
+def mark_storage_state(cache_file_path: str, verdict: str) -> None:
+    """更新 storage state 检查结果（重新登录保存会话后标记为有效）"""
+    if cache_file_path:
+        _verdicts[_normalize_path(cache_file_path)] = verdict
@@ -5,6 +5,7 @@ Topup 工具函数 - 简单封装充值功能
 
 import httpx
 
+from utils.circuit_breaker import create_http_client
 from utils.http_utils import response_resolve
 
 
@@ -15,6 +16,7 @@ def topup(
     cookies: dict,
     key: str,
     proxy: httpx.URL | None = None,
+    timeout: float = 30.0,
 ) -> dict:
     """执行充值请求
 
@@ -25,11 +27,13 @@ def topup(
         cookies: cookies 字典
         key: 充值密钥
         proxy: 代理配置（可选）
+        timeout: 请求超时（秒）
 
     Returns:
-        包含 success 和 message 或 error 的字典
+        包含 success 和 message 或 error 的字典；provider 正常响应但拒绝该 CDK 时 code_rejected 为 True，
+        HTTP 错误和请求异常与 CDK 无关（账号或网络问题）
     """
-    client = httpx.Client(http2=True, timeout=30.0, proxy=proxy)
+    client = create_http_client(proxy, timeout)
     try:
         # 设置 cookies
         client.cookies.update(cookies)
@@ -46,7 +50,7 @@ def topup(
             topup_url,
             headers=topup_headers,
             json={"key": key},
-            timeout=30,
+            timeout=timeout,
         )
 
         if response.status_code in [200, 400]:
@@ -70,7 +74,7 @@ def topup(
                 error_msg = json_data.get("message", "Unknown error")
                 # 检查是否是已使用的情况
                 if "已被使用" in error_msg or "already" in error_msg.lower() or "已使用" in error_msg:
-                    print(f"✅ {account_name}: Code already used - {error_msg}")
+                    print(f"ℹ️ {account_name}: Code already used - {error_msg}")
                     return {
                         "success": True,
                         "message": error_msg,
@@ -80,6 +84,7 @@ def topup(
                 return {
                     "success": False,
                     "error": f"Topup failed: {error_msg}(key: {key})",
+                    "code_rejected": True,
                 }
         else:
             print(f"❌ {account_name}: Topup failed - HTTP {response.status_code}")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+WAF 挑战自适应检测模块
+
+bypass_method 为 "auto" 的 provider 先用普通 HTTP 请求探测，只有返回挑战页面（HTML）时才启动浏览器获取 WAF cookies，
+探测结果按 (origin, 代理) 缓存一段时间，同一进程内使用同一代理的其它账号直接复用；
+设置 WAF_COOKIE_TTL 后浏览器获取的 WAF cookies 也按 (origin, 代理) 缓存，常驻模式下在多次运行之间复用
+"""
+
+import json
+import os
+import threading
+import time
+
+import httpx
+
+from utils.browser_utils import get_random_user_agent
+from utils.http_utils import proxy_resolve
+
+# 默认探测结果缓存时间（秒）
+DEFAULT_WAF_DECISION_TTL = 600
+
+# 默认 WAF cookies 缓存时间（秒），0 表示不缓存（每个账号单独通过浏览器获取）
+DEFAULT_WAF_COOKIE_TTL = 0
+
+
+def get_waf_decision_ttl(env_name: str = "WAF_DECISION_TTL") -> int:
+    """从环境变量获取探测结果缓存时间（秒）"""
+    value = os.getenv(env_name, "").strip()
+    if not value:
+        return DEFAULT_WAF_DECISION_TTL
+    try:
+        return max(0, int(value))
+    except ValueError:
+        print(f"⚠️ Invalid {env_name} value '{value}', using default {DEFAULT_WAF_DECISION_TTL}s")
+        return DEFAULT_WAF_DECISION_TTL
+
+
+def get_waf_cookie_ttl(env_name: str = "WAF_COOKIE_TTL") -> int:
+    """从环境变量获取 WAF cookies 缓存时间（秒）"""
+    value = os.getenv(env_name, "").strip()
+    if not value:
+        return DEFAULT_WAF_COOKIE_TTL
+    try:
+        return max(0, int(value))
+    except ValueError:
+        print(f"⚠️ Invalid {env_name} value '{value}', using default {DEFAULT_WAF_COOKIE_TTL}s")
+        return DEFAULT_WAF_COOKIE_TTL
+
+
+def is_challenge_response(response: httpx.Response) -> bool:
+    """判断响应是否为 WAF 挑战页面
+
+    API 接口正常时返回 JSON；返回 HTML 或无法解析为 JSON 时视为挑战页面（与 response_resolve 的判断一致）
+    """
+    content_type = response.headers.get("content-type", "").lower()
+    if "text/html" in content_type:
+        return True
+    try:
+        response.json()
+        return False
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return True
+
+
+class WafDecisionCache:
+    """按 (origin, 代理地址) 缓存的 WAF 探测结果（线程安全，HTTP 通道的多个线程共享）
+
+    WAF 是否挑战与出口 IP 有关，通过不同代理得到的探测结果分别缓存
+    """
+
+    def __init__(self):
+        # {(origin, 代理地址): (是否需要 WAF cookies, 过期时间)}
+        self._decisions: dict[tuple[str, str], tuple[bool, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, origin: str, proxy_server: str = "", now: float | None = None) -> bool | None:
+        """获取未过期的探测结果，没有时返回 None"""
+        with self._lock:
+            decision = self._decisions.get((origin, proxy_server))
+            if not decision:
+                return None
+            challenged, expires_at = decision
+            if (now if now is not None else time.monotonic()) >= expires_at:
+                self._decisions.pop((origin, proxy_server), None)
+                return None
+            return challenged
+
+    def set(self, origin: str, proxy_server: str, challenged: bool, ttl: int, now: float | None = None) -> None:
+        """记录探测结果"""
+        with self._lock:
+            self._decisions[(origin, proxy_server)] = (challenged, (now if now is not None else time.monotonic()) + ttl)
+
+    def invalidate(self, origin: str, proxy_server: str = "") -> None:
+        """删除探测结果"""
+        with self._lock:
+            self._decisions.pop((origin, proxy_server), None)
+
+
+# 当前进程共享的探测结果缓存
+waf_decisions = WafDecisionCache()
+
+
+class WafCookieCache:
+    """按 (origin, 代理地址) 缓存的 WAF cookies（线程安全，HTTP 通道的多个线程共享）"""
+
+    def __init__(self):
+        # {(origin, 代理地址): (WAF cookies, 过期时间)}
+        self._cookies: dict[tuple[str, str], tuple[dict, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, origin: str, proxy_server: str = "", now: float | None = None) -> dict | None:
+        """获取未过期的 WAF cookies，没有时返回 None"""
+        with self._lock:
+            entry = self._cookies.get((origin, proxy_server))
+            if not entry:
+                return None
+            cookies, expires_at = entry
+            if (now if now is not None else time.monotonic()) >= expires_at:
+                self._cookies.pop((origin, proxy_server), None)
+                return None
+            return dict(cookies)
+
+    def set(self, origin: str, proxy_server: str, cookies: dict, ttl: int, now: float | None = None) -> None:
+        """记录 WAF cookies"""
+        with self._lock:
+            self._cookies[(origin, proxy_server)] = (dict(cookies), (now if now is not None else time.monotonic()) + ttl)
+
+    def invalidate(self, origin: str, proxy_server: str = "") -> None:
+        """删除 WAF cookies"""
+        with self._lock:
+            self._cookies.pop((origin, proxy_server), None)
+
+
+# 当前进程共享的 WAF cookies 缓存
+waf_cookie_cache = WafCookieCache()
+
+
+def probe_waf_challenge(probe_url: str, proxy_config: dict | None = None) -> bool | None:
+    """使用普通 HTTP 请求探测是否出现 WAF 挑战
+
+    Args:
+        probe_url: 探测地址，使用 provider 的 /api/status 接口
+        proxy_config: 代理配置
+
+    Returns:
+        是否出现挑战页面；请求失败时返回 None（无法判断）
+    """
+    try:
+        with httpx.Client(http2=True, timeout=15.0, proxy=proxy_resolve(proxy_config)) as client:
+            response = client.get(
+                probe_url,
+                headers={"User-Agent": get_random_user_agent(), "Accept": "application/json, text/plain, */*"},
+            )
+        return is_challenge_response(response)
+    except Exception as e:
+        print(f"⚠️ WAF probe request to {probe_url} failed: {e}")
+        return None
+
+
+def detect_waf_challenge(origin: str, probe_url: str, proxy_config: dict | None = None) -> bool:
+    """检测 origin 当前是否需要 WAF cookies，优先使用通过同一代理得到的缓存探测结果
+
+    Args:
+        origin: provider origin
+        probe_url: 探测地址
+        proxy_config: 代理配置
+
+    Returns:
+        是否需要通过浏览器获取 WAF cookies；探测请求失败时返回 True（交给浏览器处理），且不缓存，
+        一次网络抖动不会让之后的账号都使用浏览器
+    """
+    proxy_server = (proxy_config or {}).get("server", "")
+    challenged = waf_decisions.get(origin, proxy_server)
+    if challenged is not None:
+        return challenged
+
+    challenged = probe_waf_challenge(probe_url, proxy_config)
+    if challenged is None:
+        return True
+    waf_decisions.set(origin, proxy_server, challenged, get_waf_decision_ttl())
+    return challenged
@@ -0,0 +1,857 @@
+#!/usr/bin/env python3
+"""
+账号任务执行模块
+
+支持在当前事件循环中顺序执行，或分发到多个独立的工作进程中并行执行
+"""
+
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+from utils.browser_transport import BrowserSlots, bind_browser_slots, close_browser_transports, release_browser_slot
+from utils.checkin_ledger import CheckInLedger
+from utils.circuit_breaker import circuit_breaker
+from utils.config import AccountConfig, ProviderConfig
+from utils.deadline import Deadline
+from utils.health_probe import DECISION_DEFER, DECISION_SKIP, OriginHealth
+from utils.job_history import JobHistory
+from utils.oauth_batch import BATCH_MAX_START_DELAY_SECONDS, is_oauth_batch_enabled, preauthorize
+from utils.proxy_pool import ProxyPool
+from utils.reset_window import plan_start_times
+from utils.run_budget import SHED_ACCOUNT, SHED_NONE, RunBudget, RunTally
+from utils.run_checkpoint import RunCheckpoint
+from utils.session_store import SessionStore
+from utils.storage_state_check import set_storage_state_verdicts
+from utils.waf_detector import detect_waf_challenge, waf_decisions
+
+# 账号结果类型: [(认证方式, 是否成功, 用户信息)]
+AccountResults = list[tuple[str, bool, dict | None]]
+
+
+@dataclass
+class AccountJob:
+    """单个账号的签到任务（可被 pickle 传递到工作进程）"""
+
+    index: int
+    account_name: str
+    account_config: AccountConfig
+    provider_config: ProviderConfig
+    global_proxy: dict | None = None
+    ledger: CheckInLedger | None = None
+    # 首次成功模式: 任一认证方式成功后跳过其余方式，method_order 为尝试顺序
+    first_success: bool = False
+    method_order: list[str] | None = None
+    # 上次签到后保存的 cookies，优先于配置中的 cookies
+    stored_cookies: dict | None = None
+    # provider API 请求超时（秒），由启动前健康探测按延迟设置
+    request_timeout: float = 30.0
+    # 账号处理时间上限（秒），None 表示不限制；截止时间在账号开始处理时才计算
+    deadline_seconds: float | None = None
+    # 整体运行时间预算、预估耗时（秒）和所在通道共用的耗时统计，由 run_jobs 设置
+    run_budget: RunBudget | None = None
+    estimated_seconds: float | None = None
+    run_tally: RunTally | None = None
+    # 运行检查点，账号完成后立即写入
+    checkpoint: RunCheckpoint | None = None
+    # 计划启动时间戳（重置窗口调度），None 表示立即启动
+    start_at: float | None = None
+    # 代理池，global_proxy 为其中固定分配给该账号的代理，不可用时故障转移
+    proxy_pool: ProxyPool | None = None
+
+
+# 每个 Camoufox 浏览器预估占用的内存（MB），用于计算浏览器通道大小
+BROWSER_MEMORY_MB = 1024
+
+# 没有历史记录时的预估耗时（秒）
+DEFAULT_HTTP_JOB_SECONDS = 5.0
+DEFAULT_BROWSER_JOB_SECONDS = 90.0
+
+
+def _get_total_memory_mb() -> int | None:
+    """获取物理内存大小（MB），无法获取时返回 None"""
+    try:
+        if hasattr(os, "sysconf"):
+            return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullTotalPhys // (1024 * 1024)
+    except Exception:
+        pass
+    return None
+
+
+def get_browser_lane_size() -> int:
+    """根据 CPU 核心数和内存大小计算可同时运行的浏览器任务数"""
+    size = os.cpu_count() or 1
+    memory_mb = _get_total_memory_mb()
+    if memory_mb:
+        size = min(size, memory_mb // BROWSER_MEMORY_MB)
+    return max(1, size)
+
+
+def get_worker_processes(env_name: str = "WORKER_PROCESSES") -> int:
+    """从环境变量获取工作进程数
+
+    Args:
+        env_name: 环境变量名称，默认为 "WORKER_PROCESSES"
+
+    Returns:
+        工作进程数，0 表示在当前进程中顺序执行；配置为 "auto" 时根据 CPU 核心数和内存大小计算
+    """
+    value = os.getenv(env_name, "").strip().lower()
+    if not value:
+        return 0
+    if value == "auto":
+        return get_browser_lane_size()
+    try:
+        return max(0, int(value))
+    except ValueError:
+        print(f"⚠️ Invalid {env_name} value '{value}', running accounts in-process")
+        return 0
+
+
+def get_http_concurrency(env_name: str = "HTTP_CONCURRENCY") -> int:
+    """从环境变量获取纯 HTTP 任务的并发数，默认 16"""
+    value = os.getenv(env_name, "").strip()
+    try:
+        return max(1, int(value)) if value else 16
+    except ValueError:
+        print(f"⚠️ Invalid {env_name} value '{value}', using default 16")
+        return 16
+
+
+def _get_proxy_server(job: AccountJob) -> str:
+    """账号实际使用的代理地址（账号配置的代理优先）"""
+    return (job.account_config.proxy or job.global_proxy or {}).get("server", "")
+
+
+async def detect_waf_challenges(jobs: list[AccountJob], skip_origins: list[str] | None = None) -> None:
+    """并发探测 WAF 自适应检测（auto）的 provider 当前是否出现挑战，按 (origin, 代理) 缓存，用于决定任务进入哪个通道
+
+    签到时 get_waf_cookies 直接复用缓存的探测结果，不会重复探测
+
+    Args:
+        jobs: 账号任务列表
+        skip_origins: 启动前探测不可用的站点，不再探测
+    """
+    targets = {}
+    for job in jobs:
+        provider_config = job.provider_config
+        if not provider_config.is_waf_adaptive() or provider_config.origin.rstrip("/") in (skip_origins or []):
+            continue
+        proxy_config = job.account_config.proxy or job.global_proxy
+        targets.setdefault((provider_config.origin, _get_proxy_server(job)), (provider_config.get_status_url(), proxy_config))
+    await asyncio.gather(
+        *[
+            asyncio.to_thread(detect_waf_challenge, origin, probe_url, proxy_config)
+            for (origin, _), (probe_url, proxy_config) in targets.items()
+        ]
+    )
+
+
+def job_needs_browser(job: AccountJob) -> bool:
+    """根据账号和 provider 配置判断任务是否需要启动浏览器
+
+    需要浏览器的步骤: 总是需要 WAF cookies 的 provider、WAF 自适应检测（auto）当前出现挑战或尚未探测的 provider、
+    通过浏览器获取 CDK 的 provider、当前签到日尚未完成的 GitHub / Linux.do OAuth 登录
+    """
+    provider_config = job.provider_config
+    if provider_config.needs_waf_cookies() or provider_config.needs_browser_cdk():
+        return True
+    if provider_config.is_waf_adaptive() and waf_decisions.get(provider_config.origin, _get_proxy_server(job)) is not False:
+        return True
+
+    for auth_method, auth_info in (("github", job.account_config.github), ("linux.do", job.account_config.linux_do)):
+        if not auth_info:
+            continue
+        if job.ledger and job.ledger.is_done_today(job.account_name, provider_config, auth_method):
+            continue
+        return True
+    return False
+
+
+def _get_identity_keys(job: AccountJob, batch_oauth: bool = True) -> list[str]:
+    """获取账号配置的身份标识
+
+    包括 cookies 方式的 provider 用户（origin 和 api_user），batch_oauth 为 True 时还包括 Linux.do 和 GitHub 用户名
+    """
+    keys = []
+    if job.account_config.cookies and job.account_config.api_user and job.provider_config:
+        keys.append(f"api_user:{job.provider_config.origin.rstrip('/')}|{job.account_config.api_user}")
+    if batch_oauth:
+        for method, auth_info in (("linux.do", job.account_config.linux_do), ("github", job.account_config.github)):
+            username = auth_info.get("username") if auth_info else None
+            if username:
+                keys.append(f"{method}:{username}")
+    return keys
+
+
+def group_jobs(jobs: list[AccountJob], batch_oauth: bool = True) -> list[list[AccountJob]]:
+    """将账号任务分组
+
+    对应同一 provider 用户（origin 和 api_user 相同）的 cookies 账号总是分到同一组，在同一进程中执行，
+    以便身份登记表只签到、充值一次。启用批量 OAuth 时，共用同一 Linux.do 或 GitHub 身份的账号也分到同一组（传递合并：
+    A 与 B 共用 Linux.do、B 与 C 共用 GitHub 时三者同组），以便每个身份只登录一次即可完成所有 provider 的授权
+
+    Args:
+        jobs: 账号任务列表
+        batch_oauth: 是否按 OAuth 身份分组
+
+    Returns:
+        任务组列表，按每组首个账号在配置中的顺序排列
+    """
+    groups: list[list[AccountJob]] = []
+    identity_groups: dict[str, list[AccountJob]] = {}
+    for job in jobs:
+        keys = _get_identity_keys(job, batch_oauth)
+
+        # 找出该账号身份关联的所有已有分组，按首次出现的顺序合并
+        matched: list[list[AccountJob]] = []
+        for key in keys:
+            group = identity_groups.get(key)
+            if group is not None and not any(group is existing for existing in matched):
+                matched.append(group)
+
+        if not matched:
+            group = [job]
+            groups.append(group)
+        else:
+            group = matched[0]
+            for other in matched[1:]:
+                group.extend(other)
+                groups = [existing for existing in groups if existing is not other]
+                for key, value in identity_groups.items():
+                    if value is other:
+                        identity_groups[key] = group
+            group.append(job)
+            group.sort(key=lambda item: item.index)
+
+        for key in keys:
+            identity_groups[key] = group
+
+    groups.sort(key=lambda group: group[0].index)
+    return groups
+
+
+def estimate_job_duration(job: AccountJob, history: JobHistory | None = None) -> float:
+    """预估任务耗时（秒）
+
+    优先使用账号自己的历史耗时，其次使用同一 provider 的平均耗时，都没有时按是否需要浏览器给出默认值
+    """
+    if history is not None:
+        duration = history.get_duration(job.account_name, job.provider_config.name)
+        if duration is None:
+            duration = history.get_provider_duration(job.provider_config.name)
+        if duration is not None:
+            return duration
+    return DEFAULT_BROWSER_JOB_SECONDS if job_needs_browser(job) else DEFAULT_HTTP_JOB_SECONDS
+
+
+def estimate_group_duration(group: list[AccountJob], history: JobHistory | None = None) -> float:
+    """预估任务组耗时（组内任务顺序执行）"""
+    return sum(estimate_job_duration(job, history) for job in group)
+
+
+def get_proxy_limit_key(server: str) -> str:
+    """代理并发限制在站点信号量表中的键"""
+    return f"proxy:{server}"
+
+
+def _get_group_origins(group: list[AccountJob]) -> list[str]:
+    """获取任务组访问的所有站点（provider 和 CDK 站点），按名称排序"""
+    origins = set()
+    for job in group:
+        if job.provider_config:
+            origins.add(job.provider_config.origin.rstrip("/"))
+            origins.update(job.provider_config.get_cdk_origins())
+    return sorted(origins)
+
+
+@contextlib.asynccontextmanager
+async def _limit_origins(group: list[AccountJob], origin_semaphores: dict[str, asyncio.Semaphore] | None):
+    """按站点和代理限制并发: 依次获取任务组涉及的所有受限站点和代理的信号量（按名称排序，避免死锁）"""
+    keys = set(_get_group_origins(group))
+    keys.update(get_proxy_limit_key(job.global_proxy["server"]) for job in group if job.global_proxy)
+    async with contextlib.AsyncExitStack() as stack:
+        for key in sorted(keys):
+            semaphore = (origin_semaphores or {}).get(key)
+            if semaphore:
+                await stack.enter_async_context(semaphore)
+        yield
+
+
+async def _wait_for_start(jobs: list[AccountJob]) -> None:
+    """等待任务中最早的计划启动时间（重置窗口调度）"""
+    start_times = [job.start_at for job in jobs if job.start_at is not None]
+    if not start_times:
+        return
+    delay = min(start_times) - time.time()
+    if delay > 0:
+        print(f"⏳ {', '.join(job.account_name for job in jobs)}: Waiting {delay:.0f}s for scheduled start")
+        await asyncio.sleep(delay)
+
+
+def _budget_exhausted_results(job: AccountJob) -> AccountResults:
+    """运行时间预算用完、未开始处理的账号的结果: 所有配置的认证方式都以失败记录，保证出现在通知中"""
+    auth_configs = (
+        ("cookies", job.account_config.cookies),
+        ("github", job.account_config.github),
+        ("linux.do", job.account_config.linux_do),
+    )
+    return [
+        (auth_method, False, {"error": "Skipped: run time budget exhausted", "budget_exhausted": True})
+        for auth_method, auth_config in auth_configs
+        if auth_config
+    ]
+
+
+def _needs_proxy_failover(job: AccountJob, results: AccountResults) -> bool:
+    """使用代理池分配的代理、且所有认证方式都失败（不包括跳过的方式）时，检查代理是否需要故障转移"""
+    if job.proxy_pool is None or not job.global_proxy or job.account_config.proxy:
+        return False
+    return not any(success or (user_info and user_info.get("skipped")) for _, success, user_info in results)
+
+
+def _create_checkin(job: AccountJob):
+    """为账号任务创建 CheckIn"""
+    from checkin import CheckIn
+
+    return CheckIn(
+        job.account_name,
+        job.account_config,
+        job.provider_config,
+        global_proxy=job.global_proxy,
+        ledger=job.ledger,
+        first_success=job.first_success,
+        method_order=job.method_order,
+        stored_cookies=job.stored_cookies,
+        request_timeout=job.request_timeout,
+    )
+
+
+def _all_already_checked_in(results: AccountResults) -> bool:
+    """判断账号的所有认证方式是否都因签到记录而跳过"""
+    return bool(results) and all(user_info and user_info.get("already_checked_in") for _, _, user_info in results)
+
+
+def _get_batch_deadline(jobs: list[AccountJob]) -> Deadline:
+    """批量 OAuth 授权的截止时间: 不超过单个账号的处理时间上限和整体运行时间预算的剩余时间"""
+    limits = [job.deadline_seconds for job in jobs if job.deadline_seconds is not None]
+    limits += [job.run_budget.remaining() for job in jobs if job.run_budget is not None]
+    return Deadline(min(limits) if limits else None)
+
+
+def _get_batch_checkins(jobs: list[AccountJob], checkins: list, now: float | None = None) -> list:
+    """选出参与批量 OAuth 授权的 CheckIn
+
+    首次成功模式下 OAuth 只在前面的认证方式失败时才执行，不提前批量授权；不可用的 provider 不授权；
+    计划启动时间晚于 BATCH_MAX_START_DELAY_SECONDS 的账号等到开始时单独登录，避免授权结果在等待期间过期
+
+    Args:
+        jobs: 同一组的账号任务
+        checkins: 与 jobs 一一对应的 CheckIn
+        now: 当前时间戳，默认为 time.time()
+    """
+    now = now if now is not None else time.time()
+    return [
+        checkin
+        for job, checkin in zip(jobs, checkins)
+        if not checkin.first_success
+        and not circuit_breaker.is_open(checkin.provider_config.origin.rstrip("/"))
+        and (job.start_at or now) - now <= BATCH_MAX_START_DELAY_SECONDS
+    ]
+
+
+async def run_job_group(
+    jobs: list[AccountJob],
+    batch_oauth: bool = True,
+    storage_state_verdicts: dict[str, str] | None = None,
+    durations: dict[int, float] | None = None,
+    browser_slots: BrowserSlots | None = None,
+) -> dict[int, AccountResults | Exception]:
+    """在当前事件循环中执行一组账号任务
+
+    Args:
+        jobs: 同一组的账号任务
+        batch_oauth: 是否对共用身份的账号执行批量 OAuth 授权
+        storage_state_verdicts: 启动前的 storage state 检查结果
+        durations: 可选，写入每个任务的耗时（秒）{任务索引: 耗时}
+        browser_slots: 可选，HTTP 通道中的任务组需要启动浏览器时（WAF 挑战、API 返回 HTML）占用的浏览器名额
+
+    Returns:
+        {任务索引: 账号结果或异常}
+    """
+    # 批量 OAuth 授权会访问组内所有 provider，在最早的计划启动时间之后进行
+    await _wait_for_start(jobs)
+    set_storage_state_verdicts(storage_state_verdicts)
+
+    checkins = [_create_checkin(job) for job in jobs]
+
+    batch_checkins = _get_batch_checkins(jobs, checkins)
+    if batch_oauth and len(batch_checkins) > 1:
+        try:
+            await preauthorize(batch_checkins, _get_batch_deadline(jobs))
+        except Exception as e:
+            print(f"⚠️ Batched OAuth authorization failed, falling back to per-account sign-in: {e}")
+
+    job_results: dict[int, AccountResults | Exception] = {}
+    # 整体运行的耗时统计（所在通道共用），没有时只统计本组
+    run_tally = next((job.run_tally for job in jobs if job.run_tally is not None), None) or RunTally(
+        {job.index: job.estimated_seconds or estimate_job_duration(job) for job in jobs}
+    )
+    bind_browser_slots(browser_slots)
+    try:
+        for job, checkin in zip(jobs, checkins):
+            await _wait_for_start([job])
+            # 运行时间预算: 按整体运行中修正后的预估耗时决定削减的工作，账号截止时间不超过预算
+            shed_level = SHED_NONE
+            deadline_seconds = job.deadline_seconds
+            if job.run_budget is not None:
+                account_seconds, pending_seconds = run_tally.project(job.index)
+                shed_level = job.run_budget.get_shed_level(account_seconds, pending_seconds)
+                if shed_level == SHED_ACCOUNT:
+                    print(f"⏰ {job.account_name}: Run time budget exhausted, account not started")
+                    job_results[job.index] = _budget_exhausted_results(job)
+                    continue
+                remaining = job.run_budget.remaining()
+                deadline_seconds = remaining if deadline_seconds is None else min(deadline_seconds, remaining)
+
+            print(f"🌀 Processing {job.account_name} using provider '{job.account_config.provider}'")
+            start_time = time.monotonic()
+            try:
+                deadline = Deadline(deadline_seconds)
+                results = await checkin.execute(deadline, shed_level)
+                # 分配的代理不可用时转移到下一个可用代理重试，与第一次尝试共用账号截止时间
+                while _needs_proxy_failover(job, results) and not deadline.expired():
+                    proxy = await job.proxy_pool.find_failover(job.global_proxy, job.account_name)
+                    if proxy is None:
+                        break
+                    print(
+                        f"🔀 {job.account_name}: Proxy {job.global_proxy['server']} unavailable, "
+                        f"failing over to {proxy['server']}"
+                    )
+                    job.global_proxy = proxy
+                    results = await _create_checkin(job).execute(deadline, shed_level)
+                job_results[job.index] = results
+                if job.checkpoint is not None:
+                    job.checkpoint.save(job.account_name, job.provider_config, job_results[job.index])
+            except Exception as e:
+                job_results[job.index] = e
+            elapsed = time.monotonic() - start_time
+            run_tally.record(job.index, elapsed)
+            # 削减过工作的账号耗时偏短，不计入历史
+            if durations is not None and shed_level == SHED_NONE:
+                durations[job.index] = elapsed
+    finally:
+        # 未执行的账号不再计入剩余耗时
+        run_tally.drop([job.index for job in jobs])
+        # 关闭组内共享的 API 回退浏览器，释放占用的浏览器名额
+        await close_browser_transports()
+        release_browser_slot()
+    return job_results
+
+
+def _get_group_proxy_pool(jobs: list[AccountJob]) -> ProxyPool | None:
+    """获取任务组使用的代理池"""
+    return next((job.proxy_pool for job in jobs if job.proxy_pool is not None), None)
+
+
+def _run_job_group_in_worker(
+    jobs: list[AccountJob],
+    batch_oauth: bool,
+    storage_state_verdicts: dict[str, str] | None,
+    open_circuits: dict[str, float] | None = None,
+) -> tuple[dict[int, AccountResults | Exception], dict[int, float], dict]:
+    """工作进程入口: 每个任务组使用新的事件循环，浏览器实例在任务组结束时关闭
+
+    Args:
+        open_circuits: 主进程中熔断中的 origin {origin: 已熔断的秒数}（包括启动前探测不可用的站点）
+
+    Returns:
+        (账号结果, 任务耗时, 工作进程中变化的状态)；状态包括新标记为不可用的代理、新熔断的 origin
+        和完成的账号耗时，由主进程合并
+    """
+    circuit_breaker.merge_open_circuits(open_circuits or {})
+    started_at = time.monotonic()
+    durations: dict[int, float] = {}
+    job_results = asyncio.run(run_job_group(jobs, batch_oauth, storage_state_verdicts, durations))
+    proxy_pool = _get_group_proxy_pool(jobs)
+    run_tally = next((job.run_tally for job in jobs if job.run_tally is not None), None)
+    state = {
+        "unhealthy_proxies": proxy_pool.get_unhealthy() if proxy_pool else {},
+        "open_circuits": circuit_breaker.get_open_circuits(since=started_at),
+        "finished_jobs": run_tally.get_finished([job.index for job in jobs]) if run_tally else {},
+    }
+    return job_results, durations, state
+
+
+def _merge_worker_state(jobs: list[AccountJob], state: dict) -> None:
+    """把工作进程中变化的状态合并到主进程，后续任务组（包括其它工作进程）使用合并后的状态"""
+    proxy_pool = _get_group_proxy_pool(jobs)
+    if proxy_pool is not None:
+        for server, health in state.get("unhealthy_proxies", {}).items():
+            proxy_pool.mark_unhealthy(server, health.error)
+    circuit_breaker.merge_open_circuits(state.get("open_circuits", {}))
+    _finish_group_tally(jobs, state.get("finished_jobs", {}))
+
+
+def _finish_group_tally(jobs: list[AccountJob], finished: dict[int, tuple[float, float]] | None = None) -> None:
+    """把工作进程中完成的账号合并到主进程的耗时统计，未执行的账号不再计入剩余耗时"""
+    run_tally = next((job.run_tally for job in jobs if job.run_tally is not None), None)
+    if run_tally is None:
+        return
+    run_tally.merge_finished(finished or {})
+    run_tally.drop([job.index for job in jobs])
+
+
+class _WorkerProcessPool:
+    """浏览器通道在整个运行期间共用的工作进程池
+
+    工作进程异常退出时进程池不可用（正在执行的任务组都会失败），之后提交的任务组使用重新创建的进程池
+    """
+
+    def __init__(self, max_workers: int, mp_context):
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context)
+
+    async def run(self, *args):
+        """在工作进程中执行 _run_job_group_in_worker"""
+        executor = self._executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, _run_job_group_in_worker, *args)
+        except BrokenProcessPool:
+            if self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context)
+            raise
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def _run_group_in_subprocess(
+    jobs: list[AccountJob],
+    batch_oauth: bool,
+    storage_state_verdicts: dict[str, str] | None,
+    browser_slots: BrowserSlots,
+    worker_pool: _WorkerProcessPool,
+    durations: dict[int, float],
+    origin_semaphores: dict[str, asyncio.Semaphore] | None = None,
+) -> dict[int, AccountResults | Exception]:
+    """在工作进程池中执行一组账号任务
+
+    提交时带上主进程当前的熔断状态（代理池状态随任务传递），完成后把工作进程中的变化合并回主进程
+    """
+    # 等待计划启动时间时不占用进程和站点并发名额
+    await _wait_for_start(jobs)
+    async with _limit_origins(jobs, origin_semaphores):
+        await browser_slots.acquire()
+        try:
+            job_results, job_durations, state = await worker_pool.run(
+                jobs,
+                batch_oauth,
+                storage_state_verdicts,
+                circuit_breaker.get_open_circuits(),
+            )
+            durations.update(job_durations)
+            _merge_worker_state(jobs, state)
+            return job_results
+        except BrokenProcessPool:
+            print(f"❌ {', '.join(job.account_name for job in jobs)}: Worker process terminated abruptly")
+            _finish_group_tally(jobs)
+            return {job.index: RuntimeError("Worker process terminated abruptly") for job in jobs}
+        except Exception as e:
+            _finish_group_tally(jobs)
+            return {job.index: e for job in jobs}
+        finally:
+            browser_slots.release()
+
+
+async def _run_http_lane(
+    groups: list[list[AccountJob]],
+    batch_oauth: bool,
+    storage_state_verdicts: dict[str, str] | None,
+    concurrency: int,
+    durations: dict[int, float],
+    origin_semaphores: dict[str, asyncio.Semaphore] | None = None,
+    browser_slots: BrowserSlots | None = None,
+) -> dict[int, AccountResults | Exception]:
+    """高并发执行纯 HTTP 任务组
+
+    CheckIn 使用同步 httpx 客户端，每组在线程中运行独立的事件循环以实现并发；
+    运行中意外需要浏览器（WAF 开始挑战、API 返回 HTML）的任务组等待浏览器通道的空闲名额后再启动浏览器
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _run(group: list[AccountJob]) -> dict[int, AccountResults | Exception]:
+        await _wait_for_start(group)
+        async with _limit_origins(group, origin_semaphores), semaphore:
+            try:
+                return await asyncio.to_thread(
+                    asyncio.run,
+                    run_job_group(group, batch_oauth, storage_state_verdicts, durations, browser_slots),
+                )
+            except Exception as e:
+                return {job.index: e for job in group}
+
+    job_results: dict[int, AccountResults | Exception] = {}
+    for group_results in await asyncio.gather(*[_run(group) for group in groups]):
+        job_results.update(group_results)
+    return job_results
+
+
+async def _run_browser_lane(
+    groups: list[list[AccountJob]],
+    batch_oauth: bool,
+    storage_state_verdicts: dict[str, str] | None,
+    worker_processes: int,
+    durations: dict[int, float],
+    origin_semaphores: dict[str, asyncio.Semaphore] | None = None,
+    browser_slots: BrowserSlots | None = None,
+) -> dict[int, AccountResults | Exception]:
+    """执行需要浏览器的任务组，worker_processes 为 0 时在当前事件循环中顺序执行
+
+    每个任务组占用一个浏览器名额（与 HTTP 通道中意外需要浏览器的任务组共用）
+    """
+    job_results: dict[int, AccountResults | Exception] = {}
+    browser_slots = browser_slots or BrowserSlots(max(1, worker_processes))
+
+    if worker_processes <= 0:
+        for group in groups:
+            await browser_slots.acquire()
+            try:
+                job_results.update(
+                    await run_job_group(group, batch_oauth, storage_state_verdicts, durations)
+                )
+            finally:
+                browser_slots.release()
+        return job_results
+
+    # spawn 在所有平台行为一致，避免 fork 继承父进程中的浏览器/事件循环状态；
+    # 工作进程在整个运行期间复用，浏览器名额保证只有空闲的进程才会接到任务组（等待中的任务组不占用站点并发名额）
+    worker_pool = _WorkerProcessPool(worker_processes, multiprocessing.get_context("spawn"))
+    try:
+        results = await asyncio.gather(
+            *[
+                _run_group_in_subprocess(
+                    group,
+                    batch_oauth,
+                    storage_state_verdicts,
+                    browser_slots,
+                    worker_pool,
+                    durations,
+                    origin_semaphores,
+                )
+                for group in groups
+            ]
+        )
+    finally:
+        worker_pool.shutdown()
+    for group_results in results:
+        job_results.update(group_results)
+    return job_results
+
+
+async def run_jobs(
+    jobs: list[AccountJob],
+    worker_processes: int = 0,
+    storage_state_verdicts: dict[str, str] | None = None,
+    http_concurrency: int = 16,
+    history: JobHistory | None = None,
+    health: dict[str, OriginHealth] | None = None,
+    run_budget: RunBudget | None = None,
+    reset_window: float = 0.0,
+    reset_jitter: float = 0.0,
+    provider_concurrency: int | None = None,
+    proxy_limits: dict[str, int] | None = None,
+) -> dict[int, AccountResults | Exception]:
+    """执行账号任务
+
+    任务组分为两个通道同时执行: 纯 HTTP 任务在高并发通道中执行，需要浏览器的任务在浏览器通道中执行，
+    耗时短的账号不会排在耗时长的账号后面。每个通道内按历史耗时从长到短启动任务组，
+    启动前探测为较慢的站点的任务组排在最后并限制并发，不可用的站点直接熔断
+
+    Args:
+        jobs: 账号任务列表
+        worker_processes: 浏览器通道的工作进程数，0 表示在当前进程中顺序执行
+        storage_state_verdicts: 启动前的 storage state 检查结果，会传递给各工作进程
+        http_concurrency: 纯 HTTP 通道的并发数
+        history: 可选，任务历史，用于排序并记录本次耗时
+        health: 可选，启动前健康探测结果 {站点 origin: OriginHealth}
+        run_budget: 可选，整体运行时间预算，时间不够时削减工作或不再开始新的账号
+        reset_window: 每日重置后分散同一 provider 账号启动时间的窗口（秒），0 表示不分散
+        reset_jitter: 账号启动时间的最大随机抖动（秒）
+        provider_concurrency: 每个 provider 同时处理的最大任务组数（provider 配置的 max_concurrency 优先）
+        proxy_limits: 可选，代理池中每个代理同时处理的最大任务组数 {代理地址: 上限}
+
+    Returns:
+        {任务索引: 账号结果或异常}
+    """
+    batch_oauth = is_oauth_batch_enabled()
+    health = health or {}
+    unavailable_origins = [origin for origin, result in health.items() if result.decision == DECISION_SKIP]
+    # 启动前探测不可用的站点只在这里熔断一次，之后由冷却时间和半开探测决定何时恢复（工作进程随任务组接收熔断状态）
+    for origin in unavailable_origins:
+        circuit_breaker.trip(origin)
+
+    # WAF 自适应检测的 provider 先探测是否出现挑战，出现挑战的账号进入浏览器通道
+    await detect_waf_challenges(jobs, unavailable_origins)
+
+    for job in jobs:
+        job.run_budget = run_budget
+        job.estimated_seconds = estimate_job_duration(job, history)
+
+    if reset_window > 0 or reset_jitter > 0:
+        start_times = plan_start_times(jobs, reset_window, reset_jitter)
+        for job in jobs:
+            job.start_at = start_times.get(job.index)
+        if start_times:
+            spread_seconds = max(start_times.values()) - time.time()
+            print(
+                f"⚙️ Staggering {len(start_times)} account(s) over the next {spread_seconds:.0f}s "
+                f"(reset window {reset_window:.0f}s, jitter {reset_jitter:.0f}s)"
+            )
+    groups = group_jobs(jobs, batch_oauth)
+
+    http_groups = []
+    browser_groups = []
+    for group in groups:
+        if any(job_needs_browser(job) for job in group):
+            browser_groups.append(group)
+        else:
+            http_groups.append(group)
+
+    # 运行时间预算: 每个通道的任务组共用一份耗时统计，按整体进度和通道的并行数预估剩余运行时间
+    if run_budget is not None:
+        for lane_groups, parallelism in ((http_groups, http_concurrency), (browser_groups, max(1, worker_processes))):
+            lane_jobs = [job for group in lane_groups for job in group]
+            run_tally = RunTally({job.index: job.estimated_seconds for job in lane_jobs}, parallelism)
+            for job in lane_jobs:
+                job.run_tally = run_tally
+
+    origin_limits = {origin: result.concurrency for origin, result in health.items() if result.concurrency}
+    for job in jobs:
+        limit = job.provider_config.max_concurrency or provider_concurrency
+        if limit:
+            origin = job.provider_config.origin.rstrip("/")
+            origin_limits[origin] = min(origin_limits.get(origin, limit), limit)
+    for server, limit in (proxy_limits or {}).items():
+        origin_limits[get_proxy_limit_key(server)] = limit
+    origin_semaphores = {origin: asyncio.Semaphore(limit) for origin, limit in origin_limits.items()}
+
+    def _priority(group: list[AccountJob]) -> tuple[bool, float]:
+        deferred = any(
+            health.get(origin) and health[origin].decision == DECISION_DEFER for origin in _get_group_origins(group)
+        )
+        return deferred, -estimate_group_duration(group, history)
+
+    # 最长任务优先: 预计耗时长的任务组先启动，延后处理的站点排在最后
+    http_groups.sort(key=_priority)
+    browser_groups.sort(key=_priority)
+
+    http_count = sum(len(group) for group in http_groups)
+    browser_count = sum(len(group) for group in browser_groups)
+    browser_lane = f"{worker_processes} worker process(es)" if worker_processes > 0 else "sequential, in-process"
+    print(
+        f"⚙️ Scheduling {http_count} HTTP-only account(s) (concurrency {http_concurrency}) and "
+        f"{browser_count} browser account(s) ({browser_lane})"
+    )
+
+    # 浏览器名额: 浏览器通道的每个工作进程（顺序执行时为 1 个）对应一个名额，HTTP 通道中意外需要浏览器的任务组共用
+    browser_slots = BrowserSlots(max(1, worker_processes))
+    durations: dict[int, float] = {}
+    lane_results = await asyncio.gather(
+        _run_http_lane(
+            http_groups,
+            batch_oauth,
+            storage_state_verdicts,
+            http_concurrency,
+            durations,
+            origin_semaphores,
+            browser_slots,
+        ),
+        _run_browser_lane(
+            browser_groups,
+            batch_oauth,
+            storage_state_verdicts,
+            worker_processes,
+            durations,
+            origin_semaphores,
+            browser_slots,
+        ),
+    )
+
+    job_results: dict[int, AccountResults | Exception] = {}
+    for results in lane_results:
+        job_results.update(results)
+
+    if history is not None:
+        for job in jobs:
+            results = job_results.get(job.index)
+            # 签到记录中已完成的任务耗时很短，不计入历史
+            if job.index in durations and isinstance(results, list) and not _all_already_checked_in(results):
+                history.record_duration(job.account_name, job.provider_config.name, durations[job.index])
+    return job_results
+
+
+async def run_balance_jobs(
+    jobs: list[AccountJob],
+    session_store: SessionStore,
+    concurrency: int = 16,
+) -> dict[int, AccountResults | Exception]:
+    """并发查询所有账号的余额（仅使用已保存的会话，不启动浏览器）
+
+    Args:
+        jobs: 账号任务列表
+        session_store: provider 会话缓存
+        concurrency: 最大并发数
+
+    Returns:
+        {任务索引: 账号结果或异常}
+    """
+    from checkin import CheckIn
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _query(job: AccountJob) -> AccountResults | Exception:
+        async with semaphore:
+            checkin = CheckIn(
+                job.account_name,
+                job.account_config,
+                job.provider_config,
+                global_proxy=job.global_proxy,
+                browser_fallback=False,
+                stored_cookies=job.stored_cookies,
+            )
+            try:
+                # CheckIn 使用同步 httpx 客户端，在线程中运行独立的事件循环以实现并发
+                return await asyncio.to_thread(asyncio.run, checkin.query_balance(session_store))
+            except Exception as e:
+                return e
+
+    results = await asyncio.gather(*[_query(job) for job in jobs])
+    return {job.index: result for job, result in zip(jobs, results)}